@@ -25,5 +25,54 @@ class Config(BaseSettings):
     PROFILE: bool = False
     LOGGER: bool = True
 
+    # partial decision tree sessions, see PartialTreeSessionStore
+    PARTIAL_TREE_SESSION_TTL_SECONDS: int = 1800
+    PARTIAL_TREE_SESSION_MAX_COUNT: int = 20
+    # models registered once and used by handle, see ModelRegistry
+    MODEL_REGISTRY_TTL_SECONDS: int = 1800
+    MODEL_REGISTRY_MAX_COUNT: int = 20
+    # precompute the next partial tree expansion while idle, see SpeculativeExpander
+    SPECULATIVE_EXPANSION: bool = False
+    # solver queries one speculative expansion may run, kept below the path query cache size so
+    # speculation does not evict the entries it precomputes
+    SPECULATIVE_EXPANSION_MAX_QUERIES: int = 5000
+    # path query results kept per solved model, the least recently used are evicted
+    PATH_QUERY_CACHE_MAX_SIZE: int = 20_000
+    # largest joint table over the partial order answered without LIMID inference,
+    # see JointTableEngine
+    JOINT_TABLE_MAX_CELLS: int = 1_000_000
+    # tree branches with a cumulative probability below this are not expanded, zero ones never are
+    TREE_PROBABILITY_EPSILON: float = 0.0
+    # memoized partial orders, one per model structure
+    PARTIAL_ORDER_CACHE_TTL_SECONDS: int = 3600
+    PARTIAL_ORDER_CACHE_MAX_COUNT: int = 256
+    # processes building the subtrees of large full decision trees, 1 builds them in the worker,
+    # see ParallelTreeBuilder
+    TREE_BUILD_PROCESSES: int = 1
+    # smallest number of tree leaves, counted before skipping outcomes, built in parallel
+    TREE_BUILD_PARALLEL_MIN_LEAVES: int = 50_000
+    # requests with this key in the X-Trusted-Caller-Key header skip validating the issue copies
+    # in the edges, see decode_trusted_model. Empty disables it
+    TRUSTED_CALLER_KEY: str = Field(default=os.getenv("TRUSTED_CALLER_KEY", ""))
+    # solver and structure requests over these limits are rejected while the body arrives,
+    # the limits are on the objects in the body, the issue copies in the edges included,
+    # not on the issues of the model, see RequestLimitMiddleware
+    MAX_REQUEST_BODY_BYTES: int = 256 * 1024 * 1024
+    MAX_REQUEST_STATE_OBJECTS: int = 500_000
+    MAX_REQUEST_PROBABILITY_OBJECTS: int = 2_000_000
+    # responses from this size are compressed when the caller accepts it, and from the thread
+    # size off the event loop, see CompressionMiddleware
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 4096
+    RESPONSE_COMPRESSION_THREAD_MIN_BYTES: int = 1_000_000
+    # response bodies of solver and structure routes kept for requests with the same model and
+    # parameters, see ResultCache
+    RESULT_CACHE_TTL_SECONDS: int = 3600
+    RESULT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # threads running submitted jobs, and how long jobs and their results are kept after their
+    # last use, see JobManager
+    JOB_WORKERS: int = 2
+    JOB_TTL_SECONDS: int = 3600
+    JOB_MAX_COUNT: int = 100
+
 
 config = Config()
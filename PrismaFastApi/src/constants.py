@@ -19,6 +19,14 @@ class Type(str, Enum):
     END = "End"
 
 
+class ResponseHeaders(str, Enum):
+    SKIPPED_TREE_NODES = "X-Skipped-Tree-Nodes"
+
+
+class RequestHeaders(str, Enum):
+    TRUSTED_CALLER_KEY = "X-Trusted-Caller-Key"
+
+
 class ObjectiveTypes(str, Enum):
     STRATEGIC = "Strategic"
     FUNDAMENTAL = "Fundamental"
@@ -69,6 +77,32 @@ class NodeStates(str, Enum):
     OUTCOME = "outcome"
 
 
+class TreeOutputFormat(str, Enum):
+    NESTED = "nested"
+    COLUMNAR = "columnar"
+
+
+class BatchOperationType(str, Enum):
+    SOLUTION = "solution"
+    PARTIAL_ORDER = "partial_order"
+    EVIDENCE = "evidence"
+    PARTIAL_DECISION_TREE = "partial_decision_tree"
+
+
+class JobType(str, Enum):
+    BATCH = "batch"
+    DECISION_TREE = "decision_tree"
+    OPTIMAL_DECISION_TREE = "optimal_decision_tree"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 class SwaggerDocumentationConstants:
     FILTER_DOC = """
     filter: str (Optional)
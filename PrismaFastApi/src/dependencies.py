@@ -1,8 +1,35 @@
+import hmac
+import uuid
+from typing import Any, Optional
+from fastapi import Body, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import SkipValidation, TypeAdapter, ValidationError
+from src.config import config
+from src.constants import RequestHeaders
 from src.services.solver_service import SolverService
 from src.services.structure_service import StructureService
+from src.services.partial_tree_session import PartialTreeSessionStore
+from src.services.model_registry import CompiledModel, ModelRegistry
+from src.services.batch_service import BatchService
+from src.services.job_manager import Job, JobManager
+from src.services.speculative_expansion import SpeculativeExpander
+from src.services.decision_tree.parallel_tree_builder import ParallelTreeBuilder
 from src.project_lock_manager import ProjectQueueManager
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.dtos.compact_model_dtos import CompactModelDto
+from src.domain.compact_model import ModelDtos, expand_compact_model
+from src.utils.conditional_request import ConditionalRequest
+from src.utils.result_cache import ResultCache
+from src.domain.trusted_model import decode_trusted_model, edges_adapter, issues_adapter
 
 queue_manager = None
+partial_tree_session_store = None
+speculative_expander = None
+parallel_tree_builder = None
+model_registry = None
+result_cache = None
+job_manager = None
 
 
 async def get_project_lock_manager() -> ProjectQueueManager:
@@ -12,9 +39,137 @@ async def get_project_lock_manager() -> ProjectQueueManager:
     return queue_manager
 
 
+async def get_partial_tree_session_store() -> PartialTreeSessionStore:
+    global partial_tree_session_store
+    if partial_tree_session_store is None:
+        partial_tree_session_store = PartialTreeSessionStore()
+    return partial_tree_session_store
+
+
+async def get_speculative_expander() -> SpeculativeExpander:
+    global speculative_expander
+    if speculative_expander is None:
+        speculative_expander = SpeculativeExpander()
+    return speculative_expander
+
+
+async def get_parallel_tree_builder() -> ParallelTreeBuilder:
+    global parallel_tree_builder
+    if parallel_tree_builder is None:
+        parallel_tree_builder = ParallelTreeBuilder()
+    return parallel_tree_builder
+
+
+async def shutdown_parallel_tree_builder() -> None:
+    global parallel_tree_builder
+    if parallel_tree_builder is not None:
+        parallel_tree_builder.shutdown()
+        parallel_tree_builder = None
+
+
+async def get_model_registry() -> ModelRegistry:
+    global model_registry
+    if model_registry is None:
+        model_registry = ModelRegistry()
+    return model_registry
+
+
+async def get_compiled_model(model_id: uuid.UUID) -> CompiledModel:
+    """The registered model of a handle, the handle's lifetime starts over."""
+    model = (await get_model_registry()).get_model(model_id)
+    if model is None:
+        raise HTTPException(
+            status_code=404, detail=f"Model {model_id} is not registered or has expired"
+        )
+    return model
+
+
+async def get_result_cache() -> ResultCache:
+    global result_cache
+    if result_cache is None:
+        result_cache = ResultCache()
+    return result_cache
+
+
+async def get_conditional_request(
+    request: Request, if_none_match: Optional[str] = Header(None)
+) -> ConditionalRequest:
+    return ConditionalRequest(
+        request.url.path, request.method, if_none_match, await get_result_cache()
+    )
+
+
+async def get_job_manager() -> JobManager:
+    global job_manager
+    if job_manager is None:
+        job_manager = JobManager()
+    return job_manager
+
+
+async def get_job(job_id: uuid.UUID) -> Job:
+    """The submitted job, the lifetime of the job and its result starts over."""
+    job = (await get_job_manager()).get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} does not exist or has expired")
+    return job
+
+
 async def get_solver_service() -> SolverService:
     return SolverService()
 
 
 async def get_structure_service() -> StructureService:
-    return StructureService()
+    return StructureService(tree_builder=await get_parallel_tree_builder())
+
+
+async def get_batch_service() -> BatchService:
+    return BatchService(await get_solver_service(), await get_structure_service())
+
+
+def is_trusted_caller(trusted_caller_key: Optional[str]) -> bool:
+    if not config.TRUSTED_CALLER_KEY or trusted_caller_key is None:
+        return False
+    return hmac.compare_digest(trusted_caller_key.encode(), config.TRUSTED_CALLER_KEY.encode())
+
+
+def validate_body_fields(*fields: tuple[str, TypeAdapter[Any], Any]) -> list[Any]:
+    """Validates (name, adapter, value) body fields as FastAPI would, with the same errors."""
+    values: list[Any] = []
+    errors: list[Any] = []
+    for name, adapter, value in fields:
+        try:
+            values.append(adapter.validate_python(value))
+        except ValidationError as exc:
+            errors.extend(
+                {**error, "loc": ("body", name, *error["loc"])}
+                for error in exc.errors(include_url=False)
+            )
+    if errors:
+        raise RequestValidationError(errors)
+    return values
+
+
+async def get_model_dtos(
+    project_id: uuid.UUID,
+    # validated below, only partly for trusted callers
+    issues: Optional[SkipValidation[list[IssueOutgoingDto]]] = Body(None),
+    edges: Optional[SkipValidation[list[EdgeOutgoingDto]]] = Body(None),
+    model: Optional[CompactModelDto] = Body(None),
+    trusted_caller_key: Optional[str] = Header(
+        None, alias=RequestHeaders.TRUSTED_CALLER_KEY.value, include_in_schema=False
+    ),
+) -> ModelDtos:
+    """The model of a request, sent either as issues and edges or as a compact model."""
+    if model is not None:
+        if issues is not None or edges is not None:
+            raise ValueError("Send either issues and edges or a compact model, not both")
+        return expand_compact_model(project_id, model)
+    if issues is None or edges is None:
+        raise ValueError("Either issues and edges or a compact model must be sent")
+    if is_trusted_caller(trusted_caller_key):
+        (validated_issues,) = validate_body_fields(("issues", issues_adapter, issues))
+        return decode_trusted_model(validated_issues, edges)
+    validated_issues, validated_edges = validate_body_fields(
+        ("issues", issues_adapter, issues), ("edges", edges_adapter, edges)
+    )
+    return ModelDtos(issues=validated_issues, edges=validated_edges)
@@ -0,0 +1,226 @@
+import itertools
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from src.constants import DecisionHierarchy, DtoConstants, Type, default_value_metric_id
+from src.utils.generate_uuid import GenerateUuid
+from src.dtos.compact_model_dtos import CompactIssueDto, CompactModelDto
+from src.dtos.decision_dtos import DecisionOutgoingDto
+from src.dtos.discrete_probability_dtos import DiscreteProbabilityOutgoingDto
+from src.dtos.discrete_utility_dtos import DiscreteUtilityOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.node_dtos import NodeOutgoingDto, NodeViaIssueOutgoingDto
+from src.dtos.node_style_dtos import NodeStyleOutgoingDto
+from src.dtos.option_dtos import OptionOutgoingDto
+from src.dtos.outcome_dtos import OutcomeOutgoingDto
+from src.dtos.shared_issue_node_dtos import IssueViaNodeOutgoingDto
+from src.dtos.uncertainty_dtos import UncertaintyOutgoingDto
+from src.dtos.utility_dtos import UtilityOutgoingDto
+
+
+@dataclass(frozen=True)
+class ModelDtos:
+    issues: list[IssueOutgoingDto]
+    edges: list[EdgeOutgoingDto]
+
+
+def create_node_dto(issue: IssueOutgoingDto) -> NodeOutgoingDto:
+    """The node of an issue as the head or tail node of an edge."""
+    return NodeOutgoingDto.model_construct(
+        id=issue.node.id,
+        project_id=issue.project_id,
+        issue_id=issue.id,
+        name=issue.node.name,
+        issue=IssueViaNodeOutgoingDto.model_construct(
+            id=issue.id,
+            project_id=issue.project_id,
+            name=issue.name,
+            description=issue.description,
+            order=issue.order,
+            type=issue.type,
+            boundary=issue.boundary,
+            decision=issue.decision,
+            uncertainty=issue.uncertainty,
+            utility=issue.utility,
+        ),
+        node_style=issue.node.node_style,
+    )
+
+
+def _derived_id(*parts: object) -> uuid.UUID:
+    return GenerateUuid.as_uuid("-".join(str(x) for x in parts))
+
+
+def _round_probability(value: Optional[float]) -> Optional[float]:
+    # as DiscreteProbabilityDto.probability_validator
+    if value is not None:
+        return abs(round(value, DtoConstants.DECIMAL_PLACES.value))
+    return value
+
+
+class CompactModelExpander:
+    """
+    Expands a compact model to the issue and edge dtos the solvers and tree engines work on.
+    The compact model is validated on parsing, so the dtos are constructed without validating
+    them again. Ids of the nodes, tables and edges are derived from the issue ids, so the same
+    compact model always expands to the same dtos.
+    """
+
+    def __init__(self, project_id: uuid.UUID, model: CompactModelDto) -> None:
+        self.project_id = project_id
+        self.model = model
+        self.issues = {issue.id: issue for issue in model.issues}
+        self.parents: dict[uuid.UUID, list[CompactIssueDto]] = {x.id: [] for x in model.issues}
+        for tail_id, head_id in dict.fromkeys(model.arcs):
+            if tail_id not in self.issues or head_id not in self.issues:
+                raise ValueError(
+                    f"Arc {tail_id} -> {head_id} connects an issue that is not in the model"
+                )
+            # only parents with states condition the tables
+            if self.issues[tail_id].states:
+                self.parents[head_id].append(self.issues[tail_id])
+        self.timestamp = datetime.now(timezone.utc)
+
+    def expand(self) -> ModelDtos:
+        issues = [self.create_issue(issue, order) for order, issue in enumerate(self.model.issues)]
+        nodes = {issue.id: create_node_dto(issue) for issue in issues}
+        edges = [
+            EdgeOutgoingDto.model_construct(
+                id=_derived_id(tail_id, head_id, "edge"),
+                tail_id=nodes[tail_id].id,
+                head_id=nodes[head_id].id,
+                project_id=self.project_id,
+                head_node=nodes[head_id],
+                tail_node=nodes[tail_id],
+                head_issue_id=head_id,
+                tail_issue_id=tail_id,
+            )
+            for tail_id, head_id in self.model.arcs
+        ]
+        return ModelDtos(issues=issues, edges=edges)
+
+    def create_issue(self, issue: CompactIssueDto, order: int) -> IssueOutgoingDto:
+        node_id = _derived_id(issue.id, "node")
+        node = NodeViaIssueOutgoingDto.model_construct(
+            id=node_id,
+            project_id=self.project_id,
+            issue_id=issue.id,
+            name=issue.name,
+            node_style=NodeStyleOutgoingDto.model_construct(
+                id=_derived_id(issue.id, "node_style"),
+                node_id=node_id,
+                x_position=0.0,
+                y_position=0.0,
+            ),
+        )
+        return IssueOutgoingDto.model_construct(
+            id=issue.id,
+            project_id=self.project_id,
+            name=issue.name,
+            description="",
+            order=order,
+            type=issue.type.value,
+            boundary=issue.boundary,
+            node=node,
+            decision=self.create_decision(issue) if issue.type == Type.DECISION.value else None,
+            uncertainty=(
+                self.create_uncertainty(issue) if issue.type == Type.UNCERTAINTY.value else None
+            ),
+            utility=self.create_utility(issue) if issue.type == Type.UTILITY.value else None,
+            created_at=self.timestamp,
+            updated_at=self.timestamp,
+        )
+
+    def get_parent_state_combinations(
+        self, issue: CompactIssueDto, states_per_combination: int
+    ) -> list[tuple[list[uuid.UUID], list[uuid.UUID]]]:
+        """Parent option and outcome ids of every row of the table of the issue."""
+        parents = self.parents[issue.id]
+        size = math.prod(len(x.states) for x in parents) * states_per_combination
+        if len(issue.table) != size:
+            raise ValueError(
+                f"Table of issue {issue.id} has {len(issue.table)} values, expected {size}"
+            )
+        combinations: list[tuple[list[uuid.UUID], list[uuid.UUID]]] = []
+        for states in itertools.product(*(x.states for x in parents)):
+            option_ids = [s.id for p, s in zip(parents, states) if p.type == Type.DECISION.value]
+            outcome_ids = [s.id for p, s in zip(parents, states) if p.type != Type.DECISION.value]
+            combinations.append((option_ids, outcome_ids))
+        return combinations
+
+    def create_decision(self, issue: CompactIssueDto) -> DecisionOutgoingDto:
+        decision_id = _derived_id(issue.id, "decision")
+        return DecisionOutgoingDto.model_construct(
+            id=decision_id,
+            issue_id=issue.id,
+            options=[
+                OptionOutgoingDto.model_construct(
+                    id=state.id, name=state.name, decision_id=decision_id, utility=state.utility
+                )
+                for state in issue.states
+            ],
+            type=DecisionHierarchy.FOCUS.value,
+        )
+
+    def create_uncertainty(self, issue: CompactIssueDto) -> UncertaintyOutgoingDto:
+        uncertainty_id = _derived_id(issue.id, "uncertainty")
+        discrete_probabilities: list[DiscreteProbabilityOutgoingDto] = []
+        if issue.table:
+            combinations = self.get_parent_state_combinations(issue, len(issue.states))
+            values = iter(issue.table)
+            for row, (option_ids, outcome_ids) in enumerate(combinations):
+                for state in issue.states:
+                    discrete_probabilities.append(
+                        DiscreteProbabilityOutgoingDto.model_construct(
+                            id=_derived_id(uncertainty_id, row, state.id),
+                            uncertainty_id=uncertainty_id,
+                            outcome_id=state.id,
+                            probability=_round_probability(next(values)),
+                            parent_outcome_ids=outcome_ids,
+                            parent_option_ids=option_ids,
+                        )
+                    )
+        return UncertaintyOutgoingDto.model_construct(
+            id=uncertainty_id,
+            issue_id=issue.id,
+            is_key=True,
+            discrete_probabilities=discrete_probabilities,
+            outcomes=[
+                OutcomeOutgoingDto.model_construct(
+                    id=state.id,
+                    name=state.name,
+                    uncertainty_id=uncertainty_id,
+                    utility=state.utility,
+                )
+                for state in issue.states
+            ],
+        )
+
+    def create_utility(self, issue: CompactIssueDto) -> UtilityOutgoingDto:
+        utility_id = _derived_id(issue.id, "utility")
+        discrete_utilities: list[DiscreteUtilityOutgoingDto] = []
+        if issue.table:
+            combinations = self.get_parent_state_combinations(issue, 1)
+            for row, ((option_ids, outcome_ids), value) in enumerate(
+                zip(combinations, issue.table)
+            ):
+                discrete_utilities.append(
+                    DiscreteUtilityOutgoingDto.model_construct(
+                        id=_derived_id(utility_id, row),
+                        utility_id=utility_id,
+                        value_metric_id=default_value_metric_id,
+                        utility_value=value,
+                        parent_outcome_ids=outcome_ids,
+                        parent_option_ids=option_ids,
+                    )
+                )
+        return UtilityOutgoingDto.model_construct(
+            id=utility_id, issue_id=issue.id, discrete_utilities=discrete_utilities
+        )
+
+
+def expand_compact_model(project_id: uuid.UUID, model: CompactModelDto) -> ModelDtos:
+    return CompactModelExpander(project_id, model).expand()
@@ -1,82 +1,201 @@
+from __future__ import annotations
 import uuid
-from collections import defaultdict
+from array import array
+from collections import deque
+from typing import Iterable, Optional, Sequence
 
 
-class Graph:
+class CsrGraph:
+    """
+    Immutable directed graph over dense integer node indices.
 
-    def __init__(self):
+    Node ids are mapped to the indices 0..n-1 once, in insertion order, and the successors and
+    predecessors of every node are stored as compressed sparse rows: one flat array of
+    neighbours and one array of offsets into it. Neighbours keep the order the edges were
+    added in and duplicate edges are dropped. All traversals are iterative.
+    """
 
-        # Default dictionary to store graph
-        self.graph: defaultdict[uuid.UUID, list[uuid.UUID]] = defaultdict(list[uuid.UUID])
+    def __init__(
+        self, node_ids: Iterable[uuid.UUID], edges: Iterable[tuple[uuid.UUID, uuid.UUID]]
+    ) -> None:
+        self.node_ids: list[uuid.UUID] = []
+        self.index: dict[uuid.UUID, int] = {}
+        for node_id in node_ids:
+            self._add_node(node_id)
 
-    def addEdge(self, tail_vertex_id: uuid.UUID, head_vertex_id: uuid.UUID):
-        self.graph[tail_vertex_id].append(head_vertex_id)
+        edge_indices: list[tuple[int, int]] = []
+        seen_edges: set[tuple[int, int]] = set()
+        for tail_id, head_id in edges:
+            edge = (self._add_node(tail_id), self._add_node(head_id))
+            if edge not in seen_edges:
+                seen_edges.add(edge)
+                edge_indices.append(edge)
 
-    def DFSUtil(self, vertex: uuid.UUID, visited: set[uuid.UUID]):
-        visited.add(vertex)
-        """
-        Depth first search graph traversal utility.
-        Recursive method, with cyclical validation.
-        """
+        self.successor_offsets, self.successor_targets = self._compress(edge_indices, 0)
+        self.predecessor_offsets, self.predecessor_targets = self._compress(edge_indices, 1)
 
-        # Recur for all the vertices
-        # adjacent to this vertex
-        for neighbour in self.graph[vertex]:
-            if neighbour not in visited:
-                self.DFSUtil(neighbour, visited)
+    def _add_node(self, node_id: uuid.UUID) -> int:
+        index = self.index.get(node_id)
+        if index is None:
+            index = len(self.node_ids)
+            self.index[node_id] = index
+            self.node_ids.append(node_id)
+        return index
 
-    def DFS(self, v: uuid.UUID):
-        """
-        Depth first search graph traversal.
-        Uses a recursive method
-        """
+    def _compress(self, edges: list[tuple[int, int]], source: int) -> tuple[array[int], array[int]]:
+        # counting sort on the source node, stable so neighbours keep the edge order
+        offsets = array("l", [0] * (len(self.node_ids) + 1))
+        for edge in edges:
+            offsets[edge[source] + 1] += 1
+        for i in range(len(self.node_ids)):
+            offsets[i + 1] += offsets[i]
+        targets = array("l", [0] * len(edges))
+        positions = offsets[:-1]
+        for edge in edges:
+            targets[positions[edge[source]]] = edge[1 - source]
+            positions[edge[source]] += 1
+        return offsets, targets
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def __contains__(self, node_id: uuid.UUID) -> bool:
+        return node_id in self.index
+
+    def successors(self, node: int) -> Sequence[int]:
+        return self.successor_targets[self.successor_offsets[node] : self.successor_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> Sequence[int]:
+        return self.predecessor_targets[
+            self.predecessor_offsets[node] : self.predecessor_offsets[node + 1]
+        ]
+
+    def out_degree(self, node: int) -> int:
+        return self.successor_offsets[node + 1] - self.successor_offsets[node]
+
+    def in_degree(self, node: int) -> int:
+        return self.predecessor_offsets[node + 1] - self.predecessor_offsets[node]
+
+    def to_ids(self, nodes: Iterable[int]) -> list[uuid.UUID]:
+        return [self.node_ids[node] for node in nodes]
+
+    def to_indices(self, node_ids: Iterable[uuid.UUID]) -> list[int]:
+        return [self.index[node_id] for node_id in node_ids]
 
-        # Create a set to store visited vertices
-        visited: set[uuid.UUID] = set()
+    def sources(self) -> list[int]:
+        """Nodes with no incoming edges."""
+        return [node for node in range(len(self)) if self.in_degree(node) == 0]
 
-        # Call the recursive helper function
-        self.DFSUtil(v, visited)
-        return visited
+    def sinks(self) -> list[int]:
+        """Nodes with no outgoing edges."""
+        return [node for node in range(len(self)) if self.out_degree(node) == 0]
 
-    def detectCycleUtil(
-        self, vertex: uuid.UUID, visited: set[uuid.UUID], recStack: set[uuid.UUID]
-    ) -> bool:
+    def dfs(self, start: int) -> list[int]:
+        """Nodes reachable from start, in depth first preorder."""
+        visited = bytearray(len(self))
+        order: list[int] = []
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if visited[node]:
+                continue
+            visited[node] = 1
+            order.append(node)
+            # reversed, so the first successor is visited first
+            stack.extend(
+                successor for successor in reversed(self.successors(node)) if not visited[successor]
+            )
+        return order
+
+    def topological_order(self, nodes: Optional[Iterable[int]] = None) -> Optional[list[int]]:
         """
-        Utility function to detect cycles in a directed graph using DFS.
+        Kahn's algorithm on the subgraph induced by nodes, all nodes if not given.
+        Nodes are taken in generations, each in node order, and None is returned if the
+        subgraph has a cycle.
         """
-        # Mark the current node as visited and add it to the recursion stack
-        visited.add(vertex)
-        recStack.add(vertex)
-
-        # Recur for all the vertices adjacent to this vertex
-        for neighbour in self.graph[vertex]:
-            # If the neighbour is not visited, recurse on it
-            if neighbour not in visited:
-                if self.detectCycleUtil(neighbour, visited, recStack):
-                    return True
-            # If the neighbour is in the recursion stack, a cycle is detected
-            elif neighbour in recStack:
-                return True
-
-        # Remove the vertex from the recursion stack
-        recStack.remove(vertex)
-        return False
-
-    def detectCycle(self) -> bool:
+        if nodes is None:
+            selected = bytearray(b"\x01") * len(self)
+            node_list = list(range(len(self)))
+        else:
+            selected = bytearray(len(self))
+            node_list = []
+            for node in nodes:
+                if not selected[node]:
+                    selected[node] = 1
+                    node_list.append(node)
+            node_list.sort()
+
+        in_degrees = [0] * len(self)
+        for node in node_list:
+            in_degrees[node] = sum(1 for x in self.predecessors(node) if selected[x])
+
+        queue = deque(node for node in node_list if in_degrees[node] == 0)
+        order: list[int] = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for successor in self.successors(node):
+                if selected[successor]:
+                    in_degrees[successor] -= 1
+                    if in_degrees[successor] == 0:
+                        queue.append(successor)
+        return order if len(order) == len(node_list) else None
+
+    def has_cycle(self) -> bool:
+        return self.topological_order() is None
+
+    def component_labels(self) -> list[int]:
         """
-        Detects if the graph contains a cycle.
+        Weakly connected component label of every node. Components are numbered in the order
+        of their first node.
         """
-        visited: set[uuid.UUID] = set()
-        recStack: set[uuid.UUID] = set()
-
-        # Check for cycles in each connected component
-        # Create a copy of the keys to avoid "dictionary changed size during iteration"
-        vertices = list(self.graph.keys())
-        for vertex in vertices:
-            if vertex not in visited:
-                try:
-                    if self.detectCycleUtil(vertex, visited, recStack):
-                        return True
-                except Exception as e:
-                    raise e
-        return False
+        labels = [-1] * len(self)
+        label = 0
+        for start in range(len(self)):
+            if labels[start] != -1:
+                continue
+            labels[start] = label
+            stack = [start]
+            while stack:
+                node = stack.pop()
+                for neighbour in (*self.successors(node), *self.predecessors(node)):
+                    if labels[neighbour] == -1:
+                        labels[neighbour] = label
+                        stack.append(neighbour)
+            label += 1
+        return labels
+
+
+class GraphBuilder:
+    """
+    Collects nodes and edges in insertion order and builds a CsrGraph from them when the
+    graph is queried. The built graph is kept until a node or an edge is added.
+    """
+
+    def __init__(self) -> None:
+        self.node_ids: dict[uuid.UUID, None] = {}
+        self.edges: list[tuple[uuid.UUID, uuid.UUID]] = []
+        self._graph: Optional[CsrGraph] = None
+
+    def add_node(self, node_id: uuid.UUID) -> None:
+        if node_id not in self.node_ids:
+            self.node_ids[node_id] = None
+            self._graph = None
+
+    def add_edge(self, tail_id: uuid.UUID, head_id: uuid.UUID) -> None:
+        self.add_node(tail_id)
+        self.add_node(head_id)
+        self.edges.append((tail_id, head_id))
+        self._graph = None
+
+    def copy(self) -> GraphBuilder:
+        builder = GraphBuilder()
+        builder.node_ids = dict(self.node_ids)
+        builder.edges = list(self.edges)
+        builder._graph = self._graph
+        return builder
+
+    def build(self) -> CsrGraph:
+        if self._graph is None:
+            self._graph = CsrGraph(self.node_ids, self.edges)
+        return self._graph
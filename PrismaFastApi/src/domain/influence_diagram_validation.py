@@ -0,0 +1,116 @@
+import json
+import uuid
+from dataclasses import dataclass
+from src.constants import Type
+from src.domain.graph import CsrGraph
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+
+
+@dataclass(frozen=True)
+class InfluenceDiagramValidationResult:
+    """
+    Outcome of validating an influence diagram. Only ids and messages are kept, so the result
+    can be cached and applied to any request with the same structure.
+    """
+
+    start_nodes: frozenset[uuid.UUID]
+    end_nodes: frozenset[uuid.UUID]
+    # weakly connected components of the edges, largest first
+    components: tuple[frozenset[uuid.UUID], ...]
+    has_cycle: bool
+    # issues kept when the diagram is reduced to its largest component, None if nothing is removed
+    kept_issue_ids: frozenset[uuid.UUID] | None
+    errors: dict[str, str]
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def raise_if_invalid(self) -> None:
+        if self.errors:
+            raise ValueError(json.dumps(self.errors))
+
+    def filter_issues(self, issues: list[IssueOutgoingDto]) -> list[IssueOutgoingDto]:
+        if self.kept_issue_ids is None:
+            return issues
+        return [issue for issue in issues if issue.id in self.kept_issue_ids]
+
+    def filter_edges(self, edges: list[EdgeOutgoingDto]) -> list[EdgeOutgoingDto]:
+        if self.kept_issue_ids is None:
+            return edges
+        return [
+            edge
+            for edge in edges
+            if edge.tail_issue_id in self.kept_issue_ids
+            and edge.head_issue_id in self.kept_issue_ids
+        ]
+
+
+def validate_influence_diagram(
+    edges: list[EdgeOutgoingDto], issues: list[IssueOutgoingDto]
+) -> InfluenceDiagramValidationResult:
+    """
+    Validates the diagram in one pass over the edges and one over the issues: start and end
+    nodes, cycles, weakly connected components and missing options and outcomes. When the
+    edges form several components the diagram is reduced to the largest one, and only the
+    issues in it are checked for options and outcomes.
+    """
+    graph = CsrGraph([], ((edge.tail_issue_id, edge.head_issue_id) for edge in edges))
+    start_nodes = frozenset(graph.to_ids(graph.sources()))
+    end_nodes = frozenset(graph.to_ids(graph.sinks()))
+    has_cycle = graph.has_cycle()
+
+    component_lists: list[list[uuid.UUID]] = []
+    for node_id, label in zip(graph.node_ids, graph.component_labels()):
+        if label == len(component_lists):
+            component_lists.append([])
+        component_lists[label].append(node_id)
+    # stable sort, ties keep the order the components first appear in the edges
+    components = tuple(
+        frozenset(component) for component in sorted(component_lists, key=len, reverse=True)
+    )
+
+    errors: dict[str, str] = {}
+    edge_validation_messages = ""
+    if len(start_nodes) == 0 and len(end_nodes) == 0:
+        edge_validation_messages += "Invalid influence diagram: no start nodes (nodes with no incoming edges) and no end nodes (nodes with no outgoing edges) found "
+    elif len(start_nodes) == 0:
+        edge_validation_messages += (
+            "Invalid influence diagram: no start nodes (nodes with no incoming edges) found."
+        )
+    elif len(end_nodes) == 0:
+        edge_validation_messages += (
+            "Invalid influence diagram: no end nodes (nodes with no outgoing edges) found."
+        )
+    if len(edges) == 0:
+        edge_validation_messages += "Invalid influence diagram: no edges found."
+    if edge_validation_messages != "":
+        errors["Edges"] = edge_validation_messages.strip()
+
+    kept_issue_ids = components[0] if len(components) > 1 else None
+    kept_issues = (
+        issues if kept_issue_ids is None else [x for x in issues if x.id in kept_issue_ids]
+    )
+    if len(kept_issues) == 0:
+        errors["NoIssues"] = "Invalid influence diagram: no issues found."
+
+    if has_cycle:
+        errors["NoLoops"] = "Cycle in Influence diagram detected."
+
+    for issue in kept_issues:
+        if issue.type == Type.UNCERTAINTY:
+            if issue.uncertainty is None or len(issue.uncertainty.outcomes) == 0:
+                errors["UncertaintyOutcomes"] = f"No Outcomes found for Uncertainty {issue.name}."
+        if issue.type == Type.DECISION:
+            if issue.decision is None or len(issue.decision.options) == 0:
+                errors["DecisionOptions"] = f"No Options found for Decision {issue.name}."
+
+    return InfluenceDiagramValidationResult(
+        start_nodes=start_nodes,
+        end_nodes=end_nodes,
+        components=components,
+        has_cycle=has_cycle,
+        kept_issue_ids=kept_issue_ids,
+        errors=errors,
+    )
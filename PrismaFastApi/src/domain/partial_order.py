@@ -0,0 +1,82 @@
+import uuid
+from dataclasses import dataclass
+from src.config import config
+from src.constants import Type
+from src.domain.graph import CsrGraph
+from src.utils.timed_cache import timed_lru_cache
+
+
+@dataclass(frozen=True)
+class ModelStructure:
+    """Hashable issue graph of a model, the part that decides the partial order."""
+
+    issue_ids: tuple[uuid.UUID, ...]
+    issue_types: tuple[str, ...]
+    edges: tuple[tuple[uuid.UUID, uuid.UUID], ...]
+
+
+@dataclass(frozen=True)
+class PartialOrder:
+    decision_elimination_order: tuple[uuid.UUID, ...]
+    partial_order: tuple[uuid.UUID, ...]
+
+
+def _elimination_passes(graph: CsrGraph) -> list[int]:
+    """
+    Pass in which every node is eliminated when the remaining nodes are swept in node order
+    and each node without remaining children is removed. A node is eliminated in the pass of
+    its last child, or the pass after when that child comes later in node order:
+    pass(v) = max(1, max over children c of pass(c) + [c > v]).
+    """
+    topological_order = graph.topological_order()
+    if topological_order is None:
+        raise ValueError("Cycle in Influence diagram detected.")
+    passes = [1] * len(graph)
+    for node in reversed(topological_order):
+        for child in graph.successors(node):
+            passes[node] = max(passes[node], passes[child] + (child > node))
+    return passes
+
+
+@timed_lru_cache(
+    seconds=config.PARTIAL_ORDER_CACHE_TTL_SECONDS, maxsize=config.PARTIAL_ORDER_CACHE_MAX_COUNT
+)
+def calculate_partial_order(structure: ModelStructure) -> PartialOrder:
+    """
+    Decision elimination order and partial order of the issues in O(V+E), memoized per model
+    structure.
+
+    Decisions are placed in reverse elimination order, each preceded by its uncertainty parents
+    not placed yet, and the remaining uncertainties follow in topological order.
+    """
+    graph = CsrGraph(structure.issue_ids, structure.edges)
+    is_decision = [x == Type.DECISION.value for x in structure.issue_types]
+    is_uncertainty = [x == Type.UNCERTAINTY.value for x in structure.issue_types]
+
+    passes = _elimination_passes(graph)
+    elimination_order = [
+        node
+        for node in sorted(range(len(graph)), key=lambda node: (passes[node], node))
+        if is_decision[node]
+    ]
+
+    uncertainty_order = graph.topological_order(
+        node for node in range(len(graph)) if is_uncertainty[node]
+    )
+    if uncertainty_order is None:
+        raise ValueError("Cycle in Influence diagram detected.")
+
+    placed = bytearray(len(graph))
+    partial_order: list[int] = []
+    for decision in reversed(elimination_order):
+        for parent in graph.predecessors(decision):
+            if is_uncertainty[parent] and not placed[parent]:
+                placed[parent] = 1
+                partial_order.append(parent)
+        partial_order.append(decision)
+    partial_order += [node for node in uncertainty_order if not placed[node]]
+
+    return PartialOrder(
+        decision_elimination_order=tuple(graph.to_ids(elimination_order)),
+        partial_order=tuple(graph.to_ids(partial_order)),
+    )
@@ -0,0 +1,47 @@
+import uuid
+from typing import Iterable, Mapping, Optional
+from src.dtos.model_solution_dtos import OptimalOption
+
+# parent issue ids of a decision and its optimal option for every combination of their states
+PolicyGroup = tuple[tuple[uuid.UUID, ...], dict[tuple[uuid.UUID, ...], OptimalOption]]
+
+
+class PolicyTable:
+    """
+    Optimal options of a solution indexed by decision id and parent states, so the optimal
+    option of a decision is found with one lookup instead of scanning every optimal option.
+    """
+
+    def __init__(self, optimal_options: Iterable[OptimalOption]) -> None:
+        # decision id -> policy groups, one per set of parents the options are conditioned on
+        self.policies: dict[uuid.UUID, list[PolicyGroup]] = {}
+        # state id -> id of the issue it belongs to, for the states a policy depends on
+        self.state_issue_ids: dict[uuid.UUID, uuid.UUID] = {}
+
+        for option in optimal_options:
+            parent_states = {
+                parent_state.parent_id: parent_state.state.id
+                for parent_state in option.parent_states
+            }
+            for parent_id, state_id in parent_states.items():
+                self.state_issue_ids[state_id] = parent_id
+
+            parent_ids = tuple(sorted(parent_states))
+            groups = self.policies.setdefault(option.decision_id, [])
+            table = next((table for ids, table in groups if ids == parent_ids), None)
+            if table is None:
+                table = {}
+                groups.append((parent_ids, table))
+            # the first option wins when several are optimal for the same parent states
+            table.setdefault(tuple(parent_states[x] for x in parent_ids), option)
+
+    def get_optimal_option(
+        self, decision_id: uuid.UUID, issue_states: Mapping[uuid.UUID, uuid.UUID]
+    ) -> Optional[OptimalOption]:
+        """Optimal option of the decision given the current state of each issue on the path."""
+        for parent_ids, table in self.policies.get(decision_id, []):
+            key = tuple(issue_states.get(parent_id) for parent_id in parent_ids)
+            option = table.get(key)  # type: ignore
+            if option is not None:
+                return option
+        return None
@@ -0,0 +1,46 @@
+import uuid
+from typing import Any
+from pydantic import TypeAdapter
+from src.domain.compact_model import ModelDtos, create_node_dto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.dtos.issue_dtos import IssueOutgoingDto
+
+issues_adapter = TypeAdapter(list[IssueOutgoingDto])
+edges_adapter = TypeAdapter(list[EdgeOutgoingDto])
+
+
+def decode_trusted_model(issues: list[IssueOutgoingDto], edges: list[Any]) -> ModelDtos:
+    """
+    Builds the model sent by a trusted caller, which has validated it already, from the validated
+    issues and the unvalidated edges. Validating the issues is fast in pydantic-core, faster than
+    constructing them in python. The edges are only checked to reference issues of the model and
+    are rebuilt from those issues, so the copies of the head and tail issues every edge carries,
+    most of a large body, are never validated.
+    """
+    nodes = {issue.id: create_node_dto(issue) for issue in issues}
+    validated_edges: list[EdgeOutgoingDto] = []
+    for edge in edges:
+        try:
+            tail_issue_id = uuid.UUID(edge["tail_issue_id"])
+            head_issue_id = uuid.UUID(edge["head_issue_id"])
+            edge_id = uuid.UUID(edge["id"])
+            project_id = uuid.UUID(edge["project_id"])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError(
+                "Every edge needs a valid id, project_id, tail_issue_id and head_issue_id"
+            )
+        if tail_issue_id not in nodes or head_issue_id not in nodes:
+            raise ValueError(f"Edge {edge_id} connects an issue that is not in the model")
+        validated_edges.append(
+            EdgeOutgoingDto.model_construct(
+                id=edge_id,
+                tail_id=nodes[tail_issue_id].id,
+                head_id=nodes[head_issue_id].id,
+                project_id=project_id,
+                head_node=nodes[head_issue_id],
+                tail_node=nodes[tail_issue_id],
+                head_issue_id=head_issue_id,
+                tail_issue_id=tail_issue_id,
+            )
+        )
+    return ModelDtos(issues=issues, edges=validated_edges)
@@ -0,0 +1,35 @@
+import uuid
+from pydantic import BaseModel
+from typing import Optional
+from src.constants import BatchOperationType, TreeOutputFormat
+from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.evidence_dtos import EvidenceIncomingDto, EvidenceOutgoingDto
+from src.dtos.decision_tree_dtos import ColumnarTreeDto, PartialOrderDto, TreeNodeDto2
+
+BatchOperationResult = (
+    SolutionDto | PartialOrderDto | list[EvidenceOutgoingDto] | TreeNodeDto2 | ColumnarTreeDto
+)
+
+
+class BatchOperationDto(BaseModel):
+    type: BatchOperationType
+    # used by partial_decision_tree
+    paths: list[list[uuid.UUID]] = []
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED
+    # used by evidence
+    evidence: list[EvidenceIncomingDto] = []
+
+
+class BatchOperationResultDto(BaseModel):
+    type: BatchOperationType
+    duration_ms: float
+    result: Optional[BatchOperationResult] = None
+    # set instead of result when the operation failed, the other operations still run
+    error: Optional[str] = None
+
+
+class BatchResultDto(BaseModel):
+    model_fingerprint: str
+    # solving the model, done once for all operations needing it
+    solve_duration_ms: Optional[float] = None
+    results: list[BatchOperationResultDto] = []
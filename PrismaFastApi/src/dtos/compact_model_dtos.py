@@ -0,0 +1,31 @@
+import uuid
+from typing import Optional
+from pydantic import BaseModel
+from src.constants import Boundary, Type
+
+
+class CompactStateDto(BaseModel):
+    id: uuid.UUID
+    name: str = ""
+    utility: float = 0.0
+
+
+class CompactIssueDto(BaseModel):
+    id: uuid.UUID
+    type: Type
+    name: str = ""
+    boundary: str = Boundary.IN.value
+    # options of a decision or outcomes of an uncertainty
+    states: list[CompactStateDto] = []
+    # dense probability or utility table over the states of the parents, in the order of the
+    # arcs into the issue with the last parent varying fastest. An uncertainty has one
+    # probability per own state for every combination, innermost.
+    table: list[Optional[float]] = []
+
+
+class CompactModelDto(BaseModel):
+    """Model with only the ids, types, states, arcs and tables needed to solve it."""
+
+    issues: list[CompactIssueDto]
+    # (tail issue id, head issue id)
+    arcs: list[tuple[uuid.UUID, uuid.UUID]] = []
@@ -68,6 +68,43 @@ class TreeNodeDto2(BaseModel):
     children: Optional[List["TreeNodeDto2"]] = None
 
 
+class TreeNodeIncrementDto(TreeNodeDto2):
+    parent_id: Optional[uuid.UUID] = None  # None for the root node
+
+
+class PartialDecisionTreeIncrementDto(BaseModel):
+    model_fingerprint: str
+    # nodes added by the expansion, parents are listed before their children
+    nodes: List[TreeNodeIncrementDto] = []
+
+
+class ColumnarTreeDto(BaseModel):
+    """
+    A TreeNodeDto2 tree with the issues and states listed once and one entry per tree node in
+    each of the node lists, parents before their children. Indices of -1 are no parent, no
+    issue for end points and no state for the root.
+    """
+
+    issue_ids: List[uuid.UUID] = []
+    issue_types: List[str] = []
+    # option and outcome ids, as in parent_state_id
+    state_ids: List[str] = []
+    state_names: List[str] = []
+
+    parent_indices: List[int] = []
+    issue_indices: List[int] = []
+    state_indices: List[int] = []
+    expected_values: List[Optional[float]] = []
+    endpoint_values: List[Optional[float]] = []
+    cumulative_probabilities: List[Optional[float]] = []
+
+    # probabilities and utilities of the states of node i, in value_offsets[i]:value_offsets[i + 1]
+    value_offsets: List[int] = [0]
+    value_state_indices: List[int] = []
+    value_probabilities: List[Optional[float]] = []
+    value_utilities: List[Optional[float]] = []
+
+
 class DecisionTreeDto(BaseModel):
     tree_node: TreeNodeDto
 
@@ -0,0 +1,18 @@
+import uuid
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+from src.constants import JobStatus, JobType
+
+
+class JobDto(BaseModel):
+    job_id: uuid.UUID
+    project_id: uuid.UUID
+    job_type: JobType
+    status: JobStatus
+    # batch jobs have a step per operation, other jobs a single step
+    completed_steps: int
+    total_steps: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,10 @@
+import uuid
+from pydantic import BaseModel
+
+
+class ModelHandleDto(BaseModel):
+    model_id: uuid.UUID
+    project_id: uuid.UUID
+    model_fingerprint: str
+    # the handle expires when it has not been used for this long
+    expires_in_seconds: int
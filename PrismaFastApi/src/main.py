@@ -1,22 +1,38 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, status
+import src.routes.job_routes as job_routes
+import src.routes.model_routes as model_routes
 import src.routes.solver_routes as solver_routes
 import src.routes.structure_routes as structure_routes
 from src.config import config
+from src.constants import ResponseHeaders
+from src.dependencies import shutdown_parallel_tree_builder
 from src.middleware.py_instrument_middle_ware import PyInstrumentMiddleWare
 from fastapi.middleware.cors import CORSMiddleware
 from azure.monitor.opentelemetry import configure_azure_monitor  # type: ignore
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor  # type: ignore
 
+from src.middleware.compression_middleware import CompressionMiddleware
 from src.middleware.exception_handling_middleware import ExceptionFilterMiddleware
 from src.middleware.load_check_middleware import LoadCheckMiddleware
+from src.middleware.request_limit_middleware import RequestLimitMiddleware
+from src.middleware.speculation_cancel_middleware import SpeculationCancelMiddleware
 from src.logger import DOT_API_LOGGER_NAME, get_dot_api_logger
 
 logger = get_dot_api_logger()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # stops the worker processes of the parallel tree builds
+    await shutdown_parallel_tree_builder()
+
+
 app = FastAPI(
     swagger_ui_parameters={"syntaxHighlight": False},
+    lifespan=lifespan,
 )
 
 if config.LOGGER:
@@ -36,14 +52,21 @@ app.add_middleware(
     allow_credentials=True,  # Allow credentials (cookies, authorization headers, etc.)
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all HTTP headers
+    expose_headers=[ResponseHeaders.SKIPPED_TREE_NODES.value],  # Response metadata headers
 )
+app.add_middleware(RequestLimitMiddleware)
 app.add_middleware(LoadCheckMiddleware)
 app.add_middleware(ExceptionFilterMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 if config.PROFILE:
     # this will generate a profile.html at repository root when running any endpoint
     app.add_middleware(PyInstrumentMiddleWare)
 
+if config.SPECULATIVE_EXPANSION:
+    # cancels the speculative partial tree expansion when a request arrives
+    app.add_middleware(SpeculationCancelMiddleware)
+
 
 @app.get("/", status_code=status.HTTP_200_OK)
 async def root():
@@ -54,6 +77,8 @@ app.include_router(
     solver_routes.router,
 )
 app.include_router(structure_routes.router)
+app.include_router(model_routes.router)
+app.include_router(job_routes.router)
 
 if __name__ == "__main__":
     uvicorn.run("src.main:app", port=8080)
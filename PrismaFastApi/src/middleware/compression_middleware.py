@@ -0,0 +1,110 @@
+import asyncio
+import gzip
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config import config
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # optional, responses are only gzip compressed without it
+    zstandard = None
+
+
+def choose_encoding(accept_encoding: str, encodings: tuple[str, ...]) -> Optional[str]:
+    """The encoding with the highest quality in the Accept-Encoding header, ties in our order."""
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, parameters = part.partition(";")
+        quality = 1.0
+        parameters = parameters.strip()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    default_quality = qualities.get("*", 0.0)
+    accepted = [x for x in encodings if qualities.get(x, default_quality) > 0]
+    if not accepted:
+        return None
+    return max(accepted, key=lambda x: qualities.get(x, default_quality))
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least minimum_size bytes with zstd or gzip, as negotiated by the
+    Accept-Encoding header. Bodies of at least thread_minimum_size bytes are compressed in a
+    thread so the event loop is not blocked. Responses without a Content-Length, i.e. streamed
+    ones, are sent as they are.
+
+    A pure ASGI middleware, unlike starlette's GZipMiddleware it supports zstd and compresses
+    large bodies off the event loop.
+    """
+
+    GZIP_LEVEL = 5
+    ZSTD_LEVEL = 3
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = config.RESPONSE_COMPRESSION_MIN_BYTES,
+        thread_minimum_size: int = config.RESPONSE_COMPRESSION_THREAD_MIN_BYTES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.encodings = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        chunks: list[bytes] = []
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_length = headers.get("content-length", "")
+                if (
+                    content_length.isdigit()
+                    and int(content_length) >= self.minimum_size
+                    and "content-encoding" not in headers
+                ):
+                    # held back until the whole body is there
+                    start_message = message
+                    return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            chunks.clear()
+            if len(body) >= self.thread_minimum_size:
+                compressed = await asyncio.to_thread(self.compress, body, encoding)
+            else:
+                compressed = self.compress(body, encoding)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "zstd":
+            # compressors are not thread safe, so one per body
+            return zstandard.ZstdCompressor(level=self.ZSTD_LEVEL).compress(body)
+        return gzip.compress(body, compresslevel=self.GZIP_LEVEL, mtime=0)
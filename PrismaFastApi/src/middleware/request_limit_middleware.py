@@ -0,0 +1,126 @@
+from typing import Optional
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config import config
+from src.logger import get_dot_api_logger
+
+logger = get_dot_api_logger()
+
+OPTION_KEY = b'"decision_id"'
+# outcomes and discrete probabilities both have an uncertainty_id
+UNCERTAINTY_KEY = b'"uncertainty_id"'
+PROBABILITY_KEY = b'"probability"'
+COUNTED_KEYS = (OPTION_KEY, UNCERTAINTY_KEY, PROBABILITY_KEY)
+
+
+class BodyCounter:
+    """
+    Counts the bytes of a JSON body and how often the counted keys occur in it, chunk by chunk.
+    Keys split between two chunks are found by searching the end of the previous chunk too.
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.counts = dict.fromkeys(COUNTED_KEYS, 0)
+        self.tail = b""
+
+    def add(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        data = self.tail + chunk
+        for key in COUNTED_KEYS:
+            # occurrences within the tail were counted with the previous chunk
+            self.counts[key] += data.count(key) - self.tail.count(key)
+        self.tail = data[-(max(len(x) for x in COUNTED_KEYS) - 1) :]
+
+    @property
+    def probability_object_count(self) -> int:
+        return self.counts[PROBABILITY_KEY]
+
+    @property
+    def state_object_count(self) -> int:
+        return (
+            self.counts[OPTION_KEY] + self.counts[UNCERTAINTY_KEY] - self.counts[PROBABILITY_KEY]
+        )
+
+    def get_exceeded_limit(self) -> Optional[str]:
+        if self.size > config.MAX_REQUEST_BODY_BYTES:
+            return f"Request body is larger than {config.MAX_REQUEST_BODY_BYTES} bytes"
+        if self.state_object_count > config.MAX_REQUEST_STATE_OBJECTS:
+            limit = config.MAX_REQUEST_STATE_OBJECTS
+            return f"Request body has more than {limit} option and outcome objects"
+        if self.probability_object_count > config.MAX_REQUEST_PROBABILITY_OBJECTS:
+            limit = config.MAX_REQUEST_PROBABILITY_OBJECTS
+            return f"Request body has more than {limit} discrete probability objects"
+        return None
+
+
+class RequestLimitMiddleware:
+    """
+    Counts the bytes and the option and outcome and discrete probability objects of solver,
+    structure, model and job request bodies while the route reads them, and rejects a request
+    with 413 as soon as one is over its limit, before the body is parsed. The limits are on the
+    objects in the body, so the issue copies in the edges are counted too, not on the issues of
+    the model. Compact models only have their size limited.
+
+    The chunks are handed on as they arrive and not held here, a rejected body is not read to
+    the end and the route sees a disconnect.
+    A pure ASGI middleware, as BaseHTTPMiddleware cannot read the body and hand it on.
+    """
+
+    PATH_PREFIXES = ("/solvers/", "/structure/", "/models/", "/jobs/")
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > config.MAX_REQUEST_BODY_BYTES:
+            message = f"Request body is larger than {config.MAX_REQUEST_BODY_BYTES} bytes"
+            await self.reject(message, scope, receive, send)
+            return
+
+        counter = BodyCounter()
+        rejected = False
+        response_started = False
+
+        async def counting_receive() -> Message:
+            nonlocal rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            counter.add(message.get("body", b""))
+            exceeded_limit = counter.get_exceeded_limit()
+            if exceeded_limit is None:
+                return message
+            rejected = True
+            if not response_started:
+                await self.reject(exceeded_limit, scope, receive, send)
+            return {"type": "http.disconnect"}
+
+        async def checked_send(message: Message) -> None:
+            nonlocal response_started
+            # the route's response to the disconnect is dropped, the 413 was sent instead
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, checked_send)
+        except Exception:
+            # the error of a route that was cut off is not reported, the 413 was
+            if not rejected:
+                raise
+
+    async def reject(self, message: str, scope: Scope, receive: Receive, send: Send) -> None:
+        logger.error(f"Request rejected: {message}")
+        response = JSONResponse(status_code=413, content={"message": message})
+        await response(scope, receive, send)
@@ -0,0 +1,12 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from src.dependencies import get_speculative_expander
+
+
+class SpeculationCancelMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):  # type: ignore
+        # real requests always take priority over speculative work
+        speculative_expander = await get_speculative_expander()
+        speculative_expander.cancel()
+        response = await call_next(request)
+        return response
@@ -0,0 +1,138 @@
+import asyncio
+import uuid
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from src.constants import JobStatus, JobType, ResponseHeaders, TreeOutputFormat
+from src.services.batch_service import BatchService
+from src.services.job_manager import Job, JobManager
+from src.services.model_registry import CompiledModel
+from src.services.solver_service import SolverService
+from src.services.structure_service import StructureService
+from src.services.decision_tree.columnar_tree_encoder import encode_tree
+from src.utils.conditional_request import get_request_key
+from src.utils.json_response import PydanticJsonResponse
+from src.dependencies import (
+    get_batch_service,
+    get_job,
+    get_job_manager,
+    get_model_dtos,
+    get_solver_service,
+    get_structure_service,
+)
+from src.domain.compact_model import ModelDtos
+from src.dtos.batch_dtos import BatchOperationDto
+from src.dtos.job_dtos import JobDto
+
+router = APIRouter(tags=["jobs"])
+
+
+@router.post("/jobs/project/{project_id}/batch", status_code=202)
+async def submit_batch_job(
+    request: Request,
+    project_id: uuid.UUID,
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    operations: list[BatchOperationDto] = Body(...),
+    batch_service: BatchService = Depends(get_batch_service),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JobDto:
+    """
+    Run the batch operations as a job. Poll /jobs/{job_id} until it has finished and fetch the
+    result, a BatchResultDto, from /jobs/{job_id}/result. Submitting the same request again
+    returns the job already submitted.
+    """
+
+    async def work(job: Job) -> Response:
+        model = CompiledModel(project_id, model_dtos)
+        async with model.lock:
+            result = await batch_service.run(
+                model, operations, on_operation_done=job.complete_step
+            )
+        return PydanticJsonResponse(result)
+
+    job_key = get_request_key(request.url.path, model_dtos, operations)
+    job = job_manager.submit(
+        job_key, project_id, JobType.BATCH, work, total_steps=max(len(operations), 1)
+    )
+    return job.to_dto()
+
+
+@router.post("/jobs/project/{project_id}/decision_tree/v3", status_code=202)
+async def submit_decision_tree_job(
+    request: Request,
+    project_id: uuid.UUID,
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
+    structure_service: StructureService = Depends(get_structure_service),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JobDto:
+    """Build the full decision tree as a job, the result is as from /structure decision_tree/v3."""
+
+    async def work(job: Job) -> Response:
+        result = await asyncio.to_thread(
+            structure_service.create_decision_tree_from_dtos_optimal,
+            project_id,
+            model_dtos.issues,
+            model_dtos.edges,
+        )
+        return PydanticJsonResponse(
+            encode_tree(result, output_format),
+            headers={
+                ResponseHeaders.SKIPPED_TREE_NODES.value: str(
+                    structure_service.skipped_tree_node_count
+                )
+            },
+        )
+
+    job_key = get_request_key(request.url.path, model_dtos, output_format)
+    return job_manager.submit(job_key, project_id, JobType.DECISION_TREE, work).to_dto()
+
+
+@router.post("/jobs/project/{project_id}/optimal_decision_tree/v2", status_code=202)
+async def submit_optimal_decision_tree_job(
+    request: Request,
+    project_id: uuid.UUID,
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    solver_service: SolverService = Depends(get_solver_service),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JobDto:
+    """Build the optimal decision tree as a job, the result is as from /solvers decision_tree/v2."""
+
+    async def work(job: Job) -> Response:
+        result = await solver_service.get_decision_tree_for_optimal_decisions_from_dtos(
+            project_id, model_dtos.issues, model_dtos.edges
+        )
+        return PydanticJsonResponse(
+            result,
+            headers={
+                ResponseHeaders.SKIPPED_TREE_NODES.value: str(
+                    solver_service.skipped_tree_node_count
+                )
+            },
+        )
+
+    job_key = get_request_key(request.url.path, model_dtos)
+    return job_manager.submit(job_key, project_id, JobType.OPTIMAL_DECISION_TREE, work).to_dto()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job: Job = Depends(get_job)) -> JobDto:
+    return job.to_dto()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job: Job = Depends(get_job)) -> Response:
+    """The response of a succeeded job, or the error of a failed one as the route would return."""
+    if job.status == JobStatus.SUCCEEDED and job.body is not None:
+        return Response(content=job.body, headers=job.headers)
+    if job.status == JobStatus.FAILED:
+        return JSONResponse(status_code=job.error_status_code, content={"message": job.error})
+    raise HTTPException(status_code=409, detail=f"Job {job.job_id} is {job.status.value}")
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(
+    job: Job = Depends(get_job),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JobDto:
+    job_manager.cancel(job)
+    return job.to_dto()
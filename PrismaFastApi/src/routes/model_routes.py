@@ -0,0 +1,218 @@
+import asyncio
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Body, Depends
+from src.project_lock_manager import ProjectQueueManager
+from src.services.model_registry import CompiledModel, ModelRegistry
+from src.services.solver_service import SolverService
+from src.services.batch_service import BatchService
+from src.services.structure_service import StructureService
+from src.constants import ResponseHeaders, TreeOutputFormat
+from src.utils.json_response import PydanticJsonResponse
+from src.services.decision_tree.columnar_tree_encoder import encode_tree
+from src.dependencies import (
+    get_batch_service,
+    get_compiled_model,
+    get_model_dtos,
+    get_model_registry,
+    get_project_lock_manager,
+    get_solver_service,
+    get_structure_service,
+)
+from src.domain.compact_model import ModelDtos
+from src.dtos.model_handle_dtos import ModelHandleDto
+from src.dtos.batch_dtos import BatchOperationDto, BatchResultDto
+from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.evidence_dtos import EvidenceIncomingDto, EvidenceOutgoingDto
+from src.dtos.decision_tree_dtos import (
+    ColumnarTreeDto,
+    DecisionTreeDto,
+    PartialOrderDto,
+    TreeNodeDto2,
+)
+
+router = APIRouter(tags=["models"])
+
+
+@router.post("/models/project/{project_id}")
+async def register_model(
+    project_id: uuid.UUID,
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    model_registry: ModelRegistry = Depends(get_model_registry),
+) -> ModelHandleDto:
+    """
+    Register the model once and use the returned handle with the /models/{model_id} routes
+    instead of sending the model every time. The model is solved on first use and the solved
+    model is reused by every later request. The handle expires when unused for
+    expires_in_seconds, requests with an expired handle get 404 and should register again.
+    """
+    return model_registry.register(project_id, model_dtos)
+
+
+@router.delete("/models/{model_id}")
+async def delete_model(
+    model_id: uuid.UUID,
+    model_registry: ModelRegistry = Depends(get_model_registry),
+) -> None:
+    model_registry.remove_model(model_id)
+
+
+@router.post("/models/{model_id}/solvers", response_model=SolutionDto)
+async def get_optimal_decisions_for_model(
+    model: CompiledModel = Depends(get_compiled_model),
+) -> PydanticJsonResponse:
+    async with model.lock:
+        result = await model.get_solution()
+    return PydanticJsonResponse(result)
+
+
+@router.post("/models/{model_id}/solvers/with_evidence")
+async def get_optimal_decisions_for_model_with_evidence(
+    evidence: list[EvidenceIncomingDto] = Body([], embed=True),
+    model: CompiledModel = Depends(get_compiled_model),
+    solver_service: SolverService = Depends(get_solver_service),
+) -> list[EvidenceOutgoingDto]:
+    async with model.lock:
+        solver = await model.get_solver()
+        results = solver.get_mean_expected_utilities([e.state_ids for e in evidence])
+    return solver_service.populate_evidence(evidence, results)
+
+
+@router.post(
+    "/models/{model_id}/solvers/decision_tree/v2", response_model=Optional[DecisionTreeDto]
+)
+async def get_optimal_decisions_for_model_as_tree(
+    model: CompiledModel = Depends(get_compiled_model),
+    solver_service: SolverService = Depends(get_solver_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+) -> PydanticJsonResponse:
+    async with lock_manager.acquire_project_lock(model.project_id):
+        async with model.lock:
+            solution = await model.get_solution()
+        result = await asyncio.to_thread(
+            solver_service.create_pruned_decision_tree,
+            model.project_id,
+            model.issues,
+            model.edges,
+            solution,
+        )
+    return PydanticJsonResponse(
+        result,
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(solver_service.skipped_tree_node_count)
+        },
+    )
+
+
+@router.post(
+    "/models/{model_id}/solvers/partial_decision_tree/v3",
+    response_model=Optional[TreeNodeDto2 | ColumnarTreeDto],
+)
+async def get_optimal_decisions_for_model_as_partial_tree(
+    paths: list[list[uuid.UUID]] = Body([], embed=True),
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
+    model: CompiledModel = Depends(get_compiled_model),
+    solver_service: SolverService = Depends(get_solver_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+) -> PydanticJsonResponse:
+    async with lock_manager.acquire_project_lock(model.project_id):
+        async with model.lock:
+            solver = await model.get_solver()
+            result = solver_service.create_optimal_partial_decision_tree(
+                model.project_id,
+                model.issues,
+                model.edges,
+                paths,
+                solver,
+                await model.get_solution(),
+            )
+    return PydanticJsonResponse(encode_tree(result, output_format))
+
+
+@router.post("/models/{model_id}/structure/partial_order", response_model=Optional[PartialOrderDto])
+async def get_partial_order_for_model(
+    model: CompiledModel = Depends(get_compiled_model),
+    structure_service: StructureService = Depends(get_structure_service),
+) -> PydanticJsonResponse:
+    result = await model.get_partial_order(structure_service)
+    return PydanticJsonResponse(result)
+
+
+@router.post(
+    "/models/{model_id}/structure/decision_tree/v2", response_model=Optional[DecisionTreeDto]
+)
+async def build_decision_tree_for_model(
+    model: CompiledModel = Depends(get_compiled_model),
+    structure_service: StructureService = Depends(get_structure_service),
+) -> PydanticJsonResponse:
+    result = await structure_service.create_decision_tree_from_dtos(
+        model.project_id, model.issues, model.edges
+    )
+    return PydanticJsonResponse(
+        result,
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(
+                structure_service.skipped_tree_node_count
+            )
+        },
+    )
+
+
+@router.post(
+    "/models/{model_id}/structure/decision_tree/v3",
+    response_model=Optional[TreeNodeDto2 | ColumnarTreeDto],
+)
+async def build_decision_tree_for_model_optimal(
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
+    model: CompiledModel = Depends(get_compiled_model),
+    structure_service: StructureService = Depends(get_structure_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+) -> PydanticJsonResponse:
+    async with lock_manager.acquire_project_lock(model.project_id):
+        result = await asyncio.to_thread(
+            structure_service.create_decision_tree_from_dtos_optimal,
+            model.project_id,
+            model.issues,
+            model.edges,
+        )
+    return PydanticJsonResponse(
+        encode_tree(result, output_format),
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(
+                structure_service.skipped_tree_node_count
+            )
+        },
+    )
+
+
+@router.post(
+    "/models/{model_id}/structure/partial_decision_tree/v3",
+    response_model=Optional[TreeNodeDto2 | ColumnarTreeDto],
+)
+async def build_partial_decision_tree_for_model_optimal(
+    paths: list[list[uuid.UUID]] = Body(..., embed=True),
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
+    model: CompiledModel = Depends(get_compiled_model),
+    structure_service: StructureService = Depends(get_structure_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+) -> PydanticJsonResponse:
+    async with lock_manager.acquire_project_lock(model.project_id):
+        async with model.lock:
+            solver = await model.get_solver()
+            result = structure_service.create_partial_decision_tree(
+                model.project_id, model.issues, model.edges, paths, solver
+            )
+    return PydanticJsonResponse(encode_tree(result, output_format))
+
+
+@router.post("/models/{model_id}/batch", response_model=BatchResultDto)
+async def run_batch_for_model(
+    operations: list[BatchOperationDto] = Body(..., embed=True),
+    model: CompiledModel = Depends(get_compiled_model),
+    batch_service: BatchService = Depends(get_batch_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+) -> PydanticJsonResponse:
+    async with lock_manager.acquire_project_lock(model.project_id):
+        async with model.lock:
+            result = await batch_service.run(model, operations)
+    return PydanticJsonResponse(result)
@@ -1,95 +1,210 @@
 import uuid
-import math
 from typing import Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Body, Depends
 from src.project_lock_manager import ProjectQueueManager
 from src.services.solver_service import SolverService
-from src.dependencies import get_solver_service, get_project_lock_manager
-from src.dtos.issue_dtos import IssueOutgoingDto
-from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.services.batch_service import BatchService
+from src.services.model_registry import CompiledModel
+from src.services.partial_tree_session import PartialTreeSessionStore
+from src.services.speculative_expansion import SpeculativeExpander
+from src.config import config
+from src.constants import ResponseHeaders, TreeOutputFormat
+from src.utils.json_response import PydanticJsonResponse
+from src.utils.conditional_request import ConditionalRequest
+from src.services.decision_tree.columnar_tree_encoder import encode_tree
+from src.dependencies import (
+    get_conditional_request,
+    get_batch_service,
+    get_model_dtos,
+    get_solver_service,
+    get_project_lock_manager,
+    get_partial_tree_session_store,
+    get_speculative_expander,
+)
+from src.domain.compact_model import ModelDtos
 from src.dtos.model_solution_dtos import SolutionDto
 from src.dtos.evidence_dtos import EvidenceIncomingDto, EvidenceOutgoingDto
+from src.dtos.batch_dtos import BatchOperationDto, BatchResultDto
+from src.dtos.decision_tree_dtos import (
+    ColumnarTreeDto,
+    DecisionTreeDto,
+    PartialDecisionTreeIncrementDto,
+    TreeNodeDto2,
+)
 
 router = APIRouter(tags=["solvers"])
 
 
-@router.post("/solvers/project/{project_id}")
+@router.post("/solvers/project/{project_id}", response_model=SolutionDto)
 async def get_optimal_decisions_for_project_from_dtos(
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     solver_service: SolverService = Depends(get_solver_service),
-) -> SolutionDto:
-    return await solver_service.find_optimal_decision_pyagrum_from_dtos(issues, edges)
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
+    result = await solver_service.find_optimal_decision_pyagrum_from_dtos(
+        model_dtos.issues, model_dtos.edges
+    )
+    response = PydanticJsonResponse(result)
+    return conditional_request.cache_response(response)
 
-@router.post("/solvers/project/{project_id}/with_evidence")
+@router.post(
+    "/solvers/project/{project_id}/with_evidence", response_model=list[EvidenceOutgoingDto]
+)
 async def get_optimal_decisions_for_project_with_evidence(
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     evidence: list[EvidenceIncomingDto] = [],
     solver_service: SolverService = Depends(get_solver_service),
-) -> list[EvidenceOutgoingDto]:
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos, evidence)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
     evidence_state_ids = [e.state_ids for e in evidence]
-    results: list[Optional[float]] = await solver_service.get_MEU_given_evidence(issues, edges, evidence_state_ids)
-    # decision_solutions[0].mean is the expected utility for the first optimal decision, i.e. the root node which represents the expected utility for the model
-    populated_evidence = [
-        EvidenceOutgoingDto(
-            evidence_id=evi.evidence_id,
-            state_ids=evi.state_ids,
-            expected_utility=results[n] 
-            if len(results) > n and not math.isnan(results[n]) # type: ignore
-            else None,
-        )
-        for n, evi in enumerate(evidence)
-    ]
-    exception_message = ""
-    for populated in populated_evidence:
-        if populated.expected_utility is None:
-            exception_message += f"Impossible state reached for evidence {populated.evidence_id} with state_ids {populated.state_ids}\n"
-    # If any of the evidence leads to an impossible state, we raise an exception with the details of which evidence caused the issue. 
-    if exception_message:
-        raise ValueError(f"One or more evidence states lead to an impossible state:\n{exception_message}")
-    
-    return populated_evidence
+    results: list[Optional[float]] = await solver_service.get_MEU_given_evidence(
+        model_dtos.issues, model_dtos.edges, evidence_state_ids
+    )
+    response = PydanticJsonResponse(solver_service.populate_evidence(evidence, results))
+    return conditional_request.cache_response(response)
+
+
+@router.post("/solvers/project/{project_id}/batch", response_model=BatchResultDto)
+async def run_batch_for_project(
+    project_id: uuid.UUID,
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    operations: list[BatchOperationDto] = Body(...),
+    batch_service: BatchService = Depends(get_batch_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+) -> PydanticJsonResponse:
+    """
+    Run several operations on the model at once, it is parsed and solved only once for all of
+    them. The results are in the order of the operations, each with its duration.
+    """
+    model = CompiledModel(project_id, model_dtos)
+    async with lock_manager.acquire_project_lock(project_id):
+        async with model.lock:
+            result = await batch_service.run(model, operations)
+    return PydanticJsonResponse(result)
 
 
-@router.get("/solvers/project/{project_id}/decision_tree/v2")
+@router.get(
+    "/solvers/project/{project_id}/decision_tree/v2", response_model=Optional[DecisionTreeDto]
+)
 async def get_optimal_decisions_for_project_as_tree_tmp(
     project_id: uuid.UUID,
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     solver_service: SolverService = Depends(get_solver_service),
     lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
-):
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
     async with lock_manager.acquire_project_lock(project_id):
-        return await solver_service.get_decision_tree_for_optimal_decisions(
-            project_id, issues, edges
+        result = await solver_service.get_decision_tree_for_optimal_decisions(
+            project_id, model_dtos.issues, model_dtos.edges
         )
+    response = PydanticJsonResponse(
+        result,
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(solver_service.skipped_tree_node_count)
+        },
+    )
+    return conditional_request.cache_response(response)
 
 
-@router.post("/solvers/project/{project_id}/decision_tree/v2")
+@router.post(
+    "/solvers/project/{project_id}/decision_tree/v2", response_model=Optional[DecisionTreeDto]
+)
 async def get_optimal_decisions_for_project_as_tree_tmp_from_dtos(
     project_id: uuid.UUID,
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     solver_service: SolverService = Depends(get_solver_service),
     lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
-):
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
     async with lock_manager.acquire_project_lock(project_id):
-        return await solver_service.get_decision_tree_for_optimal_decisions_from_dtos(
-            project_id, issues, edges
+        result = await solver_service.get_decision_tree_for_optimal_decisions_from_dtos(
+            project_id, model_dtos.issues, model_dtos.edges
         )
+    response = PydanticJsonResponse(
+        result,
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(solver_service.skipped_tree_node_count)
+        },
+    )
+    return conditional_request.cache_response(response)
     
-@router.post("/solvers/project/{project_id}/partial_decision_tree/v3")
+@router.post(
+    "/solvers/project/{project_id}/partial_decision_tree/v3",
+    response_model=Optional[TreeNodeDto2 | ColumnarTreeDto],
+)
 async def get_optimal_decisions_for_project_as_tree_tmp_from_dtos_v3(
     project_id: uuid.UUID,
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     paths: list[list[uuid.UUID]] = [],
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
     solver_service: SolverService = Depends(get_solver_service),
     lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
-):
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos, paths, output_format)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
     async with lock_manager.acquire_project_lock(project_id):
-        return await solver_service.get_decision_tree_for_optimal_decisions_from_dtos_by_constructing_paths(
-            project_id, issues, edges, paths,
+        result = await solver_service.get_decision_tree_for_optimal_decisions_from_dtos_by_constructing_paths(
+            project_id, model_dtos.issues, model_dtos.edges, paths,
         )
+    response = PydanticJsonResponse(encode_tree(result, output_format))
+    return conditional_request.cache_response(response)
+
 
+@router.post(
+    "/solvers/project/{project_id}/partial_decision_tree/v3/session",
+    response_model=PartialDecisionTreeIncrementDto,
+)
+async def expand_partial_decision_tree_session(
+    project_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    paths: list[list[uuid.UUID]] = [],
+    reset: bool = False,
+    solver_service: SolverService = Depends(get_solver_service),
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+    session_store: PartialTreeSessionStore = Depends(get_partial_tree_session_store),
+    speculative_expander: SpeculativeExpander = Depends(get_speculative_expander),
+) -> PydanticJsonResponse:
+    """
+    Send only the newly expanded paths, the paths from earlier calls are kept in the session.
+    Use reset=true to start a new tree for the model, e.g. when the page is reloaded.
+    """
+    async with lock_manager.acquire_project_lock(project_id):
+        result = await solver_service.get_partial_decision_tree_increment(
+            project_id, model_dtos.issues, model_dtos.edges, paths, session_store, reset=reset
+        )
+    if config.SPECULATIVE_EXPANSION:
+        session = session_store.get_session(project_id, result.model_fingerprint)
+        if session is not None:
+            # starts after the response is sent
+            background_tasks.add_task(speculative_expander.schedule, session)
+    return PydanticJsonResponse(result)
+
+
+@router.delete("/solvers/project/{project_id}/partial_decision_tree/v3/session")
+async def delete_partial_decision_tree_sessions(
+    project_id: uuid.UUID,
+    lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
+    session_store: PartialTreeSessionStore = Depends(get_partial_tree_session_store),
+) -> None:
+    async with lock_manager.acquire_project_lock(project_id):
+        session_store.remove_project_sessions(project_id)
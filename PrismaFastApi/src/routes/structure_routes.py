@@ -7,11 +7,23 @@ from src.dtos.edge_dtos import EdgeOutgoingDto
 from src.dtos.issue_dtos import IssueOutgoingDto
 from src.services.structure_service import StructureService
 from src.dependencies import (
+    get_conditional_request,
+    get_model_dtos,
     get_project_lock_manager,
     get_structure_service,
 )
 from src.domain.influence_diagram import InfluenceDiagramDOT
-from src.dtos.decision_tree_dtos import DecisionTreeDto, PartialOrderDto, TreeNodeDto2
+from src.domain.compact_model import ModelDtos
+from src.constants import ResponseHeaders, TreeOutputFormat
+from src.utils.json_response import PydanticJsonResponse
+from src.utils.conditional_request import ConditionalRequest
+from src.dtos.decision_tree_dtos import (
+    ColumnarTreeDto,
+    DecisionTreeDto,
+    PartialOrderDto,
+    TreeNodeDto2,
+)
+from src.services.decision_tree.columnar_tree_encoder import encode_tree
 
 
 router = APIRouter(tags=["structure"])
@@ -19,54 +31,112 @@ router = APIRouter(tags=["structure"])
 
 @router.post("/structure/{project_id}/influence_diagram")
 async def get_influence_diagram_from_dtos(
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
 ) -> tuple[list[IssueOutgoingDto], list[EdgeOutgoingDto]]:
-    influence_diagram = await asyncio.to_thread(lambda: InfluenceDiagramDOT(edges, issues))
-    await asyncio.to_thread(influence_diagram.validate_diagram)
+    # the diagram is validated on construction
+    influence_diagram = await asyncio.to_thread(
+        lambda: InfluenceDiagramDOT(model_dtos.edges, model_dtos.issues)
+    )
     return influence_diagram.issues, influence_diagram.edges
 
 
-@router.post("/structure/{project_id}/partial_order")
+@router.post("/structure/{project_id}/partial_order", response_model=Optional[PartialOrderDto])
 async def get_partial_order_from_dtos(
     project_id: uuid.UUID,
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     structure_service: StructureService = Depends(get_structure_service),
-) -> Optional[PartialOrderDto]:
-    return await structure_service.create_partial_order_from_dtos(project_id, issues, edges)
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
+    result = await structure_service.create_partial_order_from_dtos(
+        project_id, model_dtos.issues, model_dtos.edges
+    )
+    response = PydanticJsonResponse(result)
+    return conditional_request.cache_response(response)
 
 
-@router.post("/structure/{project_id}/decision_tree/v2")
+@router.post("/structure/{project_id}/decision_tree/v2", response_model=Optional[DecisionTreeDto])
 async def build_decision_tree_from_dtos(
     project_id: uuid.UUID,
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
     structure_service: StructureService = Depends(get_structure_service),
-) -> Optional[DecisionTreeDto]:
-    return await structure_service.create_decision_tree_from_dtos(project_id, issues, edges)
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
+    result = await structure_service.create_decision_tree_from_dtos(
+        project_id, model_dtos.issues, model_dtos.edges
+    )
+    response = PydanticJsonResponse(
+        result,
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(
+                structure_service.skipped_tree_node_count
+            )
+        },
+    )
+    return conditional_request.cache_response(response)
 
 
-@router.post("/structure/{project_id}/decision_tree/v3")
+@router.post(
+    "/structure/{project_id}/decision_tree/v3",
+    response_model=Optional[TreeNodeDto2 | ColumnarTreeDto],
+)
 async def build_decision_tree_from_dtos_optimal(
     project_id: uuid.UUID,
-    issues: list[IssueOutgoingDto],
-    edges: list[EdgeOutgoingDto],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
     structure_service: StructureService = Depends(get_structure_service),
     lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
-) -> Optional[TreeNodeDto2]:
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos, output_format)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
     async with lock_manager.acquire_project_lock(project_id):
-        return structure_service.create_decision_tree_from_dtos_optimal(
-            project_id, issues, edges
+        result = await asyncio.to_thread(
+            structure_service.create_decision_tree_from_dtos_optimal,
+            project_id,
+            model_dtos.issues,
+            model_dtos.edges,
         )
+    response = PydanticJsonResponse(
+        encode_tree(result, output_format),
+        headers={
+            ResponseHeaders.SKIPPED_TREE_NODES.value: str(
+                structure_service.skipped_tree_node_count
+            )
+        },
+    )
+    return conditional_request.cache_response(response)
         
-@router.post("/structure/{project_id}/partial_decision_tree/v3")
+@router.post(
+    "/structure/{project_id}/partial_decision_tree/v3",
+    response_model=Optional[TreeNodeDto2 | ColumnarTreeDto],
+)
 async def build_partial_decision_tree_from_dtos_optimal(
-    project_id: uuid.UUID, issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto],
+    project_id: uuid.UUID,
     paths: list[list[uuid.UUID]],
+    model_dtos: ModelDtos = Depends(get_model_dtos),
+    output_format: TreeOutputFormat = TreeOutputFormat.NESTED,
     structure_service: StructureService = Depends(get_structure_service),
     lock_manager: ProjectQueueManager = Depends(get_project_lock_manager),
-) -> Optional[TreeNodeDto2]:
+    conditional_request: ConditionalRequest = Depends(get_conditional_request),
+) -> PydanticJsonResponse:
+    conditional_request.set_etag(model_dtos, paths, output_format)
+    cached_response = conditional_request.get_cached_response()
+    if cached_response is not None:
+        return cached_response
     async with lock_manager.acquire_project_lock(project_id):
-        return await structure_service.create_partial_decision_tree_from_dtos_optimal(project_id, issues, edges, paths=paths)
+        result = await structure_service.create_partial_decision_tree_from_dtos_optimal(
+            project_id, model_dtos.issues, model_dtos.edges, paths=paths
+        )
+    response = PydanticJsonResponse(encode_tree(result, output_format))
+    return conditional_request.cache_response(response)
         
\ No newline at end of file
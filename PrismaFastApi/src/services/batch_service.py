@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Callable, Optional
+from src.constants import BatchOperationType
+from src.services.model_registry import CompiledModel
+from src.services.pyagrum_solver import PyagrumSolver
+from src.services.solver_service import SolverService
+from src.services.structure_service import StructureService
+from src.services.decision_tree.columnar_tree_encoder import encode_tree
+from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.batch_dtos import (
+    BatchOperationDto,
+    BatchOperationResult,
+    BatchOperationResultDto,
+    BatchResultDto,
+)
+
+SOLVER_OPERATIONS = {
+    BatchOperationType.SOLUTION,
+    BatchOperationType.EVIDENCE,
+    BatchOperationType.PARTIAL_DECISION_TREE,
+}
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+class BatchService:
+    """
+    Runs a list of operations against one compiled model, which is solved once for all of them.
+    An operation failing on the model, e.g. impossible evidence, gets an error and does not stop
+    the others. The caller must hold the lock of the model.
+    """
+
+    def __init__(self, solver_service: SolverService, structure_service: StructureService):
+        self.solver_service = solver_service
+        self.structure_service = structure_service
+
+    async def run(
+        self,
+        model: CompiledModel,
+        operations: list[BatchOperationDto],
+        on_operation_done: Optional[Callable[[], None]] = None,
+    ) -> BatchResultDto:
+        batch_result = BatchResultDto(model_fingerprint=model.model_fingerprint)
+        if any(x.type in SOLVER_OPERATIONS for x in operations) and model.solver is None:
+            start = time.perf_counter()
+            await model.get_solver()
+            batch_result.solve_duration_ms = _elapsed_ms(start)
+
+        for operation in operations:
+            start = time.perf_counter()
+            result: Optional[BatchOperationResult] = None
+            error: Optional[str] = None
+            try:
+                result = await self.run_operation(model, operation)
+            except ValueError as exc:
+                error = str(exc)
+            batch_result.results.append(
+                BatchOperationResultDto(
+                    type=operation.type,
+                    duration_ms=_elapsed_ms(start),
+                    result=result,
+                    error=error,
+                )
+            )
+            if on_operation_done is not None:
+                on_operation_done()
+        return batch_result
+
+    async def run_operation(
+        self, model: CompiledModel, operation: BatchOperationDto
+    ) -> Optional[BatchOperationResult]:
+        if operation.type == BatchOperationType.PARTIAL_ORDER:
+            return await model.get_partial_order(self.structure_service)
+        solver = await model.get_solver()
+        solution = await model.get_solution()
+        if operation.type == BatchOperationType.SOLUTION:
+            return solution
+        # the inference and the tree are computed off the event loop
+        return await asyncio.to_thread(
+            self.run_solver_operation, model, operation, solver, solution
+        )
+
+    def run_solver_operation(
+        self,
+        model: CompiledModel,
+        operation: BatchOperationDto,
+        solver: PyagrumSolver,
+        solution: SolutionDto,
+    ) -> BatchOperationResult:
+        if operation.type == BatchOperationType.EVIDENCE:
+            results = solver.get_mean_expected_utilities([e.state_ids for e in operation.evidence])
+            return self.solver_service.populate_evidence(operation.evidence, results)
+        tree = self.solver_service.create_optimal_partial_decision_tree(
+            model.project_id, model.issues, model.edges, operation.paths, solver, solution
+        )
+        return encode_tree(tree, operation.output_format)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+from typing import Optional
+import pyagrum as gum  # type: ignore
+
+
+class ChanceNetwork:
+    """
+    Bayesian network of the chance nodes of an influence diagram, where every decision is a root
+    node with a uniform probability table. Posteriors are answered with LazyPropagation, which only
+    updates the evidence that changed since the previous query instead of solving the LIMID again.
+
+    A decision given as evidence is a choice, not an observation, so it is cut from its parents and
+    its table does not affect the posterior. When the posterior would depend on a decision that is
+    not in the evidence, the LIMID optimizes that decision with the evidence known, so such
+    queries return None and are left to the LIMID inference.
+    """
+
+    def __init__(self, diagram: gum.InfluenceDiagram) -> None:
+        self.diagram = diagram
+        self.bayes_net = gum.BayesNet()
+        self.variable_names: set[str] = set()
+        self.decision_names: set[str] = set()
+        # state id -> variable name
+        self.state_lookup: dict[str, str] = {}
+
+        for node_id in diagram.nodes():  # type: ignore
+            if diagram.isUtilityNode(node_id):  # type: ignore
+                continue
+            variable = diagram.variable(node_id)  # type: ignore
+            self.bayes_net.add(variable)  # type: ignore
+            self.variable_names.add(variable.name())  # type: ignore
+            for label in variable.labels():  # type: ignore
+                self.state_lookup[label] = variable.name()  # type: ignore
+            if diagram.isDecisionNode(node_id):  # type: ignore
+                self.decision_names.add(variable.name())  # type: ignore
+
+        for node_id in diagram.nodes():  # type: ignore
+            if diagram.isChanceNode(node_id):  # type: ignore
+                name = diagram.variable(node_id).name()  # type: ignore
+                for parent_id in diagram.parents(node_id):  # type: ignore
+                    self.bayes_net.addArc(diagram.variable(parent_id).name(), name)  # type: ignore
+
+        for node_id in diagram.nodes():  # type: ignore
+            if diagram.isChanceNode(node_id):  # type: ignore
+                name = diagram.variable(node_id).name()  # type: ignore
+                self.bayes_net.cpt(name).fillWith(diagram.cpt(node_id))  # type: ignore
+        for name in self.decision_names:
+            self.bayes_net.cpt(name).fillWith(1.0).normalizeAsCPT()  # type: ignore
+
+        self.inference = gum.LazyPropagation(self.bayes_net)
+        self.evidence: dict[str, str] = {}
+
+    def _depends_on_free_decision(self, issue_id: str, evidence: dict[str, str]) -> bool:
+        """True if a decision that is not in the evidence is an ancestor of the query or evidence."""
+        stack = [issue_id] + [name for name in evidence if name not in self.decision_names]
+        visited: set[str] = set()
+        while stack:
+            name = stack.pop()
+            if name in visited:
+                continue
+            visited.add(name)
+            if name in self.decision_names:
+                if name not in evidence:
+                    return True
+                continue  # a decision in the evidence is cut from its parents
+            node_id = self.diagram.idFromName(name)  # type: ignore
+            stack.extend(self.diagram.variable(p).name() for p in self.diagram.parents(node_id))  # type: ignore
+        return False
+
+    def get_posterior_given_path(
+        self, issue_id: str, state_ids: list[str]
+    ) -> Optional[dict[str, float]]:
+        if issue_id not in self.variable_names or issue_id in self.decision_names:
+            return None
+        evidence: dict[str, str] = {}
+        for state_id in state_ids:
+            name = self.state_lookup.get(state_id)
+            if name is None:
+                return None
+            evidence[name] = state_id
+        if self._depends_on_free_decision(issue_id, evidence):
+            return None
+
+        ie = self.inference
+        try:
+            for name in [name for name in self.evidence if name not in evidence]:
+                ie.eraseEvidence(name)  # type: ignore
+                del self.evidence[name]
+            for name, state_id in evidence.items():
+                if name not in self.evidence:
+                    ie.addEvidence(name, state_id)  # type: ignore
+                elif self.evidence[name] != state_id:
+                    ie.chgEvidence(name, state_id)  # type: ignore
+                self.evidence[name] = state_id
+            posterior = ie.posterior(issue_id)  # type: ignore
+        except gum.GumException:
+            # impossible evidence, left to the LIMID inference
+            ie.eraseAllEvidence()  # type: ignore
+            self.evidence.clear()
+            return None
+        labels = self.bayes_net.variableFromName(issue_id).labels()  # type: ignore
+        probabilities: list[float] = posterior.toarray().tolist()  # type: ignore
+        return {label: probability for label, probability in zip(labels, probabilities)}
@@ -0,0 +1,83 @@
+import uuid
+from typing import Optional
+from src.constants import TreeOutputFormat, Type
+from src.dtos.decision_tree_dtos import ColumnarTreeDto, TreeNodeDto2
+
+
+class ColumnarTreeEncoder:
+    """
+    Encodes a decision tree as a ColumnarTreeDto. The issue and state ids and the state names
+    are listed once instead of on every tree node, which makes large trees many times smaller.
+    """
+
+    def __init__(self) -> None:
+        self.dto = ColumnarTreeDto()
+        self.issue_indices: dict[uuid.UUID, int] = {}
+        self.state_indices: dict[str, int] = {}
+
+    def encode(self, root: TreeNodeDto2) -> ColumnarTreeDto:
+        dto = self.dto
+        stack: list[tuple[TreeNodeDto2, int]] = [(root, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            index = len(dto.parent_indices)
+            dto.parent_indices.append(parent_index)
+            dto.issue_indices.append(
+                -1 if node.type == Type.END.value else self.get_issue_index(node)
+            )
+            dto.state_indices.append(
+                -1 if node.parent_state_id is None else self.get_state_index(node.parent_state_id)
+            )
+            dto.expected_values.append(node.expected_value)
+            dto.endpoint_values.append(node.endpoint_value)
+            dto.cumulative_probabilities.append(node.cumulative_probability)
+            self.add_values(node)
+            # reversed, so the children are popped in order
+            stack.extend((child, index) for child in reversed(node.children or []))
+        return dto
+
+    def get_issue_index(self, node: TreeNodeDto2) -> int:
+        index = self.issue_indices.get(node.issue_id)
+        if index is None:
+            index = self.issue_indices[node.issue_id] = len(self.dto.issue_ids)
+            self.dto.issue_ids.append(node.issue_id)
+            self.dto.issue_types.append(node.type)
+        return index
+
+    def get_state_index(self, state_id: str, name: str = "") -> int:
+        index = self.state_indices.get(state_id)
+        if index is None:
+            index = self.state_indices[state_id] = len(self.dto.state_ids)
+            self.dto.state_ids.append(state_id)
+            self.dto.state_names.append(name)
+        elif name and not self.dto.state_names[index]:
+            self.dto.state_names[index] = name
+        return index
+
+    def add_values(self, node: TreeNodeDto2) -> None:
+        # state id -> [probability, utility]
+        values: dict[str, list[Optional[float]]] = {}
+        for utility in node.utilities or []:
+            state_id = str(
+                utility.option_id if utility.option_id is not None else utility.outcome_id
+            )
+            self.get_state_index(state_id, utility.name)
+            values.setdefault(state_id, [None, None])[1] = utility.utility_value
+        for probability in node.probabilities or []:
+            values.setdefault(str(probability.outcome_id), [None, None])[0] = (
+                probability.probability_value
+            )
+        for state_id, (probability_value, utility_value) in values.items():
+            self.dto.value_state_indices.append(self.get_state_index(state_id))
+            self.dto.value_probabilities.append(probability_value)
+            self.dto.value_utilities.append(utility_value)
+        self.dto.value_offsets.append(len(self.dto.value_state_indices))
+
+
+def encode_tree(
+    root: Optional[TreeNodeDto2], output_format: TreeOutputFormat
+) -> Optional[TreeNodeDto2 | ColumnarTreeDto]:
+    """The tree in the requested output format."""
+    if root is None or output_format == TreeOutputFormat.NESTED:
+        return root
+    return ColumnarTreeEncoder().encode(root)
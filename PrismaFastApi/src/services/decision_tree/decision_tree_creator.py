@@ -4,7 +4,6 @@ import logging
 import uuid
 import copy
 import itertools
-import networkx as nx
 from typing import Optional, Dict, Any, Union, List, Tuple, Iterator
 from fastapi import HTTPException
 from src.constants import Type
@@ -23,7 +22,16 @@ from src.dtos.decision_tree_dtos import (
     DecisionTreeDtoOld,  # tmp due to backward compabilities, to be removed
 )
 from src.dtos.discrete_probability_dtos import DiscreteProbabilityOutgoingDto
-from src.services.decision_tree.decision_tree_utils import TreeNodeLookup
+from src.dtos.model_solution_dtos import SolutionDto
+from src.services.decision_tree.decision_tree_utils import (
+    TreeNodeLookup,
+    DiscreteProbabilityLookup,
+    keep_expanded_probabilities,
+)
+from src.config import config
+from src.domain.policy_table import PolicyTable
+from src.domain.graph import CsrGraph, GraphBuilder
+from src.domain.partial_order import ModelStructure, PartialOrder, calculate_partial_order
 
 logger = logging.getLogger(__name__)
 
@@ -31,28 +39,49 @@ logger = logging.getLogger(__name__)
 class DecisionTreeGraph:
     """Decision tree class"""
 
-    def __init__(self, root: Optional[Any] = None, **kwargs: Dict[str, Any]) -> None:
-        self.nx: nx.DiGraph = nx.DiGraph(**kwargs)  # type: ignore
+    def __init__(self, root: Optional[Any] = None) -> None:
+        self.graph_builder = GraphBuilder()
         self.root: Optional[Any] = root
         if self.root is not None:
-            self.nx.add_node(self.root)  # type: ignore
+            self.graph_builder.add_node(self.root)
         self.outcomes_lookup: Dict[str, str] = {}
         self.edge_names: Dict[Tuple[uuid.UUID, uuid.UUID], str] = {}
         self.utility_lookup: Dict[tuple[str, ...], List[float]] = {}
         self.treenode_lookup: TreeNodeLookup
         self.final_expected_value: float = 0
+        # outcome branches not expanded since their cumulative probability is zero or negligible
+        self.skipped_node_count: int = 0
 
-    async def add_node(self, node: uuid.UUID) -> None:
-        self.nx.add_node(node)  # type: ignore
-
-    async def add_edge(self, edge: EdgeUUIDDto) -> None:
-        self.nx.add_edge(edge.tail, edge.head, name=edge.name)  # type: ignore
-
-    async def get_parent(self, node: uuid.UUID) -> Optional[uuid.UUID]:
-        parents = list(self.nx.predecessors(node))  # type: ignore
-        return parents[0] if (parents and len(parents) > 0) else None  # type: ignore
-
-    async def populate_utility_lookup(self) -> None:
+    @property
+    def graph(self) -> CsrGraph:
+        return self.graph_builder.build()
+
+    def add_node(self, node: uuid.UUID) -> None:
+        self.graph_builder.add_node(node)
+
+    def add_edge(self, edge: EdgeUUIDDto) -> None:
+        self.graph_builder.add_edge(edge.tail, edge.head)  # type: ignore
+        self.edge_names[(edge.tail, edge.head)] = edge.name  # type: ignore
+
+    def get_parent(self, node: uuid.UUID) -> Optional[uuid.UUID]:
+        graph = self.graph
+        parents = graph.predecessors(graph.index[node])
+        return graph.node_ids[parents[0]] if parents else None
+
+    def get_tree_data(self) -> Dict[str, Any]:
+        """Nested {"id", "children"} dictionaries of the tree below the root."""
+        graph = self.graph
+        root_data: Dict[str, Any] = {"id": self.root}
+        stack = [(graph.index[self.root], root_data)]
+        while stack:
+            node, node_data = stack.pop()
+            successors = graph.successors(node)
+            if successors:
+                node_data["children"] = [{"id": graph.node_ids[x]} for x in successors]
+                stack.extend(zip(successors, node_data["children"]))
+        return root_data
+
+    def populate_utility_lookup(self) -> None:
         for node in self.treenode_lookup.get_list_of_nodes():
             if isinstance(node.issue, EndPointNodeDto) or node.issue.type != Type.UTILITY.value:
                 continue
@@ -71,28 +100,27 @@ class DecisionTreeGraph:
                             discrete_utility.utility_value
                         )
 
-    async def populate_treenode_lookup(self, lookup: Dict[str, TreeNodeDto]) -> None:
+    def populate_treenode_lookup(self, lookup: Dict[str, TreeNodeDto]) -> None:
         self.treenode_lookup = TreeNodeLookup()
         for id, node in lookup.items():
             self.treenode_lookup.add_with_original_id(uuid.UUID(id), node)
 
-    async def to_issue_dtos(self) -> Optional[DecisionTreeDto]:
-        await self.populate_utility_lookup()
-        self.edge_names = nx.get_edge_attributes(self.nx, "name")  # type: ignore
-        tg = nx.readwrite.json_graph.tree_data(self.nx, self.root)  # type: ignore
-        tree_structure = await self.create_decision_tree_dto_from_treenode(tg)  # type: ignore
+    def to_issue_dtos(self) -> Optional[DecisionTreeDto]:
+        self.populate_utility_lookup()
+        tg = self.get_tree_data()
+        tree_structure = self.create_decision_tree_dto_from_treenode(tg)  # type: ignore
         # calculate endpoint values after all tree_nodes have got their utility values
-        await self.calculate_endpointnode_values(tree_structure)
+        self.calculate_endpointnode_values(tree_structure)
         # calculate expected values for the tree_nodes
-        self.final_expected_value = await self.calculate_expected_values(tree_structure)
+        self.final_expected_value = self.calculate_expected_values(tree_structure)
         return tree_structure
 
-    async def calculate_expected_values(self, decision_tree: DecisionTreeDto | None) -> float:
+    def calculate_expected_values(self, decision_tree: DecisionTreeDto | None) -> float:
         if not decision_tree:
             return 0
-        return await self.update_expected_values(decision_tree.tree_node)
+        return self.update_expected_values(decision_tree.tree_node)
 
-    async def update_expected_values(self, node: TreeNodeDto) -> float:
+    def update_expected_values(self, node: TreeNodeDto) -> float:
         if node.issue and isinstance(node.issue, EndPointNodeDto):
             return node.issue.value
 
@@ -102,43 +130,43 @@ class DecisionTreeGraph:
             if node.issue.type == Type.UNCERTAINTY.value:
                 total_value = 0
                 for child in node.children:
-                    value = await self.update_expected_values(child.tree_node)
-                    probability = await self.get_probability_value(node, child.tree_node)
+                    value = self.update_expected_values(child.tree_node)
+                    probability = self.get_probability_value(node, child.tree_node)
                     total_value += probability * value
                 node.expected_value = total_value
                 return_value = total_value
             if node.issue.type == Type.DECISION.value:
                 values: List[float] = []
                 for child in node.children:
-                    values.append(await self.update_expected_values(child.tree_node))
+                    values.append(self.update_expected_values(child.tree_node))
                 max_value = max(values)
                 node.expected_value = max_value
                 return_value = max_value
         return return_value
 
-    async def calculate_endpointnode_values(self, decision_tree: DecisionTreeDto | None) -> None:
+    def calculate_endpointnode_values(self, decision_tree: DecisionTreeDto | None) -> None:
         if not decision_tree:
             return
-        await self.update_endpoint_nodes(decision_tree.tree_node)
+        self.update_endpoint_nodes(decision_tree.tree_node)
 
-    async def update_endpoint_nodes(self, node: TreeNodeDto) -> None:
+    def update_endpoint_nodes(self, node: TreeNodeDto) -> None:
         if node.issue and isinstance(node.issue, EndPointNodeDto):
             node.issue.value, node.issue.cumulative_probability = (
-                await self.calculate_endpoint_value(node)
+                self.calculate_endpoint_value(node)
             )
             return
 
         # Loop through children recursively
         if node.children:
             for child in node.children:
-                await self.update_endpoint_nodes(child.tree_node)
+                self.update_endpoint_nodes(child.tree_node)
 
-    async def calculate_endpoint_value(self, node: TreeNodeDto) -> Tuple[float, float]:
+    def calculate_endpoint_value(self, node: TreeNodeDto) -> Tuple[float, float]:
         id = self.treenode_lookup.get_original_id(node.id)
         if not id:
             return 0, 0
 
-        parent_id = await self.get_parent(id)
+        parent_id = self.get_parent(id)
         if not parent_id:
             return 0, 0
         count = 0
@@ -147,25 +175,23 @@ class DecisionTreeGraph:
         branch_id = self.edge_names[(parent_id, id)]
         while parent_id and count < 1000:
             parent_node = self.treenode_lookup.get_node_by_original_id(parent_id) if id else None
-            node_value += (
-                await self.get_utility_for_branch(parent_node, branch_id) if parent_node else 0
-            )
+            node_value += self.get_utility_for_branch(parent_node, branch_id) if parent_node else 0
             if (
                 parent_node
                 and parent_node.issue
                 and parent_node.issue.type == Type.UNCERTAINTY.value
             ):
-                cumulative_probability *= await self.get_probability_for_branch(
+                cumulative_probability *= self.get_probability_for_branch(
                     parent_node, branch_id
                 )
             id = parent_id
-            parent_id = await self.get_parent(id)
+            parent_id = self.get_parent(id)
             if parent_id:
                 branch_id = self.edge_names[(parent_id, id)]
             count += 1
         return node_value, cumulative_probability
 
-    async def get_utility_for_branch(self, node: TreeNodeDto, branch_id: str) -> float:
+    def get_utility_for_branch(self, node: TreeNodeDto, branch_id: str) -> float:
         if node.utilities:
             for utility in node.utilities:
                 if (utility.option_id is not None and utility.option_id.__str__() == branch_id) or (
@@ -174,32 +200,32 @@ class DecisionTreeGraph:
                     return utility.utility_value
         return 0
 
-    async def get_probability_value(
+    def get_probability_value(
         self, parent_node: TreeNodeDto, child_node: TreeNodeDto
     ) -> float:
         probability = 0
         id = self.treenode_lookup.get_original_id(child_node.id)
         if id:
-            parent_id = await self.get_parent(id)
+            parent_id = self.get_parent(id)
             if parent_id:
                 branch_id = self.edge_names[(parent_id, id)]
-                probability = await self.get_probability_for_branch(parent_node, branch_id)
+                probability = self.get_probability_for_branch(parent_node, branch_id)
         return probability
 
-    async def get_probability_for_branch(self, node: TreeNodeDto, branch_id: str) -> float:
+    def get_probability_for_branch(self, node: TreeNodeDto, branch_id: str) -> float:
         if node.probabilities:
             for probability in node.probabilities:
                 if probability.outcome_id.__str__() == branch_id:
                     return probability.probability_value
         return 0
 
-    async def get_decision_tree_dto(
+    def get_decision_tree_dto(
         self, issue: TreeNodeDto, children: list[DecisionTreeDto] | None = None
     ) -> DecisionTreeDto:
         issue.children = children
         return DecisionTreeDto(tree_node=issue)
 
-    async def create_decision_tree_dto_from_treenode(
+    def create_decision_tree_dto_from_treenode(
         self, tree_data: Dict[str, Any]
     ) -> Optional[DecisionTreeDto]:
         # Base case: if the tree data is empty, return None
@@ -215,37 +241,63 @@ class DecisionTreeGraph:
         # Recursively create DTOs for child nodes
         children_dtos: list[DecisionTreeDto] = []
         for child in tree_data.get("children", []):
-            child_dto = await self.create_decision_tree_dto_from_treenode(child)
+            child_dto = self.create_decision_tree_dto_from_treenode(child)
             if child_dto:
                 children_dtos.append(child_dto)
 
-        copy_node = copy.deepcopy(node)
-        copy_node.probabilities = await self.get_probability_values(copy_node)
-        copy_node.utilities = await self.get_utility_values(copy_node)
+        # the issue is shared with the graph node, fields replaced below are not
+        copy_node = node.model_copy()
+        copy_node.probabilities = self.get_probability_values(copy_node)
+        copy_node.utilities = self.get_utility_values(copy_node)
+        self.remove_skipped_outcomes(copy_node, tree_data)
         original_id = copy_node.id
-        copy_node.id = await self.create_treenode_id(copy_node)
+        copy_node.id = self.create_treenode_id(copy_node)
 
         self.treenode_lookup.set_updated_node(original_id, copy_node)
         copy_node.children = children_dtos if children_dtos else None
         return DecisionTreeDto(tree_node=copy_node)
 
-    async def create_treenode_id(self, node: TreeNodeDto) -> uuid.UUID:
+    def remove_skipped_outcomes(self, node: TreeNodeDto, tree_data: Dict[str, Any]) -> None:
+        """
+        Removes the outcomes and probabilities of the branches skipped during expansion,
+        so the outcomes stay aligned with the children, and rescales the remaining
+        probabilities to sum to one. The issue is shared between copies
+        of the node, so it is replaced by a copy with the expanded outcomes.
+        """
+        children = tree_data.get("children", [])
+        if (
+            isinstance(node.issue, EndPointNodeDto)
+            or node.issue.uncertainty is None
+            or not children
+            or len(children) >= len(node.issue.uncertainty.outcomes)
+        ):
+            return
+        expanded = {self.edge_names[(tree_data["id"], child["id"])] for child in children}
+        uncertainty = node.issue.uncertainty
+        outcomes = [outcome for outcome in uncertainty.outcomes if str(outcome.id) in expanded]
+        node.issue = node.issue.model_copy(
+            update={"uncertainty": uncertainty.model_copy(update={"outcomes": outcomes})}
+        )
+        if node.probabilities:
+            node.probabilities = keep_expanded_probabilities(node.probabilities, expanded)
+
+    def create_treenode_id(self, node: TreeNodeDto) -> uuid.UUID:
         id_string = ""
         treenode_id = node.id
 
-        parent_id = await self.get_parent(treenode_id)
+        parent_id = self.get_parent(treenode_id)
         count = 0
         while parent_id and count < 1000:
             n = self.edge_names[(parent_id, treenode_id)]
             id_string = n if id_string == "" else n + " - " + id_string
             treenode_id = parent_id
-            parent_id = await self.get_parent(treenode_id)
+            parent_id = self.get_parent(treenode_id)
             count += 1
 
         id_string = "root" if id_string == "" else "root" + " - " + id_string
         return GenerateUuid.as_uuid(id_string)
 
-    async def find_matching_probabilities_dtos(
+    def find_matching_probabilities_dtos(
         self, object_uuids: list[uuid.UUID], in_dtos: list[DiscreteProbabilityOutgoingDto]
     ):
         out_dtos: list[DiscreteProbabilityOutgoingDto] = []
@@ -255,7 +307,7 @@ class DecisionTreeGraph:
                 out_dtos.append(dto)
         return out_dtos
 
-    async def get_probability_values(self, node: TreeNodeDto) -> Optional[list[ProbabilityDto]]:
+    def get_probability_values(self, node: TreeNodeDto) -> Optional[list[ProbabilityDto]]:
         treenode_id = node.id
         issue = node.issue
         probability_dtos: list[ProbabilityDto] = []
@@ -267,15 +319,15 @@ class DecisionTreeGraph:
             and len(issue.uncertainty.discrete_probabilities) > 0
         ):
             parent_labels: list[uuid.UUID] = []
-            parent_id = await self.get_parent(treenode_id)
+            parent_id = self.get_parent(treenode_id)
             count = 0
             while parent_id and count < 1000:
                 parent_labels.append(uuid.UUID(self.edge_names[(parent_id, treenode_id)]))
                 treenode_id = parent_id
-                parent_id = await self.get_parent(treenode_id)
+                parent_id = self.get_parent(treenode_id)
                 count += 1
 
-            discrete_prob_dtos = await self.find_matching_probabilities_dtos(
+            discrete_prob_dtos = self.find_matching_probabilities_dtos(
                 parent_labels, issue.uncertainty.discrete_probabilities
             )
 
@@ -291,7 +343,7 @@ class DecisionTreeGraph:
 
         return probability_dtos
 
-    async def get_utility_values(self, node: TreeNodeDto) -> Optional[list[UtilityDTDto]]:
+    def get_utility_values(self, node: TreeNodeDto) -> Optional[list[UtilityDTDto]]:
         issue = node.issue
         utility_dtos: list[UtilityDTDto] = []
         if isinstance(issue, EndPointNodeDto):
@@ -300,7 +352,7 @@ class DecisionTreeGraph:
         if issue.type == Type.UNCERTAINTY.value and issue.uncertainty is not None:
             outcomes = issue.uncertainty.outcomes
             for outcome in outcomes:
-                discrete_utility_value = await self.get_discrete_utility_value(node, outcome)
+                discrete_utility_value = self.get_discrete_utility_value(node, outcome)
                 utility_dto = UtilityDTDto(
                     outcome_name=outcome.name,
                     outcome_id=outcome.id,
@@ -311,7 +363,7 @@ class DecisionTreeGraph:
         if issue.type == Type.DECISION.value and issue.decision is not None:
             options = issue.decision.options
             for option in options:
-                discrete_utility_value = await self.get_discrete_utility_value(node, option)
+                discrete_utility_value = self.get_discrete_utility_value(node, option)
                 utility_dto = UtilityDTDto(
                     option_name=option.name,
                     option_id=option.id,
@@ -321,7 +373,7 @@ class DecisionTreeGraph:
 
         return utility_dtos
 
-    async def get_discrete_utility_value(
+    def get_discrete_utility_value(
         self, node: TreeNodeDto, dto: OptionOutgoingDto | OutcomeOutgoingDto
     ) -> float:
         branch_label = dto.id.__str__()
@@ -332,12 +384,12 @@ class DecisionTreeGraph:
         branch_labels = [branch_label]
 
         # Add branch labels for predecessors to the treenode branch
-        parent_id = await self.get_parent(node_id)
+        parent_id = self.get_parent(node_id)
         count = 0
         while parent_id and count < 1000:
             branch_labels.append(self.edge_names[(parent_id, node_id)])
             node_id = parent_id
-            parent_id = await self.get_parent(node_id)
+            parent_id = self.get_parent(node_id)
             count += 1
 
         # Create list of branch combinations, must include branch label for treenode
@@ -364,19 +416,18 @@ class DecisionTreeGraph:
 
     # start functionality for backward compatibility
     # => must be removed after frontend start using new/updated decision tree structure
-    async def to_issue_dtos_old(self) -> Optional[DecisionTreeDtoOld]:
-        await self.populate_utility_lookup()
-        self.edge_names = nx.get_edge_attributes(self.nx, "name")  # type: ignore
-        tg = nx.readwrite.json_graph.tree_data(self.nx, self.root)  # type: ignore
-        tree_structure = await self.create_decision_tree_dto_from_treenode_old(tg)  # type: ignore
+    def to_issue_dtos_old(self) -> Optional[DecisionTreeDtoOld]:
+        self.populate_utility_lookup()
+        tg = self.get_tree_data()
+        tree_structure = self.create_decision_tree_dto_from_treenode_old(tg)  # type: ignore
         return tree_structure
 
-    async def get_decision_tree_dto_old(
+    def get_decision_tree_dto_old(
         self, issue: TreeNodeDto, children: list[DecisionTreeDtoOld] | None = None
     ) -> DecisionTreeDtoOld:
         return DecisionTreeDtoOld(tree_node=issue, children=children)
 
-    async def create_decision_tree_dto_from_treenode_old(
+    def create_decision_tree_dto_from_treenode_old(
         self, tree_data: Dict[str, Any]
     ) -> Optional[DecisionTreeDtoOld]:
         # Base case: if the tree data is empty, return None
@@ -392,15 +443,16 @@ class DecisionTreeGraph:
         # Recursively create DTOs for child nodes
         children_dtos: list[DecisionTreeDtoOld] = []
         for child in tree_data.get("children", []):
-            child_dto = await self.create_decision_tree_dto_from_treenode_old(child)
+            child_dto = self.create_decision_tree_dto_from_treenode_old(child)
             if child_dto:
                 children_dtos.append(child_dto)
 
-        copy_node = copy.deepcopy(node)
-        copy_node.probabilities = await self.get_probability_values(copy_node)
-        copy_node.utilities = await self.get_utility_values(copy_node)
-        copy_node.id = await self.create_treenode_id(copy_node)
-        return await self.get_decision_tree_dto_old(
+        copy_node = node.model_copy()
+        copy_node.probabilities = self.get_probability_values(copy_node)
+        copy_node.utilities = self.get_utility_values(copy_node)
+        self.remove_skipped_outcomes(copy_node, tree_data)
+        copy_node.id = self.create_treenode_id(copy_node)
+        return self.get_decision_tree_dto_old(
             issue=copy_node, children=children_dtos if children_dtos else None
         )
 
@@ -409,179 +461,180 @@ class DecisionTreeGraph:
 
 class DecisionTreeCreator:
     def __init__(self) -> None:
-        self.nx = nx.DiGraph()  # type: ignore
+        self.graph_builder = GraphBuilder()
         self.project_id: uuid.UUID
         self.data: Dict[str, List[Union[uuid.UUID, EdgeUUIDDto]]] = {}
         self.treenode_ids: list[uuid.UUID] = []
         self.treenode_edge_dtos: list[EdgeUUIDDto] = []
         self.treenode_lookup: Dict[str, TreeNodeDto] = {}
         self.outcomes_lookup: Dict[str, str] = {}
+        self.probability_lookup = DiscreteProbabilityLookup([])
 
     @classmethod
-    async def initialize(
+    def initialize(
         cls, project_id: uuid.UUID, nodes: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
     ) -> DecisionTreeCreator:
         instance = cls()
         instance.project_id = project_id
         treenodes = [TreeNodeDto(issue=node) for node in nodes]
-        instance.treenode_ids, instance.treenode_edge_dtos = await instance.create_data_struct(
+        instance.treenode_ids, instance.treenode_edge_dtos = instance.create_data_struct(
             treenodes, edges
         )
-        instance.treenode_lookup = await instance.populate_treenode_lookup(treenodes)
-        await instance.data_to_networkx(instance.treenode_ids, instance.treenode_edge_dtos)
+        instance.treenode_lookup = instance.populate_treenode_lookup(treenodes)
+        instance.probability_lookup = DiscreteProbabilityLookup(nodes)
+        instance.data_to_networkx(instance.treenode_ids, instance.treenode_edge_dtos)
         return instance
 
-    async def populate_treenode_lookup(self, nodes: list[TreeNodeDto]) -> Dict[str, TreeNodeDto]:
+    def populate_treenode_lookup(self, nodes: list[TreeNodeDto]) -> Dict[str, TreeNodeDto]:
         return {str(node.id): node for node in nodes}
 
-    async def create_decision_tree(
+    def create_decision_tree(
         self, partial_order: Optional[list[uuid.UUID]] = None
     ) -> DecisionTreeGraph:
-        return await self.convert_to_decision_tree(
+        return self.convert_to_decision_tree(
             project_id=self.project_id, partial_order=partial_order
         )
 
-    async def create_data_struct(
+    def create_data_struct(
         self, nodes: list[TreeNodeDto], edges: list[EdgeOutgoingDto]
     ) -> Tuple[List[uuid.UUID], List[EdgeUUIDDto]]:
         node_ids = [node.id for node in nodes]
-        edge_dtos = [await self.to_arc_dto(nodes, edge) for edge in edges]
+        edge_dtos = [self.to_arc_dto(nodes, edge) for edge in edges]
         return node_ids, edge_dtos
 
-    async def to_arc_dto(self, nodes: list[TreeNodeDto], edge: EdgeOutgoingDto) -> EdgeUUIDDto:
+    def to_arc_dto(self, nodes: list[TreeNodeDto], edge: EdgeOutgoingDto) -> EdgeUUIDDto:
         tail_node = [x for x in nodes if x.issue.id == edge.tail_node.issue_id][0]
         head_node = [x for x in nodes if x.issue.id == edge.head_node.issue_id][0]
         return EdgeUUIDDto(tail=tail_node.id, head=head_node.id)
 
-    async def data_to_networkx(
+    def data_to_networkx(
         self, node_ids: List[uuid.UUID], edge_dtos: List[EdgeUUIDDto]
     ) -> None:
         for node_id in node_ids:
-            await self.add_node(node_id)
+            self.add_node(node_id)
         for edge_dto in edge_dtos:
-            await self.add_edge(edge_dto)
+            self.add_edge(edge_dto)
 
-    async def add_node(self, node: uuid.UUID) -> None:
+    def add_node(self, node: uuid.UUID) -> None:
         try:
-            self.nx.add_node(node)  # type: ignore
+            self.graph_builder.add_node(node)
         except Exception as e:
             print("Exception Add_node", str(e))
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def add_edge(self, edge: EdgeUUIDDto) -> None:
-        self.nx.add_edge(edge.tail, edge.head)  # type: ignore
+    def add_edge(self, edge: EdgeUUIDDto) -> None:
+        self.graph_builder.add_edge(edge.tail, edge.head)  # type: ignore
 
-    async def copy(self) -> DecisionTreeCreator:
+    def copy(self) -> DecisionTreeCreator:
         new_id = type(self)()  # Need to instance from the concrete class
-        new_id.nx = self.nx.copy()  # type: ignore
+        new_id.graph_builder = self.graph_builder.copy()
         new_id.project_id = copy.deepcopy(self.project_id)
         new_id.treenode_lookup = copy.deepcopy(self.treenode_lookup)
         return new_id
 
-    async def get_parents(self, node: uuid.UUID) -> list[uuid.UUID]:
-        return list(self.nx.predecessors(node))  # type: ignore
+    @property
+    def graph(self) -> CsrGraph:
+        return self.graph_builder.build()
 
-    async def get_children(self, node: uuid.UUID) -> list[uuid.UUID]:
-        return list(self.nx.successors(node))  # type: ignore
+    def get_parents(self, node: uuid.UUID) -> list[uuid.UUID]:
+        graph = self.graph
+        return graph.to_ids(graph.predecessors(graph.index[node]))
 
-    async def get_node_from_uuid(self, uuid: uuid.UUID) -> Optional[TreeNodeDto]:
+    def get_children(self, node: uuid.UUID) -> list[uuid.UUID]:
+        graph = self.graph
+        return graph.to_ids(graph.successors(graph.index[node]))
+
+    def get_node_from_uuid(self, uuid: uuid.UUID) -> Optional[TreeNodeDto]:
         return self.treenode_lookup.get(str(uuid), None)
 
-    async def get_type_from_id(self, id: uuid.UUID) -> str:
-        node = await self.get_node_from_uuid(id)
+    def get_type_from_id(self, id: uuid.UUID) -> str:
+        node = self.get_node_from_uuid(id)
         return node.issue.type if node is not None else "Undefined"
 
-    async def get_nodes_from_type(self, node_type_string: str) -> list[uuid.UUID]:
-        node_list: list[uuid.UUID] = []
-        for node in list(self.nx.nodes(data=True)):  # type: ignore
-            node_id = node[0]  # type: ignore
-            if await self.get_type_from_id(node_id) == node_type_string:  # type: ignore
-                node_list.append(node_id)  # type: ignore
-        return node_list
+    def get_nodes_from_type(self, node_type_string: str) -> list[uuid.UUID]:
+        return [
+            node_id
+            for node_id in self.graph.node_ids
+            if self.get_type_from_id(node_id) == node_type_string
+        ]
 
-    async def has_children(self, node: uuid.UUID) -> bool:
-        return len(await self.get_children(node)) > 0
+    def has_children(self, node: uuid.UUID) -> bool:
+        return len(self.get_children(node)) > 0
 
-    async def get_decision_nodes(self) -> list[uuid.UUID]:
-        return await self.get_nodes_from_type(Type.DECISION.value)
+    def get_decision_nodes(self) -> list[uuid.UUID]:
+        return self.get_nodes_from_type(Type.DECISION.value)
 
-    async def get_uncertainty_nodes(self) -> list[uuid.UUID]:
-        return await self.get_nodes_from_type(Type.UNCERTAINTY.value)
+    def get_uncertainty_nodes(self) -> list[uuid.UUID]:
+        return self.get_nodes_from_type(Type.UNCERTAINTY.value)
 
-    async def get_utility_nodes(self) -> list[uuid.UUID]:
-        return await self.get_nodes_from_type(Type.UTILITY.value)
+    def get_utility_nodes(self) -> list[uuid.UUID]:
+        return self.get_nodes_from_type(Type.UTILITY.value)
 
     @property
-    async def decision_count(self) -> int:
-        return len(await self.get_decision_nodes())
+    def decision_count(self) -> int:
+        return len(self.get_decision_nodes())
 
     @property
-    async def uncertainty_count(self) -> int:
-        return len(await self.get_uncertainty_nodes())
+    def uncertainty_count(self) -> int:
+        return len(self.get_uncertainty_nodes())
 
     @property
-    async def utility_count(self) -> int:
-        return len(await self.get_utility_nodes())
-
-    async def decision_elimination_order(self) -> list[uuid.UUID]:
-        cid_copy = await self.copy()
-
-        decisions: list[uuid.UUID] = []
-        decisions_count = await cid_copy.decision_count
-        while decisions_count > 0:
-            nodes: list[uuid.UUID] = list(cid_copy.nx.nodes())  # type: ignore
-            for node in nodes:
-                if not await cid_copy.has_children(node):
-                    if await self.get_type_from_id(node) == Type.DECISION.value:
-                        decisions.append(node)
-                        decisions_count -= 1
-                    cid_copy.nx.remove_node(node)  # type: ignore
-        return decisions
-
-    async def calculate_partial_order_issues(self) -> List[uuid.UUID]:
-        partial_order = await self.calculate_partial_order()
-        partial_order_issues = [self.treenode_lookup[id.__str__()].issue.id for id in partial_order]
-        return partial_order_issues
-
-    async def calculate_partial_order(self) -> list[uuid.UUID]:
-        """Partial order algorithm"""
-
-        # get all chance nodes and sort according to child/parent relationship
-        uncertainty_subgraph = self.nx.subgraph(await self.get_uncertainty_nodes())  # type: ignore
-        uncertainty_nodes = list(nx.topological_sort(uncertainty_subgraph))  # type: ignore
-
-        elimination_order = await self.decision_elimination_order()
-        # TODO: Add utility nodes
-        partial_order: list[uuid.UUID] = []
-
-        while elimination_order:
-            decision = elimination_order.pop()
-            parent_decision_nodes: list[uuid.UUID] = []
-            for parent in await self.get_parents(decision):
-                if not await self.get_type_from_id(parent) == Type.DECISION.value:
-                    if parent in uncertainty_nodes:
-                        parent_decision_nodes.append(parent)
-                        uncertainty_nodes.remove(parent)
+    def utility_count(self) -> int:
+        return len(self.get_utility_nodes())
+
+    def get_model_structure(self) -> ModelStructure:
+        treenode_ids = self.graph_builder.node_ids
+        issue_ids = {
+            treenode_id: self.treenode_lookup[str(treenode_id)].issue.id
+            for treenode_id in treenode_ids
+        }
+        edges = tuple((issue_ids[tail], issue_ids[head]) for tail, head in self.graph_builder.edges)
+        return ModelStructure(
+            issue_ids=tuple(issue_ids.values()),  # type: ignore
+            issue_types=tuple(self.get_type_from_id(x) for x in treenode_ids),
+            edges=edges,  # type: ignore
+        )
 
-            if len(parent_decision_nodes) > 0:
-                partial_order += parent_decision_nodes
-            partial_order.append(decision)
+    def get_partial_order(self) -> PartialOrder:
+        """Elimination and partial order of the tree nodes, memoized per model structure."""
+        structure = self.get_model_structure()
+        issue_order = calculate_partial_order(structure)
+        treenode_ids = dict(zip(structure.issue_ids, self.graph_builder.node_ids))
+        return PartialOrder(
+            decision_elimination_order=tuple(
+                treenode_ids[x] for x in issue_order.decision_elimination_order
+            ),
+            partial_order=tuple(treenode_ids[x] for x in issue_order.partial_order),
+        )
 
-        partial_order += uncertainty_nodes  # type: ignore
+    def decision_elimination_order(self) -> list[uuid.UUID]:
+        return list(self.get_partial_order().decision_elimination_order)
 
-        return partial_order
+    def calculate_partial_order_issues(self) -> List[uuid.UUID]:
+        partial_order = self.calculate_partial_order()
+        partial_order_issues = [self.treenode_lookup[id.__str__()].issue.id for id in partial_order]
+        return partial_order_issues
 
-    async def output_branches_from_node(
-        self, node_id: uuid.UUID, node_in_partial_order_id: uuid.UUID, flip: bool = True
+    def calculate_partial_order(self) -> list[uuid.UUID]:
+        """Partial order algorithm"""
+        return list(self.get_partial_order().partial_order)
+
+    def output_branches_from_node(
+        self,
+        node_id: uuid.UUID,
+        node_in_partial_order_id: uuid.UUID,
+        flip: bool = True,
+        optimal_option_id: Optional[str] = None,
     ) -> Iterator[Tuple[EdgeUUIDDto, uuid.UUID]]:
         tree_stack = []
-        node = await self.get_node_from_uuid(node_id)
+        node = self.get_node_from_uuid(node_id)
         if node is not None and isinstance(node.issue, IssueOutgoingDto):
             if node.issue.type == Type.DECISION:
                 tree_stack = (
                     [
                         EdgeUUIDDto(tail=node_id, head=None, name=option.id.__str__())
                         for option in node.issue.decision.options
+                        if optimal_option_id is None or option.id.__str__() == optimal_option_id
                     ]
                     if node.issue.decision
                     else []
@@ -604,49 +657,132 @@ class DecisionTreeCreator:
 
         return zip(tree_stack, [node_in_partial_order_id] * len(tree_stack), strict=False)
 
-    async def convert_to_decision_tree(
-        self, project_id: uuid.UUID, partial_order: Optional[list[uuid.UUID]] = None
+    def convert_to_decision_tree(
+        self,
+        project_id: uuid.UUID,
+        partial_order: Optional[list[uuid.UUID]] = None,
+        solution: Optional[SolutionDto] = None,
+        probability_epsilon: float = config.TREE_PROBABILITY_EPSILON,
     ) -> DecisionTreeGraph:
+        """
+        Builds the decision tree following the partial order.
+        If a solution is given, decision nodes only get the branch of the optimal option.
+        Outcomes with a cumulative probability of zero or below probability_epsilon are not
+        expanded, and the probabilities of the expanded outcomes are rescaled to sum to one.
+        A branch reaching an uncertainty where every outcome is below probability_epsilon ends in
+        an end node there.
+        """
         # TODO: Update ID2DT according to way we deal with probabilities
         if not partial_order:
-            partial_order = await self.calculate_partial_order()
+            partial_order = self.calculate_partial_order()
         root_node = partial_order[0]
         decision_tree = DecisionTreeGraph(root=root_node)
         # tree_stack contains views of the partial order nodes
         # decision_tree contains copy of the nodes (as they appear several times)
         tree_stack = [(root_node, root_node)]
 
+        # states on the path to each tree node and the probability of reaching it
+        paths: Dict[uuid.UUID, set[str]] = {root_node: set()}
+        cumulative_probabilities: Dict[uuid.UUID, float] = {root_node: 1.0}
+        branch_probabilities: Dict[Tuple[uuid.UUID, str], float] = {}
+        # issue id -> state on the path to each tree node, for the policy lookups
+        issue_states: Dict[uuid.UUID, Dict[uuid.UUID, uuid.UUID]] = {root_node: {}}
+        policy_table = (
+            PolicyTable(solution.get_all_optimal_decisions()) if solution is not None else None
+        )
+
         while tree_stack:
             element = tree_stack.pop()
 
             if isinstance(element[0], uuid.UUID):  # type: ignore
-                tree_stack += await self.output_branches_from_node(*element)  # type: ignore
+                optimal_option_id: Optional[str] = None
+                node = self.get_node_from_uuid(element[0])
+                if policy_table is not None and node is not None:
+                    optimal_option = policy_table.get_optimal_option(
+                        node.issue.id, issue_states[element[0]]
+                    )
+                    if optimal_option is not None:
+                        optimal_option_id = str(optimal_option.state.id)
+                branches = list(
+                    self.output_branches_from_node(  # type: ignore
+                        *element, optimal_option_id=optimal_option_id  # type: ignore
+                    )
+                )
+                if node is not None and node.issue.type == Type.UNCERTAINTY.value:
+                    expandable_outcomes = self.probability_lookup.get_expandable_outcomes(
+                        node.issue,  # type: ignore
+                        paths[element[0]],
+                        cumulative_probabilities[element[0]],
+                        probability_epsilon,
+                    )
+                    expandable_branches = [x for x in branches if x[0].name in expandable_outcomes]
+                    decision_tree.skipped_node_count += len(branches) - len(expandable_branches)
+                    branches = expandable_branches
+                    for branch in branches:
+                        branch_probabilities[(element[0], branch[0].name)] = expandable_outcomes[
+                            branch[0].name
+                        ]
+                tree_stack += branches
 
             else:  # element is a branch
-                endpoint_start_index = partial_order.index(element[1])
+                next_index = partial_order.index(element[1]) + 1
+                path = paths[element[0].tail] | {element[0].name}
+                cumulative_probability = branch_probabilities.get(
+                    (element[0].tail, element[0].name), cumulative_probabilities[element[0].tail]
+                )
+                negligible_outcome_count = (
+                    self.get_negligible_outcome_count(
+                        partial_order[next_index], path, cumulative_probability, probability_epsilon
+                    )
+                    if next_index < len(partial_order)
+                    else 0
+                )
 
-                if endpoint_start_index < len(partial_order) - 1:
-                    endpoint_end = await self.copy_treenode(partial_order[endpoint_start_index + 1])
-                    tree_stack.append((endpoint_end, partial_order[endpoint_start_index + 1]))
+                if next_index < len(partial_order) and not negligible_outcome_count:
+                    endpoint_end = self.copy_treenode(partial_order[next_index])
+                    tree_stack.append((endpoint_end, partial_order[next_index]))
                 else:
-                    endpoint_end = await self.create_endpoint_node(project_id=project_id)
+                    # the branch ends before an uncertainty where every outcome is negligible
+                    decision_tree.skipped_node_count += negligible_outcome_count
+                    endpoint_end = self.create_endpoint_node(project_id=project_id)
 
                 element[0].head = endpoint_end
-                await decision_tree.add_edge(element[0])  # node is added when the branch is added
-
-        await decision_tree.populate_treenode_lookup(self.treenode_lookup)
-        decision_tree.outcomes_lookup = copy.deepcopy(self.outcomes_lookup)
+                decision_tree.add_edge(element[0])  # node is added when the branch is added
+                paths[endpoint_end] = path
+                if policy_table is not None:
+                    tail_issue_id = self.get_node_from_uuid(element[0].tail).issue.id  # type: ignore
+                    issue_states[endpoint_end] = {
+                        **issue_states[element[0].tail],
+                        tail_issue_id: uuid.UUID(element[0].name),
+                    }
+                cumulative_probabilities[endpoint_end] = cumulative_probability
+
+        decision_tree.populate_treenode_lookup(self.treenode_lookup)
+        decision_tree.outcomes_lookup = dict(self.outcomes_lookup)
         return decision_tree
 
-    async def copy_treenode(self, node_id: uuid.UUID) -> uuid.UUID:
-        # create a copy of the node, return id of the copy
+    def get_negligible_outcome_count(
+        self,
+        node_id: uuid.UUID,
+        path: set[str],
+        cumulative_probability: float,
+        probability_epsilon: float,
+    ) -> int:
+        node = self.get_node_from_uuid(node_id)
+        if node is None or isinstance(node.issue, EndPointNodeDto):
+            return 0
+        return self.probability_lookup.get_negligible_outcome_count(
+            node.issue, path, cumulative_probability, probability_epsilon
+        )
+
+    def copy_treenode(self, node_id: uuid.UUID) -> uuid.UUID:
+        # create a copy of the node sharing the issue data, return id of the copy
         node = self.treenode_lookup[node_id.__str__()]
-        copy_node = copy.deepcopy(node)
-        copy_node.id = uuid.uuid4()
+        copy_node = node.model_copy(update={"id": uuid.uuid4()})
         self.treenode_lookup[copy_node.id.__str__()] = copy_node
         return copy_node.id
 
-    async def create_endpoint_node(self, project_id: uuid.UUID) -> uuid.UUID:
+    def create_endpoint_node(self, project_id: uuid.UUID) -> uuid.UUID:
         # create endpoint node which is added to treenode_lookup table, return id of the node
         node = EndPointNodeDto(project_id=project_id)
         treenode = TreeNodeDto(issue=node)
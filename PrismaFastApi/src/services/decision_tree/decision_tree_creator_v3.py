@@ -3,9 +3,8 @@ from __future__ import annotations
 import logging
 import uuid
 import numpy as np
-import networkx as nx
 from collections import defaultdict
-from typing import Optional, Dict, Any, Union, List, Tuple, Iterator, Set, cast
+from typing import Optional, Dict, Union, List, Tuple, Iterator, Set
 from fastapi import HTTPException
 from src.utils.generate_uuid import GenerateUuid
 from src.constants import Type
@@ -20,7 +19,16 @@ from src.dtos.decision_tree_dtos import (
     ProbabilityDto2,
     UtilityDTDto2,
 )
-from src.services.decision_tree.decision_tree_utils import NodeTreeNodeLookup
+from src.services.decision_tree.decision_tree_utils import (
+    NodeTreeNodeLookup,
+    DiscreteProbabilityLookup,
+    keep_expanded_probabilities,
+)
+from src.dtos.model_solution_dtos import SolutionDto
+from src.config import config
+from src.domain.policy_table import PolicyTable
+from src.domain.graph import CsrGraph, GraphBuilder
+from src.domain.partial_order import ModelStructure, PartialOrder, calculate_partial_order
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +44,7 @@ class DecisionTreeGraph_v3:
     DASH = "-"
     MAXDEPTH = 1000
 
-    def __init__(self, root: uuid.UUID, **kwargs: Dict[str, Any]) -> None:
-        self.nx: nx.DiGraph = nx.DiGraph(**kwargs)  # type: ignore
+    def __init__(self, root: uuid.UUID) -> None:
         self.root: uuid.UUID = root
         self.edge_names: Dict[Tuple[uuid.UUID, uuid.UUID], str] = {}
         self.utility_lookup: Dict[tuple[str, ...], List[float]] = {}
@@ -47,6 +54,10 @@ class DecisionTreeGraph_v3:
         self.treenode_oldid_to_newid_map: Dict[uuid.UUID, uuid.UUID] = {}
         self.treenodeid_to_parentid_map : Dict[uuid.UUID, Optional[uuid.UUID]] = {}
         self.treenodeid_to_parentid_map[self.root] = None
+        # outcome branches not expanded since their cumulative probability is zero or negligible
+        self.skipped_node_count: int = 0
+        # tree node id -> outcomes not expanded, left out of its probabilities
+        self.skipped_outcomes: Dict[uuid.UUID, set[str]] = {}
 
     def add_edge(self, edge: EdgeUUIDDto) -> None:
         self.treenodeid_to_parentid_map[edge.head] = edge.tail
@@ -59,7 +70,7 @@ class DecisionTreeGraph_v3:
         return self.treenodeid_to_parentid_map.get(node_id)
 
     def populate_utility_lookup(self) -> None:
-        for node_id in self.node_treenode_lookup.treenode_id_to_node_id.values():  # type: ignore
+        for node_id in self.node_treenode_lookup.get_node_ids():
             node = self.node_treenode_lookup.get_node_dto(node_id)
             if node:
                 if isinstance(node, EndPointNodeDto) or node.type != Type.UTILITY.value:
@@ -80,7 +91,7 @@ class DecisionTreeGraph_v3:
                         )
 
     def populate_discrete_probabilities_lookup(self) -> None:
-        for node_id in self.node_treenode_lookup.treenode_id_to_node_id.values():  # type: ignore
+        for node_id in self.node_treenode_lookup.get_node_ids():
             node = self.node_treenode_lookup.get_node_dto(node_id)
             if node:
                 if isinstance(node, EndPointNodeDto) or node.type != Type.UNCERTAINTY.value:
@@ -102,24 +113,7 @@ class DecisionTreeGraph_v3:
     def get_dto_map(self):
         dto_map: Dict[uuid.UUID, TreeNodeDto2] = {}
         for treenode_id in self.treenodeid_to_parentid_map.keys():
-            if node := self.node_treenode_lookup.get_dto_for_treenode_id(treenode_id):
-                type = Type.END.value if isinstance(node, EndPointNodeDto) else node.type
-                parent_state_id: Optional[str] = self.edge_names.get((self.get_parent(treenode_id), treenode_id))
-                dto = TreeNodeDto2(
-                    parent_state_id=parent_state_id,
-                    id=treenode_id,
-                    issue_id = node.id,
-                    type = type,
-                    probabilities = self.get_discrete_probability_dtos(treenode_id, node),
-                    utilities = self.get_utility_dtos(treenode_id, node),
-                    children=[],
-                )
-                if dto.utilities:
-                    dto.utilities.sort(key=lambda x: str(x.option_id if x.option_id is not None else x.outcome_id or ""))
-
-                if dto.probabilities:
-                    dto.probabilities.sort(key=lambda x: x.outcome_id)
-
+            if dto := self.create_dto(treenode_id):
                 dto_map[treenode_id] = dto
 
         for parent_id in self.treenodeid_to_parentid_map.keys():
@@ -135,6 +129,34 @@ class DecisionTreeGraph_v3:
 
         return dto_map
 
+    def create_dto(self, treenode_id: uuid.UUID) -> Optional[TreeNodeDto2]:
+        """The dto of a single tree node, without children."""
+        node = self.node_treenode_lookup.get_dto_for_treenode_id(treenode_id)
+        if not node:
+            return None
+        type = Type.END.value if isinstance(node, EndPointNodeDto) else node.type
+        parent_state_id: Optional[str] = self.edge_names.get((self.get_parent(treenode_id), treenode_id))
+        dto = TreeNodeDto2(
+            parent_state_id=parent_state_id,
+            id=treenode_id,
+            issue_id = node.id,
+            type = type,
+            probabilities = self.get_discrete_probability_dtos(treenode_id, node),
+            utilities = self.get_utility_dtos(treenode_id, node),
+            children=[],
+        )
+        if dto.utilities:
+            dto.utilities.sort(key=lambda x: str(x.option_id if x.option_id is not None else x.outcome_id or ""))
+
+        if dto.probabilities and treenode_id in self.skipped_outcomes:
+            dto.probabilities = keep_expanded_probabilities(
+                dto.probabilities,
+                {str(p.outcome_id) for p in dto.probabilities} - self.skipped_outcomes[treenode_id],
+            )
+        if dto.probabilities:
+            dto.probabilities.sort(key=lambda x: x.outcome_id)
+        return dto
+
     def get_successors(self, parent_id: uuid.UUID):
         return [k for k, v in self.treenodeid_to_parentid_map.items() if v == parent_id]
 
@@ -150,7 +172,8 @@ class DecisionTreeGraph_v3:
             if node:
                 for child in getattr(node, "children", []) or []:
                     visit(child.id)
-            order.append(node_id)
+                # children outside the map, e.g. subtrees rolled back separately, are left out
+                order.append(node_id)
 
         for node_id in dto_map:
             visit(node_id)
@@ -218,6 +241,20 @@ class DecisionTreeGraph_v3:
         self.treenode_oldid_to_newid_map[treenode_id] = new_id
         return new_id
 
+    def to_issue_dtos_without_values(self) -> Optional[TreeNodeDto2]:
+        """
+        Dtos with utilities and probabilities but without expected values, for the top of a tree
+        whose subtrees are built separately. Branches ending above the subtrees get their
+        endpoint values.
+        """
+        self.populate_utility_lookup()
+        self.populate_discrete_probabilities_lookup()
+        dto_map = self.get_dto_map()
+        self.calculate_endpoint_nodes(self.root, dto_map)
+        dto_map = self.calculate_treenode_ids_from_branches(dto_map)
+        root_id = self.find_root_id(dto_map)
+        return dto_map[root_id] if root_id else None
+
     def find_root_id(self, dto_map: Dict[uuid.UUID, TreeNodeDto2]) -> Optional[uuid.UUID]:
         all_ids: Set[uuid.UUID] = set(dto_map.keys())
         child_ids: Set[uuid.UUID] = set(
@@ -228,8 +265,8 @@ class DecisionTreeGraph_v3:
             raise ValueError("No root node found")
         return root_ids[0] if len(root_ids) > 0 else None
 
-    def get_probabilities(self, id: uuid.UUID, parent_node: TreeNodeDto2) -> float:
-        branch_id = self.edge_names[(parent_node.id, id)]
+    def get_probabilities(self, child: TreeNodeDto2, parent_node: TreeNodeDto2) -> float:
+        branch_id = child.parent_state_id or ""
         prob = self.get_probability_for_branch(parent_node, branch_id) if parent_node else 0
         return prob
 
@@ -243,7 +280,6 @@ class DecisionTreeGraph_v3:
                 if node.type == Type.END.value:
                     node.expected_value = None  # node.endpoint_value
                 elif node.type == Type.UNCERTAINTY.value:
-                    child_ids = [child.id for child in node.children]
                     child_values = np.array(
                         [
                             (
@@ -254,10 +290,21 @@ class DecisionTreeGraph_v3:
                             for child in node.children
                         ]
                     )
-                    probabilities = np.array([self.get_probabilities(id, node) for id in child_ids])
+                    probabilities = np.array(
+                        [self.get_probabilities(child, node) for child in node.children]
+                    )
                     node.expected_value = np.dot(probabilities, child_values)
                 elif node.type == Type.DECISION.value:
-                    child_values = np.array([child.expected_value for child in node.children])
+                    child_values = np.array(
+                        [
+                            (
+                                child.endpoint_value
+                                if child.type == Type.END.value
+                                else child.expected_value
+                            )
+                            for child in node.children
+                        ]
+                    )
                     node.expected_value = np.max(child_values)
             except Exception as e:
                 print(f"Exception at node_id={node_id}: {e}")
@@ -468,13 +515,14 @@ class DecisionTreeGraph_v3:
 
 class DecisionTreeCreator_v3:
     def __init__(self) -> None:
-        self.nx = nx.DiGraph()  # type: ignore
+        self.graph_builder = GraphBuilder()
         self.project_id: uuid.UUID
         self.data: Dict[str, List[Union[uuid.UUID, EdgeUUIDDto]]] = {}
         self.treenode_ids: list[uuid.UUID] = []
         self.node_ids: list[uuid.UUID] = []
         self.treenode_edge_dtos: list[EdgeUUIDDto] = []
         self.node_treenode_lookup: NodeTreeNodeLookup
+        self.probability_lookup = DiscreteProbabilityLookup([])
 
     @classmethod
     def initialize(
@@ -485,6 +533,7 @@ class DecisionTreeCreator_v3:
         instance.node_treenode_lookup = NodeTreeNodeLookup()
         # create a lookup between treenode id and IssueOutgoingDto | EndPointNodeDto
         instance.create_data_structure(nodes, edges)
+        instance.probability_lookup = DiscreteProbabilityLookup(nodes)
         return instance
 
     def create_decision_tree(
@@ -507,41 +556,50 @@ class DecisionTreeCreator_v3:
     def create_data_structure(
         self, nodes: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
     ) -> None:
+        # issue id -> canonical treenode id
+        treenode_ids: Dict[uuid.UUID, uuid.UUID] = {}
         for node in nodes:
             treenode_id = uuid.uuid4()
 
             self.node_treenode_lookup.add_node_dto_and_treenode_id(node, treenode_id)
             self.add_node(treenode_id)
+            treenode_ids.setdefault(node.id, treenode_id)
 
         for edge in edges:
-            tail_node = [x for x in nodes if x.id == edge.tail_node.issue_id][0]
-            head_node = [x for x in nodes if x.id == edge.head_node.issue_id][0]
-            tail_treenode_id = self.node_treenode_lookup.get_treenode_ids_for_dto(tail_node.id)[0]
-            head_treenode_id = self.node_treenode_lookup.get_treenode_ids_for_dto(head_node.id)[0]
+            tail_treenode_id = treenode_ids.get(edge.tail_node.issue_id)
+            head_treenode_id = treenode_ids.get(edge.head_node.issue_id)
+            if tail_treenode_id is None or head_treenode_id is None:
+                raise ValueError(f"Edge {edge.id} connects an issue that is not in the model")
             self.add_edge(EdgeUUIDDto(tail=tail_treenode_id, head=head_treenode_id))
 
     def add_node(self, node: uuid.UUID) -> None:
         try:
-            self.nx.add_node(node)  # type: ignore
+            self.graph_builder.add_node(node)
         except Exception as e:
             print("Exception Add_node", str(e))
             raise HTTPException(status_code=500, detail=str(e))
 
     def add_edge(self, edge: EdgeUUIDDto) -> None:
-        self.nx.add_edge(edge.tail, edge.head)  # type: ignore
+        self.graph_builder.add_edge(edge.tail, edge.head)  # type: ignore
 
     def copy(self) -> DecisionTreeCreator_v3:
         new_id = type(self)()  # Need to instance from the concrete class
-        new_id.nx = self.nx.copy()  # type: ignore
+        new_id.graph_builder = self.graph_builder.copy()
         new_id.project_id = self.project_id
         new_id.node_treenode_lookup = self.node_treenode_lookup
         return new_id
 
+    @property
+    def graph(self) -> CsrGraph:
+        return self.graph_builder.build()
+
     def get_parents(self, node: uuid.UUID) -> list[uuid.UUID]:
-        return list(self.nx.predecessors(node))  # type: ignore
+        graph = self.graph
+        return graph.to_ids(graph.predecessors(graph.index[node]))
 
     def get_children(self, node: uuid.UUID) -> list[uuid.UUID]:
-        return list(self.nx.successors(node))  # type: ignore
+        graph = self.graph
+        return graph.to_ids(graph.successors(graph.index[node]))
 
     def get_node_from_uuid(self, uuid: uuid.UUID) -> Optional[IssueOutgoingDto | EndPointNodeDto]:
         return self.node_treenode_lookup.get_dto_for_treenode_id(uuid)
@@ -551,12 +609,11 @@ class DecisionTreeCreator_v3:
         return node.type if node is not None else "Undefined"
 
     def get_nodes_from_type(self, node_type_string: str) -> list[uuid.UUID]:
-        node_list: list[uuid.UUID] = []
-        for node in list(self.nx.nodes(data=True)):  # type: ignore
-            node_id = node[0]  # type: ignore
-            if self.get_type_from_id(node_id) == node_type_string:  # type: ignore
-                node_list.append(node_id)  # type: ignore
-        return node_list
+        return [
+            node_id
+            for node_id in self.graph.node_ids
+            if self.get_type_from_id(node_id) == node_type_string
+        ]
 
     def has_children(self, node: uuid.UUID) -> bool:
         return len(self.get_children(node)) > 0
@@ -582,20 +639,33 @@ class DecisionTreeCreator_v3:
     def utility_count(self) -> int:
         return len(self.get_utility_nodes())
 
+    def get_model_structure(self) -> ModelStructure:
+        treenode_ids = self.graph_builder.node_ids
+        issue_ids = {
+            treenode_id: self.node_treenode_lookup.get_dto_id_for_treenode_id(treenode_id)
+            for treenode_id in treenode_ids
+        }
+        edges = tuple((issue_ids[tail], issue_ids[head]) for tail, head in self.graph_builder.edges)
+        return ModelStructure(
+            issue_ids=tuple(issue_ids.values()),  # type: ignore
+            issue_types=tuple(self.get_type_from_id(x) for x in treenode_ids),
+            edges=edges,  # type: ignore
+        )
+
+    def get_partial_order(self) -> PartialOrder:
+        """Elimination and partial order of the tree nodes, memoized per model structure."""
+        structure = self.get_model_structure()
+        issue_order = calculate_partial_order(structure)
+        treenode_ids = dict(zip(structure.issue_ids, self.graph_builder.node_ids))
+        return PartialOrder(
+            decision_elimination_order=tuple(
+                treenode_ids[x] for x in issue_order.decision_elimination_order
+            ),
+            partial_order=tuple(treenode_ids[x] for x in issue_order.partial_order),
+        )
+
     def decision_elimination_order(self) -> list[uuid.UUID]:
-        cid_copy = self.copy()
-
-        decisions: list[uuid.UUID] = []
-        decisions_count = cid_copy.decision_count
-        while decisions_count > 0:
-            nodes: list[uuid.UUID] = list(cid_copy.nx.nodes())  # type: ignore
-            for node in nodes:
-                if not cid_copy.has_children(node):
-                    if self.get_type_from_id(node) == Type.DECISION.value:
-                        decisions.append(node)
-                        decisions_count -= 1
-                    cid_copy.nx.remove_node(node)  # type: ignore
-        return decisions
+        return list(self.get_partial_order().decision_elimination_order)
 
     def calculate_partial_order_issue_ids(self) -> List[Optional[uuid.UUID]]:
         partial_order = self.calculate_partial_order()
@@ -606,33 +676,14 @@ class DecisionTreeCreator_v3:
 
     def calculate_partial_order(self) -> list[uuid.UUID]:
         """Partial order algorithm"""
-        # get all chance nodes and sort according to child/parent relationship
-        uncertainty_subgraph = self.nx.subgraph(self.get_uncertainty_nodes())  # type: ignore
-        uncertainty_nodes = list(nx.topological_sort(uncertainty_subgraph))  # type: ignore
-
-        elimination_order = self.decision_elimination_order()
-        # TODO: Add utility nodes
-        partial_order: list[uuid.UUID] = []
-
-        while elimination_order:
-            decision = elimination_order.pop()
-            parent_decision_nodes: list[uuid.UUID] = []
-            for parent in self.get_parents(decision):
-                if not self.get_type_from_id(parent) == Type.DECISION.value:
-                    if parent in uncertainty_nodes:
-                        parent_decision_nodes.append(parent)
-                        uncertainty_nodes.remove(parent)
-
-            if len(parent_decision_nodes) > 0:
-                partial_order += parent_decision_nodes
-            partial_order.append(decision)
-
-        partial_order += uncertainty_nodes  # type: ignore
-
-        return partial_order
+        return list(self.get_partial_order().partial_order)
 
     def output_branches_from_node(
-        self, node_id: uuid.UUID, node_in_partial_order_id: uuid.UUID, flip: bool = True
+        self,
+        node_id: uuid.UUID,
+        node_in_partial_order_id: uuid.UUID,
+        flip: bool = True,
+        optimal_option_id: Optional[str] = None,
     ) -> Iterator[Tuple[EdgeUUIDDto, uuid.UUID]]:
         tree_stack = []
         node = self.get_node_from_uuid(node_id)
@@ -642,6 +693,7 @@ class DecisionTreeCreator_v3:
                     [
                         EdgeUUIDDto(tail=node_id, head=None, name=option.id.__str__())
                         for option in node.decision.options
+                        if optimal_option_id is None or option.id.__str__() == optimal_option_id
                     ]
                     if node.decision
                     else []
@@ -662,35 +714,124 @@ class DecisionTreeCreator_v3:
         return zip(tree_stack, [node_in_partial_order_id] * len(tree_stack), strict=False)
 
     def convert_to_decision_tree(
-        self, project_id: uuid.UUID, partial_order: Optional[list[uuid.UUID]] = None
+        self,
+        project_id: uuid.UUID,
+        partial_order: Optional[list[uuid.UUID]] = None,
+        probability_epsilon: float = config.TREE_PROBABILITY_EPSILON,
+        branch_prefix: tuple[str, ...] = (),
+        max_depth: Optional[int] = None,
+        solution: Optional[SolutionDto] = None,
     ) -> DecisionTreeGraph_v3:
+        """
+        Builds the full decision tree following the partial order.
+        If a solution is given, decision nodes only get the branch of the optimal option.
+        Outcomes with a cumulative probability of zero or below probability_epsilon are not
+        expanded, and the probabilities of the expanded outcomes are rescaled to sum to one.
+        A branch reaching an uncertainty where every outcome is below probability_epsilon ends in
+        an end node there.
+
+        A tree can be built in parts: branch_prefix restricts the first levels to the given
+        states, and skipped outcomes are then only counted below the prefix. Tree nodes at
+        max_depth are added but not expanded.
+        """
         # TODO: Update ID2DT according to way we deal with probabilities
         if not partial_order:
             partial_order = self.calculate_partial_order()
+        depths = {node: depth for depth, node in enumerate(partial_order)}
         root_node = partial_order[0]
         decision_tree = DecisionTreeGraph_v3(root=root_node)
         # tree_stack contains views of the partial order nodes
         # decision_tree contains copy of the nodes (as they appear several times)
         tree_stack = [(root_node, root_node)]
 
+        # states on the path to each tree node and the probability of reaching it
+        paths: Dict[uuid.UUID, set[str]] = {root_node: set()}
+        cumulative_probabilities: Dict[uuid.UUID, float] = {root_node: 1.0}
+        branch_probabilities: Dict[Tuple[uuid.UUID, str], float] = {}
+        # issue id -> state on the path to each tree node, for the policy lookups
+        issue_states: Dict[uuid.UUID, Dict[uuid.UUID, uuid.UUID]] = {root_node: {}}
+        policy_table = (
+            PolicyTable(solution.get_all_optimal_decisions()) if solution is not None else None
+        )
+
         while tree_stack:
             element = tree_stack.pop()
 
             if isinstance(element[0], uuid.UUID):  # type: ignore
-                tree_stack += self.output_branches_from_node(*element)  # type: ignore
+                optimal_option_id: Optional[str] = None
+                node = self.get_node_from_uuid(element[0])
+                if policy_table is not None and isinstance(node, IssueOutgoingDto):
+                    optimal_option = policy_table.get_optimal_option(
+                        node.id, issue_states[element[0]]
+                    )
+                    if optimal_option is not None:
+                        optimal_option_id = str(optimal_option.state.id)
+                branches = list(
+                    self.output_branches_from_node(  # type: ignore
+                        *element, optimal_option_id=optimal_option_id  # type: ignore
+                    )
+                )
+                depth = depths[element[1]]  # type: ignore
+                if isinstance(node, IssueOutgoingDto) and node.type == Type.UNCERTAINTY.value:
+                    expandable_outcomes = self.probability_lookup.get_expandable_outcomes(
+                        node,
+                        paths[element[0]],
+                        cumulative_probabilities[element[0]],
+                        probability_epsilon,
+                    )
+                    expandable_branches = [x for x in branches if x[0].name in expandable_outcomes]
+                    skipped_outcomes = {x[0].name for x in branches} - set(expandable_outcomes)
+                    if skipped_outcomes:
+                        decision_tree.skipped_outcomes[element[0]] = skipped_outcomes
+                    if depth >= len(branch_prefix):
+                        decision_tree.skipped_node_count += len(branches) - len(
+                            expandable_branches
+                        )
+                    branches = expandable_branches
+                    for branch in branches:
+                        branch_probabilities[(element[0], branch[0].name)] = expandable_outcomes[
+                            branch[0].name
+                        ]
+                if depth < len(branch_prefix):
+                    branches = [x for x in branches if x[0].name == branch_prefix[depth]]
+                tree_stack += branches
 
             else:  # element is a branch
-                endpoint_start_index = partial_order.index(element[1])
+                next_depth = depths[element[1]] + 1
+                path = paths[element[0].tail] | {element[0].name}
+                cumulative_probability = branch_probabilities.get(
+                    (element[0].tail, element[0].name), cumulative_probabilities[element[0].tail]
+                )
+                expand_next = max_depth is None or next_depth < max_depth
+                negligible_outcome_count = (
+                    self.get_negligible_outcome_count(
+                        partial_order[next_depth], path, cumulative_probability, probability_epsilon
+                    )
+                    if next_depth < len(partial_order) and expand_next
+                    else 0
+                )
 
-                if endpoint_start_index < len(partial_order) - 1:
-                    endpoint_end = self.copy_treenode(partial_order[endpoint_start_index + 1])
-                    tree_stack.append((endpoint_end, partial_order[endpoint_start_index + 1]))
+                if next_depth < len(partial_order) and not negligible_outcome_count:
+                    endpoint_end = self.copy_treenode(partial_order[next_depth])
+                    if expand_next:
+                        tree_stack.append((endpoint_end, partial_order[next_depth]))
                 else:
+                    # the branch ends before an uncertainty where every outcome is negligible
+                    if next_depth >= len(branch_prefix):
+                        decision_tree.skipped_node_count += negligible_outcome_count
                     endpoint_end = self.create_endpoint_node(project_id=project_id)
 
                 element[0].head = endpoint_end
 
                 decision_tree.add_edge(element[0])  # node is added when the branch is added
+                paths[endpoint_end] = path
+                if policy_table is not None:
+                    tail_issue_id = self.get_node_from_uuid(element[0].tail).id  # type: ignore
+                    issue_states[endpoint_end] = {
+                        **issue_states[element[0].tail],
+                        tail_issue_id: uuid.UUID(element[0].name),
+                    }
+                cumulative_probabilities[endpoint_end] = cumulative_probability
 
         self.find_nodes_for_utilities(partial_order)
         decision_tree.transfer_node_treenode_lookup(self.node_treenode_lookup)
@@ -722,13 +863,25 @@ class DecisionTreeCreator_v3:
             partial_order = self.calculate_partial_order()
         root_node = partial_order[0]
         decision_tree = DecisionTreeGraph_v3(root=root_node)
-        if not paths:
-            paths = []
-        
-        prefix_to_treenode = {(): root_node}
+        self.add_paths_to_decision_tree(decision_tree, partial_order, paths or [], {(): root_node})
 
-        visited_states: set[tuple[tuple[uuid.UUID, ...], uuid.UUID]] = set()
+        self.find_nodes_for_utilities(partial_order)
+        decision_tree.transfer_node_treenode_lookup(self.node_treenode_lookup)
+        return decision_tree
 
+    def add_paths_to_decision_tree(
+        self,
+        decision_tree: DecisionTreeGraph_v3,
+        partial_order: list[uuid.UUID],
+        paths: list[list[uuid.UUID]],
+        prefix_to_treenode: Dict[Tuple[uuid.UUID, ...], uuid.UUID],
+    ) -> list[uuid.UUID]:
+        """
+        Adds the branches of the paths that are not in the tree yet and returns the new tree nodes,
+        parents before children. prefix_to_treenode maps the states leading to a tree node to its
+        id and is updated, so the same tree can be expanded over several calls.
+        All paths are validated before the tree is changed.
+        """
         for path in paths:
             for k, state_id in enumerate(path):
                 issue = self.get_node_from_uuid(partial_order[k])
@@ -747,30 +900,41 @@ class DecisionTreeCreator_v3:
                         raise ValueError(f"Invalid path: state_id {state_id} not found in issue {partial_order[k]}")
                 else:
                     raise ValueError(f"Invalid path: issue {partial_order[k]} not found or not an IssueOutgoingDto")
-                
-                prefix = tuple(path[:k])
-                visit_key = (prefix, state_id)
-                if visit_key in visited_states:
+
+        new_treenode_ids: list[uuid.UUID] = []
+        for path in paths:
+            for k, state_id in enumerate(path):
+                branch = tuple(path[:k + 1])
+                if branch in prefix_to_treenode:
                     continue
-                else:
-                    visited_states.add(visit_key)
-                tail_id = prefix_to_treenode[prefix]
+                tail_id = prefix_to_treenode[tuple(path[:k])]
 
                 if k + 1 < len(partial_order):
                     # create a unique treenode per branch
                     head_id = self.copy_treenode(partial_order[k + 1])
                 else:
-                    head_id = self.create_endpoint_node(project_id)
+                    head_id = self.create_endpoint_node(self.project_id)
 
-                prefix_to_treenode[tuple(path[:k + 1])] = head_id
+                prefix_to_treenode[branch] = head_id
+                new_treenode_ids.append(head_id)
 
                 edge = EdgeUUIDDto(tail=tail_id, name=str(state_id), head=head_id)
                 decision_tree.add_edge(edge)
-        del visited_states
-        
-        self.find_nodes_for_utilities(partial_order)
-        decision_tree.transfer_node_treenode_lookup(self.node_treenode_lookup)
-        return decision_tree
+        return new_treenode_ids
+
+    def get_negligible_outcome_count(
+        self,
+        treenode_id: uuid.UUID,
+        path: set[str],
+        cumulative_probability: float,
+        probability_epsilon: float,
+    ) -> int:
+        node = self.get_node_from_uuid(treenode_id)
+        if not isinstance(node, IssueOutgoingDto):
+            return 0
+        return self.probability_lookup.get_negligible_outcome_count(
+            node, path, cumulative_probability, probability_epsilon
+        )
 
     def copy_treenode(self, treenode_id: uuid.UUID) -> uuid.UUID:
         node_id = self.node_treenode_lookup.get_dto_id_for_treenode_id(treenode_id)
@@ -787,10 +951,11 @@ class DecisionTreeCreator_v3:
         return treenode_id
 
     def find_nodes_for_utilities(self, partial_order: List[uuid.UUID]):
-        for treenode_id in self.nx.nodes:
+        graph = self.graph
+        for treenode_id in graph.node_ids:
             node = self.node_treenode_lookup.get_dto_for_treenode_id(treenode_id)
             if node.type == Type.UTILITY.value:
-                edges_with_same_head = [s for s, t in self.nx.in_edges(treenode_id)]
+                edges_with_same_head = graph.to_ids(graph.predecessors(graph.index[treenode_id]))
 
                 indices = {
                     elem: partial_order.index(elem)
@@ -0,0 +1,165 @@
+import uuid
+from typing import Optional
+from src.constants import Type
+from src.utils.generate_uuid import GenerateUuid
+from src.services.decision_tree.decision_tree_utils import keep_expanded_probabilities
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.discrete_probability_dtos import DiscreteProbabilityOutgoingDto
+from src.dtos.decision_tree_dtos import (
+    DecisionTreeDto,
+    EndPointNodeDto,
+    ProbabilityDto,
+    TreeNodeDto,
+    TreeNodeDto2,
+    UtilityDTDto,
+)
+
+
+class DecisionTreeDtoAdapter:
+    """
+    Converts a decision tree built by the v3 engine to the v2 DecisionTreeDto shape: the full
+    issue on every tree node, named probabilities and utilities, children in the order of the
+    options and outcomes, and ids derived from the "root - a - b" branch path.
+    """
+
+    ROOT = "root"
+    SEPARATOR = " - "
+
+    def __init__(self, project_id: uuid.UUID, issues: list[IssueOutgoingDto]) -> None:
+        self.project_id = project_id
+        self.issues = {issue.id: issue for issue in issues}
+        self.outcome_names: dict[str, str] = {}
+        # issue id -> [(parent state ids, discrete probability)] in the order of the issue
+        self.discrete_probabilities: dict[
+            uuid.UUID, list[tuple[frozenset[str], DiscreteProbabilityOutgoingDto]]
+        ] = {}
+        # issue id -> state id -> position of the option or outcome in the issue
+        self.state_positions: dict[uuid.UUID, dict[str, int]] = {}
+        for issue in issues:
+            states = []
+            if issue.decision is not None:
+                states = issue.decision.options
+            if issue.uncertainty is not None:
+                states = issue.uncertainty.outcomes
+                for outcome in issue.uncertainty.outcomes:
+                    self.outcome_names[str(outcome.id)] = outcome.name
+                self.discrete_probabilities[issue.id] = [
+                    (
+                        frozenset(str(x) for x in dto.parent_option_ids + dto.parent_outcome_ids),
+                        dto,
+                    )
+                    for dto in issue.uncertainty.discrete_probabilities
+                    if dto.probability is not None
+                ]
+            self.state_positions[issue.id] = {
+                str(state.id): position for position, state in enumerate(states)
+            }
+
+    def to_decision_tree_dto(self, root: Optional[TreeNodeDto2]) -> Optional[DecisionTreeDto]:
+        if root is None:
+            return None
+        root_node = self.create_tree_node(root, ())
+        stack = [(root, root_node, ())]
+        while stack:
+            node, tree_node, path = stack.pop()
+            children = self.get_ordered_children(node)
+            if not children:
+                continue
+            tree_node.children = []
+            for child in children:
+                child_path = path + (child.parent_state_id or "",)
+                child_node = self.create_tree_node(child, child_path)
+                tree_node.children.append(DecisionTreeDto(tree_node=child_node))
+                stack.append((child, child_node, child_path))
+        return DecisionTreeDto(tree_node=root_node)
+
+    def get_ordered_children(self, node: TreeNodeDto2) -> list[TreeNodeDto2]:
+        positions = self.state_positions.get(node.issue_id, {})
+        return sorted(
+            node.children or [], key=lambda x: positions.get(x.parent_state_id or "", len(positions))
+        )
+
+    def create_tree_node_id(self, path: tuple[str, ...]) -> uuid.UUID:
+        id_string = self.ROOT if not path else self.ROOT + self.SEPARATOR + self.SEPARATOR.join(path)
+        return GenerateUuid.as_uuid(id_string)
+
+    def create_tree_node(self, node: TreeNodeDto2, path: tuple[str, ...]) -> TreeNodeDto:
+        tree_node_id = self.create_tree_node_id(path)
+        if node.type == Type.END.value:
+            endpoint = EndPointNodeDto(
+                id=node.issue_id,
+                project_id=self.project_id,
+                value=node.endpoint_value or 0,
+                cumulative_probability=node.cumulative_probability or 0,
+            )
+            return TreeNodeDto(id=tree_node_id, issue=endpoint, probabilities=[], utilities=[])
+
+        issue = self.issues[node.issue_id]
+        probabilities = self.get_probabilities(issue, set(path))
+        utilities = self.get_utilities(issue, node)
+        expected_value = (
+            float(node.expected_value)
+            if node.children and node.expected_value is not None
+            else None
+        )
+
+        # outcomes skipped during expansion are removed, so they stay aligned with the children,
+        # and the probabilities are rescaled as in the v3 tree
+        expanded = {child.parent_state_id for child in node.children or []}
+        if (
+            issue.uncertainty is not None
+            and expanded
+            and len(expanded) < len(issue.uncertainty.outcomes)
+        ):
+            outcomes = [x for x in issue.uncertainty.outcomes if str(x.id) in expanded]
+            issue = issue.model_copy(
+                update={"uncertainty": issue.uncertainty.model_copy(update={"outcomes": outcomes})}
+            )
+            probabilities = keep_expanded_probabilities(probabilities, expanded)  # type: ignore
+
+        return TreeNodeDto(
+            id=tree_node_id,
+            expected_value=expected_value,
+            issue=issue,
+            probabilities=probabilities,
+            utilities=utilities,
+        )
+
+    def get_probabilities(self, issue: IssueOutgoingDto, path: set[str]) -> list[ProbabilityDto]:
+        if issue.type != Type.UNCERTAINTY.value:
+            return []
+        return [
+            ProbabilityDto(
+                outcome_name=self.outcome_names[str(dto.outcome_id)],
+                outcome_id=dto.outcome_id,
+                probability_value=dto.probability,  # type: ignore
+                discrete_probability_id=dto.id,
+            )
+            for parent_ids, dto in self.discrete_probabilities.get(issue.id, [])
+            if parent_ids <= path
+        ]
+
+    def get_utilities(self, issue: IssueOutgoingDto, node: TreeNodeDto2) -> list[UtilityDTDto]:
+        values = {
+            str(x.option_id if x.option_id is not None else x.outcome_id): x.utility_value
+            for x in node.utilities or []
+        }
+        if issue.type == Type.UNCERTAINTY.value and issue.uncertainty is not None:
+            return [
+                UtilityDTDto(
+                    outcome_name=outcome.name,
+                    outcome_id=outcome.id,
+                    utility_value=values.get(str(outcome.id), outcome.utility),
+                )
+                for outcome in issue.uncertainty.outcomes
+            ]
+        if issue.type == Type.DECISION.value and issue.decision is not None:
+            return [
+                UtilityDTDto(
+                    option_name=option.name,
+                    option_id=option.id,
+                    utility_value=values.get(str(option.id), option.utility),
+                )
+                for option in issue.decision.options
+            ]
+        return []
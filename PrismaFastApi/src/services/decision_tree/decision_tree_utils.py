@@ -1,8 +1,16 @@
 import uuid
-from typing import Dict, Optional, List
-from src.dtos.decision_tree_dtos import TreeNodeDto, EndPointNodeDto
+from typing import Dict, Iterable, Optional, List, Tuple, TypeVar
+from src.constants import Type
+from src.dtos.decision_tree_dtos import (
+    TreeNodeDto,
+    EndPointNodeDto,
+    ProbabilityDto,
+    ProbabilityDto2,
+)
 from src.dtos.issue_dtos import IssueOutgoingDto
 
+P = TypeVar("P", ProbabilityDto, ProbabilityDto2)
+
 
 # original id: id when treenode is created
 # updated id: fixed id created from name of branch elements for treenode
@@ -11,6 +19,7 @@ from src.dtos.issue_dtos import IssueOutgoingDto
 class TreeNodeLookup:
     def __init__(self):
         self.original_id_to_updated_id: Dict[uuid.UUID, uuid.UUID] = {}
+        self.updated_id_to_original_id: Dict[uuid.UUID, uuid.UUID] = {}
         self.original_id_to_node: Dict[uuid.UUID, TreeNodeDto] = {}
 
     def add_with_original_id(self, original_id: uuid.UUID, node: TreeNodeDto):
@@ -24,17 +33,18 @@ class TreeNodeLookup:
             raise KeyError("Original id must exist before setting updated id.")
         if updated_id == original_id:
             raise ValueError("Updated id must be different from original id.")
+        previous_updated_id = self.original_id_to_updated_id.get(original_id)
+        if previous_updated_id is not None:
+            del self.updated_id_to_original_id[previous_updated_id]
         self.original_id_to_updated_id[original_id] = updated_id
+        self.updated_id_to_original_id[updated_id] = original_id
         self.original_id_to_node[original_id] = updated_dto
 
     def get_node_by_original_id(self, id: uuid.UUID) -> Optional[TreeNodeDto]:
         return self.original_id_to_node.get(id)
 
     def get_original_id(self, id: uuid.UUID) -> Optional[uuid.UUID]:
-        for original_id, updated_id in self.original_id_to_updated_id.items():
-            if updated_id == id:
-                return original_id
-        return None
+        return self.updated_id_to_original_id.get(id)
 
     def get_list_of_nodes(self):
         return self.original_id_to_node.values()
@@ -46,6 +56,8 @@ class NodeTreeNodeLookup:
             {}
         )  # dto_id -> DTO instance
         self.treenode_id_to_node_id: Dict[uuid.UUID, uuid.UUID] = {}  # treenode_id -> dto_id
+        # dto_id -> treenode_ids, the canonical treenode of the dto first
+        self.node_id_to_treenode_ids: Dict[uuid.UUID, List[uuid.UUID]] = {}
 
         self.treenode_id_to_utility_id: Dict[uuid.UUID, uuid.UUID] = {}
 
@@ -59,11 +71,17 @@ class NodeTreeNodeLookup:
         self, node_dto: IssueOutgoingDto | EndPointNodeDto, treenode_id: uuid.UUID
     ):
         self.node_dtos[node_dto.id] = node_dto
-        self.treenode_id_to_node_id[treenode_id] = node_dto.id
+        self.associate_uuid(node_dto.id, treenode_id)
 
     def associate_uuid(self, node_id: uuid.UUID, treenode_id: uuid.UUID):
         # Add mapping in uuid_to_dto_id
+        previous_node_id = self.treenode_id_to_node_id.get(treenode_id)
+        if previous_node_id == node_id:
+            return
+        if previous_node_id is not None:
+            self.node_id_to_treenode_ids[previous_node_id].remove(treenode_id)
         self.treenode_id_to_node_id[treenode_id] = node_id
+        self.node_id_to_treenode_ids.setdefault(node_id, []).append(treenode_id)
 
     def get_node_dto(self, node_id: uuid.UUID) -> IssueOutgoingDto | EndPointNodeDto | None:
         return self.node_dtos.get(node_id)
@@ -84,5 +102,102 @@ class NodeTreeNodeLookup:
         return dtos
 
     def get_treenode_ids_for_dto(self, node_id: uuid.UUID) -> List[uuid.UUID]:
-        treenode_ids = [k for k, v in self.treenode_id_to_node_id.items() if v == node_id]
-        return treenode_ids
+        return list(self.node_id_to_treenode_ids.get(node_id, []))
+
+    def get_node_ids(self) -> List[uuid.UUID]:
+        """Ids of the dtos with at least one treenode."""
+        return [k for k, v in self.node_id_to_treenode_ids.items() if v]
+
+
+class DiscreteProbabilityLookup:
+    """
+    Conditional outcome probabilities of the uncertainty issues, used to skip impossible
+    branches while a decision tree is expanded. The probability of an outcome is the first
+    discrete probability whose parent states are all on the path, as in the tree DTOs.
+    """
+
+    def __init__(self, issues: Iterable[IssueOutgoingDto]):
+        # issue id -> outcome id -> [(parent state ids, probability)]
+        self.probabilities: Dict[uuid.UUID, Dict[str, List[Tuple[frozenset[str], float]]]] = {}
+        for issue in issues:
+            if issue.uncertainty is None:
+                continue
+            outcome_probabilities = self.probabilities.setdefault(issue.id, {})
+            for discrete_probability in issue.uncertainty.discrete_probabilities:
+                if discrete_probability.probability is None:
+                    continue
+                parent_ids = frozenset(
+                    str(x)
+                    for x in discrete_probability.parent_option_ids
+                    + discrete_probability.parent_outcome_ids
+                )
+                outcome_probabilities.setdefault(str(discrete_probability.outcome_id), []).append(
+                    (parent_ids, discrete_probability.probability)
+                )
+
+    def get_probability(self, issue_id: uuid.UUID, outcome_id: str, path: set[str]) -> float:
+        for parent_ids, probability in self.probabilities.get(issue_id, {}).get(outcome_id, []):
+            if parent_ids <= path:
+                return probability
+        return 0
+
+    def get_expandable_outcomes(
+        self,
+        issue: IssueOutgoingDto,
+        path: set[str],
+        cumulative_probability: float,
+        epsilon: float,
+    ) -> Dict[str, float]:
+        """
+        Returns the cumulative probability of each outcome worth expanding, outcomes where it is
+        zero or below epsilon are left out. If no probability is found, e.g. when they are not
+        filled in yet or depend on issues later in the tree, all outcomes are kept with the
+        cumulative probability of the node.
+        """
+        if issue.uncertainty is None:
+            return {}
+        probabilities = {
+            str(outcome.id): self.get_probability(issue.id, str(outcome.id), path)
+            for outcome in issue.uncertainty.outcomes
+        }
+        if not any(probabilities.values()):
+            return dict.fromkeys(probabilities, cumulative_probability)
+        cumulative_probabilities = {
+            outcome_id: cumulative_probability * probability
+            for outcome_id, probability in probabilities.items()
+        }
+        return {
+            outcome_id: probability
+            for outcome_id, probability in cumulative_probabilities.items()
+            if probability > 0 and probability >= epsilon
+        }
+
+    def get_negligible_outcome_count(
+        self,
+        issue: IssueOutgoingDto,
+        path: set[str],
+        cumulative_probability: float,
+        epsilon: float,
+    ) -> int:
+        """
+        The number of outcomes of an uncertainty where every outcome is below epsilon, zero when
+        any outcome is worth expanding. The tree ends before such an uncertainty.
+        """
+        if issue.type != Type.UNCERTAINTY.value or issue.uncertainty is None:
+            return 0
+        if self.get_expandable_outcomes(issue, path, cumulative_probability, epsilon):
+            return 0
+        return len(issue.uncertainty.outcomes)
+
+
+def keep_expanded_probabilities(probabilities: list[P], expanded_outcome_ids: set[str]) -> list[P]:
+    """
+    Probabilities of the expanded outcomes of a node where outcomes were skipped, rescaled to sum
+    to one so expected values and cumulative probabilities are taken over the expanded children.
+    """
+    kept = [p for p in probabilities if str(p.outcome_id) in expanded_outcome_ids]
+    total = sum(p.probability_value for p in kept)
+    if total > 0:
+        for probability in kept:
+            probability.probability_value /= total
+    return kept
@@ -0,0 +1,156 @@
+import math
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from src.config import config
+from src.constants import Type
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.dtos.decision_tree_dtos import TreeNodeDto2
+from src.services.decision_tree.decision_tree_creator_v3 import DecisionTreeCreator_v3
+
+# (states on the path from the root, parent dto, index of the subtree among its children)
+FrontierNode = tuple[tuple[str, ...], TreeNodeDto2, int]
+
+
+def build_subtree(
+    project_id: uuid.UUID,
+    issues: list[IssueOutgoingDto],
+    edges: list[EdgeOutgoingDto],
+    branch_prefix: tuple[str, ...],
+    probability_epsilon: float,
+) -> tuple[TreeNodeDto2, int]:
+    """
+    Builds, rolls back and converts the subtree below branch_prefix. Runs in a worker process,
+    so it only takes and returns picklable values.
+    """
+    creator = DecisionTreeCreator_v3.initialize(project_id=project_id, nodes=issues, edges=edges)
+    decision_tree = creator.convert_to_decision_tree(
+        project_id, probability_epsilon=probability_epsilon, branch_prefix=branch_prefix
+    )
+    node = decision_tree.to_issue_dtos()
+    for state_id in branch_prefix:
+        node = next(x for x in node.children or [] if x.parent_state_id == state_id)  # type: ignore
+    return node, decision_tree.skipped_node_count  # type: ignore
+
+
+class ParallelTreeBuilder:
+    """
+    Builds full v3 decision trees, splitting large trees on the states of the first one or two
+    issues of the partial order and building the subtrees in a process pool.
+
+    The top of the tree is built in this process, every subtree is built from the whole model
+    restricted to its branch, and the subtrees are put back in place by their path. Tree node
+    ids are derived from the branch path and the expected values of the top are rolled back
+    the same way as in one process, so the result is the same as a sequential build.
+    """
+
+    def __init__(
+        self,
+        processes: int = config.TREE_BUILD_PROCESSES,
+        min_leaves: int = config.TREE_BUILD_PARALLEL_MIN_LEAVES,
+    ) -> None:
+        self.processes = processes
+        self.min_leaves = min_leaves
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawned, forking a process that runs threads is not safe
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def build(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        probability_epsilon: float = config.TREE_PROBABILITY_EPSILON,
+    ) -> tuple[Optional[TreeNodeDto2], int]:
+        """Decision tree of the model and the number of tree branches skipped as impossible."""
+        creator = DecisionTreeCreator_v3.initialize(
+            project_id=project_id, nodes=issues, edges=edges
+        )
+        partial_order = creator.calculate_partial_order()
+        state_counts = [self._state_count(creator, x) for x in partial_order]
+        if (
+            self.processes <= 1
+            or len(partial_order) < 2
+            or math.prod(state_counts) < self.min_leaves
+        ):
+            decision_tree = creator.convert_to_decision_tree(
+                project_id, partial_order, probability_epsilon=probability_epsilon
+            )
+            return decision_tree.to_issue_dtos(), decision_tree.skipped_node_count
+
+        # split one level deeper when the root has fewer branches than there are processes
+        split_depth = 1 if state_counts[0] >= self.processes or len(partial_order) < 3 else 2
+        top = creator.convert_to_decision_tree(
+            project_id,
+            partial_order,
+            probability_epsilon=probability_epsilon,
+            max_depth=split_depth,
+        )
+        root = top.to_issue_dtos_without_values()
+        if root is None:
+            return None, top.skipped_node_count
+
+        frontier = self._find_frontier(root, split_depth)
+        executor = self.get_executor()
+        futures = [
+            executor.submit(
+                build_subtree, project_id, issues, edges, prefix, probability_epsilon
+            )
+            for prefix, _, _ in frontier
+        ]
+        skipped_node_count = top.skipped_node_count
+        for (_, parent, index), future in zip(frontier, futures):
+            subtree, subtree_skipped_node_count = future.result()
+            parent.children[index] = subtree  # type: ignore
+            skipped_node_count += subtree_skipped_node_count
+
+        top.compute_expected_values(root.id, self._get_top_dto_map(root, split_depth))
+        return root, skipped_node_count
+
+    def _state_count(self, creator: DecisionTreeCreator_v3, treenode_id: uuid.UUID) -> int:
+        node = creator.get_node_from_uuid(treenode_id)
+        if isinstance(node, IssueOutgoingDto):
+            if node.type == Type.DECISION.value and node.decision is not None:
+                return len(node.decision.options)
+            if node.type == Type.UNCERTAINTY.value and node.uncertainty is not None:
+                return len(node.uncertainty.outcomes)
+        return 1
+
+    def _find_frontier(self, root: TreeNodeDto2, split_depth: int) -> list[FrontierNode]:
+        frontier: list[FrontierNode] = []
+        stack: list[tuple[TreeNodeDto2, tuple[str, ...]]] = [(root, ())]
+        while stack:
+            node, prefix = stack.pop()
+            for index, child in enumerate(node.children or []):
+                child_prefix = prefix + (child.parent_state_id or "",)
+                if len(child_prefix) == split_depth:
+                    frontier.append((child_prefix, node, index))
+                else:
+                    stack.append((child, child_prefix))
+        return frontier
+
+    def _get_top_dto_map(
+        self, root: TreeNodeDto2, split_depth: int
+    ) -> dict[uuid.UUID, TreeNodeDto2]:
+        """The tree nodes above the subtrees, by id."""
+        dto_map: dict[uuid.UUID, TreeNodeDto2] = {}
+        stack: list[tuple[TreeNodeDto2, int]] = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            dto_map[node.id] = node
+            if depth + 1 < split_depth:
+                stack.extend((child, depth + 1) for child in node.children or [])
+        return dto_map
@@ -0,0 +1,93 @@
+import uuid
+from typing import Dict, Optional, Tuple
+from src.constants import Type
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.decision_tree_dtos import TreeNodeDto2
+from src.services.pyagrum_solver import PyagrumSolver
+from src.services.decision_tree.decision_tree_creator_v3 import DecisionTreeCreator_v3
+from src.utils.visit_tree_node_and_populate import populate_tree_node
+
+
+class PartialDecisionTree:
+    """
+    Partial decision tree of a solved model that is expanded path by path.
+    The tree creator, the tree graph and the populated tree node dtos are kept between expansions,
+    so an expansion only builds and populates the tree nodes below the new paths.
+    """
+
+    def __init__(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        solver: PyagrumSolver,
+        solution: SolutionDto,
+    ) -> None:
+        self.creator = DecisionTreeCreator_v3.initialize(project_id, nodes=issues, edges=edges)
+        self.partial_order = self.creator.calculate_partial_order()
+        self.partial_order_issue_ids: list[uuid.UUID] = [
+            issue_id
+            for issue_id in (
+                self.creator.node_treenode_lookup.get_dto_id_for_treenode_id(treenode_id)
+                for treenode_id in self.partial_order
+            )
+            if issue_id is not None
+        ]
+        self.graph = self.creator.convert_to_decision_tree_partial(
+            project_id=project_id, partial_order=self.partial_order
+        )
+        self.graph.populate_utility_lookup()
+        self.solver = solver
+        self.optimal_option_lookup = solution.get_lookup()
+        self.prefix_to_treenode: Dict[Tuple[uuid.UUID, ...], uuid.UUID] = {(): self.graph.root}
+        # states leading to each tree node, the dtos and the probability of reaching the node
+        self.paths: Dict[uuid.UUID, list[str]] = {self.graph.root: []}
+        self.dto_map: Dict[uuid.UUID, TreeNodeDto2] = {}
+        self.cumulative_probabilities: Dict[uuid.UUID, float] = {}
+
+    def expand(self, paths: list[list[uuid.UUID]]) -> list[uuid.UUID]:
+        """Adds the paths to the tree and returns the new tree nodes, parents before children."""
+        new_treenode_ids = self.creator.add_paths_to_decision_tree(
+            self.graph, self.partial_order, paths, self.prefix_to_treenode
+        )
+        if not self.dto_map:
+            new_treenode_ids.insert(0, self.graph.root)
+
+        # children are attached before any node is populated, as in a tree built at once
+        for treenode_id in new_treenode_ids:
+            dto = self.graph.create_dto(treenode_id)
+            if dto is None:
+                raise ValueError("Failed to create partial decision tree from DTOs")
+            self.dto_map[treenode_id] = dto
+            parent_id = self.graph.get_parent(treenode_id)
+            if parent_id is not None:
+                self.paths[treenode_id] = self.paths[parent_id] + [str(dto.parent_state_id)]
+                parent = self.dto_map[parent_id]
+                parent.children = sorted(
+                    [*(parent.children or []), dto], key=lambda x: x.parent_state_id or ""
+                )
+            if dto.type == Type.END.value:
+                dto.endpoint_value, dto.cumulative_probability = (
+                    self.graph.calculate_endpoint_value(treenode_id, self.dto_map)
+                )
+            dto.id = self.graph.get_or_create_treenode_new_id(treenode_id)
+
+        for treenode_id in new_treenode_ids:
+            parent_id = self.graph.get_parent(treenode_id)
+            self.cumulative_probabilities[treenode_id] = populate_tree_node(
+                self.solver,
+                self.dto_map[treenode_id],
+                self.paths[treenode_id],
+                parent=self.get_parent_dto(treenode_id),
+                cumulative_probability=(
+                    self.cumulative_probabilities[parent_id] if parent_id is not None else 1.0
+                ),
+                optimal_option_lookup=self.optimal_option_lookup,
+            )
+        return new_treenode_ids
+
+    def get_parent_dto(self, treenode_id: uuid.UUID) -> Optional[TreeNodeDto2]:
+        parent_id = self.graph.get_parent(treenode_id)
+        return self.dto_map[parent_id] if parent_id is not None else None
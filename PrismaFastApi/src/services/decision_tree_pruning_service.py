@@ -1,10 +1,11 @@
 import uuid
 from abc import ABC, abstractmethod
 from typing import Optional, Set
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from src.constants import Type
 from src.services.pyagrum_solver import SolutionDto, OptimalOption
+from src.domain.policy_table import PolicyTable
 from src.services.decision_tree.decision_tree_creator import (
     DecisionTreeDto,
     EndPointNodeDto,
@@ -20,19 +21,30 @@ class PruningContext:
 
     current_path: Set[uuid.UUID]
     solution: SolutionDto
+    policy_table: PolicyTable = field(init=False)
+    # issue id -> state on the current path, for the issues the policies depend on
+    current_issue_states: dict[uuid.UUID, uuid.UUID] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.policy_table = PolicyTable(self.solution.get_all_optimal_decisions())
 
     def add_to_path(self, node_id: uuid.UUID) -> None:
         """Add a node to the current path."""
         self.current_path.add(node_id)
+        issue_id = self.policy_table.state_issue_ids.get(node_id)
+        if issue_id is not None:
+            self.current_issue_states[issue_id] = node_id
 
     def remove_from_path(self, node_id: uuid.UUID) -> None:
         """Remove a node from the current path."""
         self.current_path.discard(node_id)
+        issue_id = self.policy_table.state_issue_ids.get(node_id)
+        if issue_id is not None and self.current_issue_states.get(issue_id) == node_id:
+            del self.current_issue_states[issue_id]
 
-    def is_parent_valid(self, decision: OptimalOption) -> bool:
-        """Check if all parent states are in the current path."""
-        parent_ids = {state.state.id for state in decision.parent_states}
-        return parent_ids.issubset(self.current_path)
+    def get_optimal_option(self, decision_id: uuid.UUID) -> Optional[OptimalOption]:
+        """Optimal option of the decision given the current path."""
+        return self.policy_table.get_optimal_option(decision_id, self.current_issue_states)
 
 
 class TreePruner(ABC):
@@ -99,8 +111,7 @@ class OptimalDecisionTreePruner(TreePruner):
         ):
             raise DecisionTreePruningException("Invalid decision node visited")
 
-        optimal_decisions = context.solution.get_all_optimal_decisions()
-        optimal_decision = self._find_optimal_decision(node, optimal_decisions, context)
+        optimal_decision = context.get_optimal_option(node.tree_node.issue.id)
 
         if optimal_decision is None:
             raise DecisionTreePruningException(
@@ -150,17 +161,6 @@ class OptimalDecisionTreePruner(TreePruner):
 
         return node
 
-    def _find_optimal_decision(
-        self, node: DecisionTreeDto, optimal_decisions: list[OptimalOption], context: PruningContext
-    ) -> Optional[OptimalOption]:
-        """Find the optimal decision for the current node given the current path."""
-        for decision in optimal_decisions:
-            if decision.decision_id == node.tree_node.issue.id and context.is_parent_valid(
-                decision
-            ):
-                return decision
-        return None
-
     def _find_option_index(self, node: DecisionTreeDto, decision_state_id: uuid.UUID) -> int:
         """Find the index of the optimal option in the node's options list."""
         if isinstance(node.tree_node.issue, EndPointNodeDto) or not node.tree_node.issue.decision:
@@ -185,13 +185,16 @@ class OptimalDecisionTreePruner(TreePruner):
         ):
             raise DecisionTreePruningException("Invalid decision node visited")
 
-        node.tree_node.children = [node.tree_node.children[option_index]]
+        # trees built from the solution only have the optimal branch
+        if len(node.tree_node.children) > 1:
+            node.tree_node.children = [node.tree_node.children[option_index]]
 
-        node.tree_node.issue.decision.options = [
-            option
-            for option in node.tree_node.issue.decision.options
-            if option.id == decision_state_id
-        ]
+        # the issue can be shared between tree nodes, so it is replaced instead of modified
+        issue = node.tree_node.issue
+        options = [option for option in issue.decision.options if option.id == decision_state_id]
+        node.tree_node.issue = issue.model_copy(
+            update={"decision": issue.decision.model_copy(update={"options": options})}
+        )
 
     @staticmethod
     def _align_probabilities_with_outcomes(node: DecisionTreeDto) -> None:
@@ -238,7 +241,15 @@ class OptimalDecisionTreePruner(TreePruner):
         for child, prob, outcome in items_to_remove:
             node.tree_node.children.remove(child)
             node.tree_node.probabilities.remove(prob)
-            node.tree_node.issue.uncertainty.outcomes.remove(outcome)
+        if items_to_remove:
+            issue = node.tree_node.issue
+            removed_ids = {outcome.id for _, _, outcome in items_to_remove}
+            outcomes = [
+                outcome for outcome in issue.uncertainty.outcomes if outcome.id not in removed_ids
+            ]
+            node.tree_node.issue = issue.model_copy(
+                update={"uncertainty": issue.uncertainty.model_copy(update={"outcomes": outcomes})}
+            )
 
 
 class DecisionTreePruningService:
@@ -316,8 +327,7 @@ class OptimalDecisionTreePrunerOld(TreePrunerOld):
         ):
             raise DecisionTreePruningException("Invalid decision node visited")
 
-        optimal_decisions = context.solution.get_all_optimal_decisions()
-        optimal_decision = self._find_optimal_decision(node, optimal_decisions, context)
+        optimal_decision = context.get_optimal_option(node.tree_node.issue.id)
 
         if optimal_decision is None:
             raise DecisionTreePruningException(
@@ -365,20 +375,6 @@ class OptimalDecisionTreePrunerOld(TreePrunerOld):
 
         return node
 
-    def _find_optimal_decision(
-        self,
-        node: DecisionTreeDtoOld,
-        optimal_decisions: list[OptimalOption],
-        context: PruningContext,
-    ) -> Optional[OptimalOption]:
-        """Find the optimal decision for the current node given the current path."""
-        for decision in optimal_decisions:
-            if decision.decision_id == node.tree_node.issue.id and context.is_parent_valid(
-                decision
-            ):
-                return decision
-        return None
-
     def _find_option_index(self, node: DecisionTreeDtoOld, decision_state_id: uuid.UUID) -> int:
         """Find the index of the optimal option in the node's options list."""
         if isinstance(node.tree_node.issue, EndPointNodeDto) or not node.tree_node.issue.decision:
@@ -403,13 +399,16 @@ class OptimalDecisionTreePrunerOld(TreePrunerOld):
         ):
             raise DecisionTreePruningException("Invalid decision node visited")
 
-        node.children = [node.children[option_index]]
+        # trees built from the solution only have the optimal branch
+        if len(node.children) > 1:
+            node.children = [node.children[option_index]]
 
-        node.tree_node.issue.decision.options = [
-            option
-            for option in node.tree_node.issue.decision.options
-            if option.id == decision_state_id
-        ]
+        # the issue can be shared between tree nodes, so it is replaced instead of modified
+        issue = node.tree_node.issue
+        options = [option for option in issue.decision.options if option.id == decision_state_id]
+        node.tree_node.issue = issue.model_copy(
+            update={"decision": issue.decision.model_copy(update={"options": options})}
+        )
 
     @staticmethod
     def _align_probabilities_with_outcomes(node: DecisionTreeDtoOld) -> None:
@@ -454,7 +453,15 @@ class OptimalDecisionTreePrunerOld(TreePrunerOld):
         for child, prob, outcome in items_to_remove:
             node.children.remove(child)
             node.tree_node.probabilities.remove(prob)
-            node.tree_node.issue.uncertainty.outcomes.remove(outcome)
+        if items_to_remove:
+            issue = node.tree_node.issue
+            removed_ids = {outcome.id for _, _, outcome in items_to_remove}
+            outcomes = [
+                outcome for outcome in issue.uncertainty.outcomes if outcome.id not in removed_ids
+            ]
+            node.tree_node.issue = issue.model_copy(
+                update={"uncertainty": issue.uncertainty.model_copy(update={"outcomes": outcomes})}
+            )
 
 
 class DecisionTreePruningServiceOld:
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+from fastapi import Response
+from src.config import config
+from src.constants import JobStatus, JobType
+from src.logger import get_dot_api_logger
+from src.dtos.job_dtos import JobDto
+from src.services.decision_tree_pruning_service import DecisionTreePruningException
+from src.utils.timed_cache import TimedLruCache
+
+logger = get_dot_api_logger()
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class Job:
+    """A submitted computation, with its progress and, once it succeeded, the response body."""
+
+    def __init__(
+        self, job_key: str, project_id: uuid.UUID, job_type: JobType, total_steps: int = 1
+    ) -> None:
+        self.job_id = uuid.uuid4()
+        self.job_key = job_key
+        self.project_id = project_id
+        self.job_type = job_type
+        self.status = JobStatus.QUEUED
+        self.completed_steps = 0
+        self.total_steps = total_steps
+        self.error: Optional[str] = None
+        # the status code the synchronous routes return for the error
+        self.error_status_code = 400
+        self.body: Optional[bytes] = None
+        self.headers: dict[str, str] = {}
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.cancelled = threading.Event()
+        self.future: Optional[Future[None]] = None
+
+    def complete_step(self) -> None:
+        """Counts a finished step, and stops the job here if it was cancelled."""
+        self.completed_steps += 1
+        if self.cancelled.is_set():
+            raise JobCancelledError()
+
+    def finish(self, status: JobStatus) -> None:
+        self.status = status
+        self.finished_at = datetime.now(timezone.utc)
+
+    def to_dto(self) -> JobDto:
+        return JobDto(
+            job_id=self.job_id,
+            project_id=self.project_id,
+            job_type=self.job_type,
+            status=self.status,
+            completed_steps=self.completed_steps,
+            total_steps=self.total_steps,
+            error=self.error,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+        )
+
+
+class JobManager:
+    """
+    Runs long computations in worker threads, each job on its own event loop, and keeps the jobs
+    and their results until they have not been used for `seconds`. A job submitted again while
+    the same one is queued, running or succeeded, e.g. by a retried request, is not started again.
+
+    A cancelled job is stopped before it starts or at its next step, a running tree build is
+    finished first and its result dropped.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config.JOB_WORKERS,
+        seconds: int = config.JOB_TTL_SECONDS,
+        maxsize: int = config.JOB_MAX_COUNT,
+    ) -> None:
+        self.max_workers = max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # queued and running jobs are kept until they finish
+        self.jobs: TimedLruCache[uuid.UUID, Job] = TimedLruCache(
+            seconds=seconds,
+            maxsize=maxsize,
+            is_pinned=lambda job: job.status not in FINISHED_STATUSES,
+        )
+        # job key -> id of the latest job for it
+        self.job_ids: TimedLruCache[str, uuid.UUID] = TimedLruCache(
+            seconds=seconds, maxsize=maxsize
+        )
+        self._lock = threading.Lock()
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="job"
+            )
+        return self.executor
+
+    def submit(
+        self,
+        job_key: str,
+        project_id: uuid.UUID,
+        job_type: JobType,
+        work: Callable[[Job], Awaitable[Response]],
+        total_steps: int = 1,
+    ) -> Job:
+        with self._lock:
+            job_id = self.job_ids.get(job_key)
+            job = self.jobs.get(job_id) if job_id is not None else None
+            if job is not None and job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+                return job
+            job = Job(job_key, project_id, job_type, total_steps)
+            self.jobs.set(job.job_id, job)
+            self.job_ids.set(job_key, job.job_id)
+            job.future = self.get_executor().submit(self.run, job, work)
+            return job
+
+    def get_job(self, job_id: uuid.UUID) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job: Job) -> None:
+        with self._lock:
+            if job.status in FINISHED_STATUSES:
+                return
+            job.cancelled.set()
+            if job.future is not None:
+                job.future.cancel()
+            job.finish(JobStatus.CANCELLED)
+
+    def run(self, job: Job, work: Callable[[Job], Awaitable[Response]]) -> None:
+        # a job cancelled before it starts stays cancelled
+        with self._lock:
+            if job.cancelled.is_set():
+                return
+            job.status = JobStatus.RUNNING
+        try:
+            response = asyncio.run(work(job))
+        except JobCancelledError:
+            job.finish(JobStatus.CANCELLED)
+            return
+        except (ValueError, DecisionTreePruningException) as exc:
+            logger.error(f"Job {job.job_id} failed: {exc}")
+            self.fail(job, str(exc), 400)
+            return
+        except Exception as exc:
+            logger.error(f"Job {job.job_id} failed with an unhandled exception: {exc}")
+            self.fail(job, "Internal server error", 500)
+            return
+        # the result of a job cancelled while running is dropped, checked under the lock so a
+        # concurrent cancel is not overwritten
+        with self._lock:
+            if not job.cancelled.is_set():
+                job.body = bytes(response.body)
+                job.headers = dict(response.headers)
+                job.completed_steps = job.total_steps
+                job.finish(JobStatus.SUCCEEDED)
+
+    def fail(self, job: Job, error: str, status_code: int) -> None:
+        with self._lock:
+            if not job.cancelled.is_set():
+                job.error = error
+                job.error_status_code = status_code
+                job.finish(JobStatus.FAILED)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+import math
+import numpy as np
+import pyagrum as gum  # type: ignore
+from typing import Optional
+from src.config import config
+from src.constants import Type
+
+# tolerance for accepting a conditional probability table as normalized
+NORMALIZATION_TOLERANCE = 1e-9
+
+
+class JointTableEngine:
+    """
+    Answers path queries for the decision tree from tensors over the partial order variables.
+
+    The joint probability of the chance variables and the probability weighted utility are
+    built once, with one axis per variable in partial order. Rolling back the last axis, summing
+    chance variables and maximizing over decisions, gives for every prefix of the partial order
+    the probability of the prefix and the expected utility under the optimal policy.
+    A path query is then a single lookup instead of a new inference run.
+
+    Only paths that are prefixes of the partial order can be answered, other queries return None
+    and are left to the LIMID inference.
+    """
+
+    def __init__(
+        self,
+        variable_names: list[str],
+        variable_types: list[str],
+        variable_labels: list[list[str]],
+        joint_probability: np.ndarray,
+        weighted_utility: np.ndarray,
+    ) -> None:
+        self.variable_names = variable_names
+        self.variable_axis = {name: axis for axis, name in enumerate(variable_names)}
+        self.variable_types = variable_types
+        self.variable_labels = variable_labels
+        # state id -> (axis, state index)
+        self.state_lookup = {
+            label: (axis, index)
+            for axis, labels in enumerate(variable_labels)
+            for index, label in enumerate(labels)
+        }
+        # probability_tables[k] and utility_tables[k] are indexed by the first k variables
+        self.probability_tables: list[np.ndarray] = [joint_probability]
+        self.utility_tables: list[np.ndarray] = [weighted_utility]
+        self._roll_back()
+
+    def _roll_back(self) -> None:
+        probability = self.probability_tables[0]
+        utility = self.utility_tables[0]
+        for variable_type in reversed(self.variable_types):
+            if variable_type == Type.DECISION.value:
+                # the chance variables before a decision do not depend on it,
+                # so any slice of the probability over the decision axis is the same
+                utility = utility.max(axis=-1)
+                probability = probability[..., 0]
+            else:
+                utility = utility.sum(axis=-1)
+                probability = probability.sum(axis=-1)
+            self.probability_tables.append(probability)
+            self.utility_tables.append(utility)
+        self.probability_tables.reverse()
+        self.utility_tables.reverse()
+
+    @staticmethod
+    def estimate_cell_count(diagram: gum.InfluenceDiagram, variable_names: list[str]) -> int:
+        return math.prod(diagram.variableFromName(name).domainSize() for name in variable_names)  # type: ignore
+
+    @classmethod
+    def create_if_fits(
+        cls,
+        diagram: gum.InfluenceDiagram,
+        variable_names: list[str],
+        max_cells: int = config.JOINT_TABLE_MAX_CELLS,
+    ) -> Optional[JointTableEngine]:
+        """
+        Returns an engine for the diagram when the joint table over the partial order has at most
+        `max_cells` cells, and None when the tables do not fit or the model is not supported.
+        """
+        chance_and_decision_names = {
+            diagram.variable(node_id).name()  # type: ignore
+            for node_id in diagram.nodes()  # type: ignore
+            if not diagram.isUtilityNode(node_id)  # type: ignore
+        }
+        if set(variable_names) != chance_and_decision_names or len(variable_names) != len(
+            chance_and_decision_names
+        ):
+            return None
+        if cls.estimate_cell_count(diagram, variable_names) > max_cells:
+            return None
+
+        variable_axis = {name: axis for axis, name in enumerate(variable_names)}
+        shape = tuple(diagram.variableFromName(name).domainSize() for name in variable_names)  # type: ignore
+        variable_types: list[str] = []
+        variable_labels: list[list[str]] = []
+        joint_probability = np.ones(shape)
+        weighted_utility = np.zeros(shape)
+
+        for name in variable_names:
+            node_id = diagram.idFromName(name)  # type: ignore
+            variable_labels.append(list(diagram.variable(node_id).labels()))  # type: ignore
+            if diagram.isDecisionNode(node_id):  # type: ignore
+                variable_types.append(Type.DECISION.value)
+                continue
+            variable_types.append(Type.UNCERTAINTY.value)
+            cpt = diagram.cpt(node_id)  # type: ignore
+            if not np.allclose(
+                cpt.sumOut([name]).toarray(), 1.0, atol=NORMALIZATION_TOLERANCE  # type: ignore
+            ):
+                return None
+            joint_probability = joint_probability * cls._broadcast(cpt, variable_axis, shape)
+
+        for node_id in diagram.nodes():  # type: ignore
+            if diagram.isUtilityNode(node_id):  # type: ignore
+                utility_name = diagram.variable(node_id).name()  # type: ignore
+                utility_table = diagram.utility(node_id).sumOut([utility_name])  # type: ignore
+                weighted_utility = weighted_utility + cls._broadcast(
+                    utility_table, variable_axis, shape
+                )
+
+        return cls(
+            variable_names,
+            variable_types,
+            variable_labels,
+            joint_probability,
+            joint_probability * weighted_utility,
+        )
+
+    @staticmethod
+    def _broadcast(
+        tensor: gum.Tensor, variable_axis: dict[str, int], shape: tuple[int, ...]
+    ) -> np.ndarray:
+        # the first variable of a pyagrum tensor is the last axis of its array
+        names = [variable.name() for variable in reversed(tensor.variablesSequence())]  # type: ignore
+        array = np.asarray(tensor.toarray(), dtype=float)  # type: ignore
+        axes = [variable_axis[name] for name in names]
+        array = np.transpose(array, np.argsort(axes))
+        expanded_shape = [1] * len(shape)
+        for axis in axes:
+            expanded_shape[axis] = shape[axis]
+        return array.reshape(expanded_shape)
+
+    def _get_prefix_index(self, state_ids: list[str]) -> Optional[tuple[int, ...]]:
+        indices: dict[int, int] = {}
+        for state_id in state_ids:
+            state = self.state_lookup.get(state_id)
+            if state is None or state[0] in indices:
+                return None
+            indices[state[0]] = state[1]
+        if sorted(indices) != list(range(len(indices))):
+            return None
+        return tuple(indices[axis] for axis in range(len(indices)))
+
+    def get_expected_utility_given_path(self, issue_id: str, state_ids: list[str]) -> Optional[float]:
+        if issue_id not in self.variable_axis:
+            return None
+        index = self._get_prefix_index(state_ids)
+        if index is None:
+            return None
+        probability = float(self.probability_tables[len(index)][index])
+        if probability <= 0:
+            # impossible path, the LIMID inference gives nan as well
+            return math.nan
+        return float(self.utility_tables[len(index)][index]) / probability
+
+    def get_posterior_given_path(
+        self, issue_id: str, state_ids: list[str]
+    ) -> Optional[dict[str, float]]:
+        """Posterior of the variable directly following the path in the partial order."""
+        axis = self.variable_axis.get(issue_id)
+        index = self._get_prefix_index(state_ids)
+        if axis is None or index is None or axis != len(index):
+            return None
+        if self.variable_types[axis] != Type.UNCERTAINTY.value:
+            return None
+        probability = float(self.probability_tables[axis][index])
+        if probability <= 0:
+            return {label: math.nan for label in self.variable_labels[axis]}
+        probabilities = self.probability_tables[axis + 1][index] / probability
+        return {
+            label: float(value)
+            for label, value in zip(self.variable_labels[axis], probabilities.tolist())
+        }
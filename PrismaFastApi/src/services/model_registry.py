@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+from typing import Optional
+from src.config import config
+from src.domain.compact_model import ModelDtos
+from src.services.pyagrum_solver import PyagrumSolver
+from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.decision_tree_dtos import PartialOrderDto
+from src.dtos.model_handle_dtos import ModelHandleDto
+from src.services.structure_service import StructureService
+from src.utils.model_fingerprint import get_model_fingerprint
+from src.utils.timed_cache import TimedLruCache
+
+
+class CompiledModel:
+    """
+    A model parsed once, with the solved inference engine and the partial order built on first
+    use and reused by every later operation on it. The inference engine holds the evidence of
+    the last query, so operations using the solver must hold the lock.
+    """
+
+    def __init__(
+        self, project_id: uuid.UUID, model_dtos: ModelDtos, model_id: Optional[uuid.UUID] = None
+    ) -> None:
+        self.model_id = model_id if model_id is not None else uuid.uuid4()
+        self.project_id = project_id
+        self.issues = model_dtos.issues
+        self.edges = model_dtos.edges
+        self.model_fingerprint = get_model_fingerprint(self.issues, self.edges)
+        self.lock = asyncio.Lock()
+        self.solver: Optional[PyagrumSolver] = None
+        self.solution: Optional[SolutionDto] = None
+        self.partial_order: Optional[PartialOrderDto] = None
+
+    async def get_solver(self) -> PyagrumSolver:
+        """The solver of the model, solved on the first call."""
+        if self.solver is None:
+            if not self.issues:
+                raise ValueError("issues must be provided and non-empty")
+            solver = PyagrumSolver()
+            self.solution = await solver.find_optimal_decisions(
+                issues=self.issues, edges=self.edges
+            )
+            self.solver = solver
+        return self.solver
+
+    async def get_solution(self) -> SolutionDto:
+        await self.get_solver()
+        assert self.solution is not None
+        return self.solution
+
+    async def get_partial_order(self, structure_service: StructureService) -> PartialOrderDto:
+        if self.partial_order is None:
+            self.partial_order = await structure_service.create_partial_order_from_dtos(
+                self.project_id, self.issues, self.edges
+            )
+        assert self.partial_order is not None
+        return self.partial_order
+
+
+class ModelRegistry:
+    """Compiled models keyed by their handle, bounded in count and lifetime since last use."""
+
+    def __init__(
+        self,
+        seconds: int = config.MODEL_REGISTRY_TTL_SECONDS,
+        maxsize: int = config.MODEL_REGISTRY_MAX_COUNT,
+    ) -> None:
+        self.models: TimedLruCache[uuid.UUID, CompiledModel] = TimedLruCache(
+            seconds=seconds, maxsize=maxsize
+        )
+
+    def register(self, project_id: uuid.UUID, model_dtos: ModelDtos) -> ModelHandleDto:
+        model = CompiledModel(project_id, model_dtos)
+        self.models.set(model.model_id, model)
+        return ModelHandleDto(
+            model_id=model.model_id,
+            project_id=project_id,
+            model_fingerprint=model.model_fingerprint,
+            expires_in_seconds=self.models.lifetime,
+        )
+
+    def get_model(self, model_id: uuid.UUID) -> Optional[CompiledModel]:
+        return self.models.get(model_id)
+
+    def remove_model(self, model_id: uuid.UUID) -> None:
+        self.models.pop(model_id)
@@ -0,0 +1,140 @@
+import threading
+import uuid
+from typing import Optional
+from src.config import config
+from src.constants import Type
+from src.services.pyagrum_solver import PyagrumSolver
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.decision_tree_dtos import TreeNodeDto2, TreeNodeIncrementDto
+from src.services.decision_tree.partial_decision_tree import PartialDecisionTree
+from src.utils.timed_cache import TimedLruCache
+
+
+class PartialTreeSession:
+    """
+    Server side state of a partial decision tree that is expanded step by step.
+    The solved model is kept together with the partial tree built so far, so only the newly
+    added tree nodes need to be built, populated and returned.
+    """
+
+    def __init__(
+        self,
+        project_id: uuid.UUID,
+        model_fingerprint: str,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        solver: PyagrumSolver,
+        solution: SolutionDto,
+    ) -> None:
+        self.project_id = project_id
+        self.model_fingerprint = model_fingerprint
+        self.issues = issues
+        self.edges = edges
+        self.solver = solver
+        self.solution = solution
+        # the solver is shared with the speculative expansion running in a worker thread
+        self.solver_lock = threading.Lock()
+        self.issue_lookup = {issue.id: issue for issue in issues}
+        self.tree = PartialDecisionTree(project_id, issues, edges, solver, solution)
+        self.partial_order_issue_ids = self.tree.partial_order_issue_ids
+        # (issue id, issue type, path) of the nodes the next expansion of a leaf would add
+        self.frontier_by_treenode: dict[uuid.UUID, list[tuple[str, str, list[str]]]] = {}
+
+    @property
+    def frontier(self) -> list[tuple[str, str, list[str]]]:
+        return [entry for entries in self.frontier_by_treenode.values() for entry in entries]
+
+    def reset(self) -> None:
+        """Forget the expanded paths, the solved model and its cached queries are kept."""
+        self.tree = PartialDecisionTree(
+            self.project_id, self.issues, self.edges, self.solver, self.solution
+        )
+        self.frontier_by_treenode = {}
+
+    def expand(self, paths: list[list[uuid.UUID]]) -> list[TreeNodeIncrementDto]:
+        """Adds the paths to the tree and returns the tree nodes not sent before."""
+        new_nodes: list[TreeNodeIncrementDto] = []
+        optimal_option_lookup = self.solution.get_lookup()
+        for treenode_id in self.tree.expand(paths):
+            node = self.tree.dto_map[treenode_id]
+            parent = self.tree.get_parent_dto(treenode_id)
+            parent_id = self.tree.graph.get_parent(treenode_id)
+            if parent_id is not None:
+                self.frontier_by_treenode.pop(parent_id, None)
+            self.update_frontier(
+                treenode_id, node, self.tree.paths[treenode_id], optimal_option_lookup
+            )
+            new_nodes.append(
+                TreeNodeIncrementDto(
+                    **node.model_dump(exclude={"children"}),
+                    parent_id=parent.id if parent is not None else None,
+                )
+            )
+        return new_nodes
+
+    def update_frontier(
+        self,
+        treenode_id: uuid.UUID,
+        node: TreeNodeDto2,
+        path: list[str],
+        optimal_option_lookup: dict[str, dict[tuple[str, ...], str]],
+    ) -> None:
+        """
+        Stores the issue and path of each child an expansion of the new leaf would create.
+        End nodes have none, and decisions only get the optimal child, as in the filtered paths.
+        """
+        if node.type == Type.END.value or node.issue_id not in self.partial_order_issue_ids:
+            return
+        index = self.partial_order_issue_ids.index(node.issue_id)
+        if index + 1 >= len(self.partial_order_issue_ids):
+            return  # children are end nodes which need no queries
+        next_issue = self.issue_lookup[self.partial_order_issue_ids[index + 1]]
+        self.frontier_by_treenode[treenode_id] = [
+            (str(next_issue.id), next_issue.type, path + [state_id])
+            for state_id in self._get_expandable_state_ids(node, path, optimal_option_lookup)
+        ]
+
+    def _get_expandable_state_ids(
+        self,
+        node: TreeNodeDto2,
+        path: list[str],
+        optimal_option_lookup: dict[str, dict[tuple[str, ...], str]],
+    ) -> list[str]:
+        issue = self.issue_lookup[node.issue_id]
+        if issue.type == Type.DECISION.value and issue.decision is not None:
+            path_set = set(path)
+            for parent_key, option_id in optimal_option_lookup.get(str(issue.id), {}).items():
+                if path_set.issuperset(parent_key):
+                    return [option_id]
+            return [str(option.id) for option in issue.decision.options]
+        if issue.type == Type.UNCERTAINTY.value and issue.uncertainty is not None:
+            return [str(outcome.id) for outcome in issue.uncertainty.outcomes]
+        return []
+
+
+class PartialTreeSessionStore:
+    """Sessions keyed by project id and model fingerprint, bounded in count and lifetime."""
+
+    def __init__(
+        self,
+        seconds: int = config.PARTIAL_TREE_SESSION_TTL_SECONDS,
+        maxsize: int = config.PARTIAL_TREE_SESSION_MAX_COUNT,
+    ) -> None:
+        self.sessions: TimedLruCache[tuple[uuid.UUID, str], PartialTreeSession] = TimedLruCache(
+            seconds=seconds, maxsize=maxsize
+        )
+
+    def get_session(
+        self, project_id: uuid.UUID, model_fingerprint: str
+    ) -> Optional[PartialTreeSession]:
+        return self.sessions.get((project_id, model_fingerprint))
+
+    def add_session(self, session: PartialTreeSession) -> None:
+        self.sessions.set((session.project_id, session.model_fingerprint), session)
+
+    def remove_project_sessions(self, project_id: uuid.UUID) -> None:
+        for key in self.sessions.keys():
+            if key[0] == project_id:
+                self.sessions.pop(key)
@@ -1,6 +1,7 @@
 import uuid
 import pyagrum as gum  # type: ignore
 from itertools import product
+from src.config import config
 from src.constants import Type
 from src.utils.discrete_probability_array_manager import DiscreteProbabilityArrayManager
 from src.dtos.issue_dtos import IssueOutgoingDto
@@ -14,6 +15,9 @@ from src.dtos.model_solution_dtos import (
     SolutionDto,
 )
 from src.services.decision_tree.decision_tree_creator import DecisionTreeCreator
+from src.services.joint_table_engine import JointTableEngine
+from src.services.chance_network import ChanceNetwork
+from src.utils.timed_cache import LruCache
 from typing import TypeVar, Optional
 
 T = TypeVar("T", OptionOutgoingDto, OutcomeOutgoingDto)
@@ -29,6 +33,15 @@ class PyagrumSolver:
         self.edges: list[EdgeOutgoingDto] = []
         self.ie: Optional[gum.ShaferShenoyLIMIDInference] = None
         self.partial_order: Optional[list[uuid.UUID]] = None
+        # results of path queries, keyed by query type, issue id and the evidence state ids
+        self.path_query_cache: LruCache[
+            tuple[str, str, frozenset[str]], float | dict[str, float]
+        ] = LruCache(config.PATH_QUERY_CACHE_MAX_SIZE)
+        # created on the first path query, None when the joint tables are too large
+        self.joint_table_engine: Optional[JointTableEngine] = None
+        self.joint_table_engine_initialized = False
+        # created on the first posterior query the joint tables can not answer
+        self.chance_network: Optional[ChanceNetwork] = None
 
     def _reset_diagram(self):
         self.diagram = gum.InfluenceDiagram()
@@ -179,19 +192,36 @@ class PyagrumSolver:
         if self.partial_order is None:
             raise RuntimeError("Partial order has not been calculated. Call find_optimal_decisions first.")
         return self.partial_order
+
+    def get_joint_table_engine(self) -> Optional[JointTableEngine]:
+        if not self.joint_table_engine_initialized:
+            self.joint_table_engine = JointTableEngine.create_if_fits(
+                self.diagram, [str(x) for x in self.get_partial_order()]
+            )
+            self.joint_table_engine_initialized = True
+        return self.joint_table_engine
+
+    def get_chance_network(self) -> ChanceNetwork:
+        if self.chance_network is None:
+            self.chance_network = ChanceNetwork(self.diagram)
+        return self.chance_network
     
     async def build_inference_engine(self, issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]) -> gum.ShaferShenoyLIMIDInference:
         self.build_influence_diagram(issues, edges)
+        self.path_query_cache.clear()
+        self.joint_table_engine = None
+        self.joint_table_engine_initialized = False
+        self.chance_network = None
 
-        decision_tree_creator = await DecisionTreeCreator.initialize(project_id = issues[0].project_id,
+        decision_tree_creator = DecisionTreeCreator.initialize(project_id = issues[0].project_id,
             nodes = issues,
             edges = edges
         )
         
-        partial_order = await decision_tree_creator.calculate_partial_order()
+        partial_order = decision_tree_creator.calculate_partial_order()
 
         partial_order = [
-            (await decision_tree_creator.get_node_from_uuid(tree_node_id))
+            decision_tree_creator.get_node_from_uuid(tree_node_id)
             for tree_node_id in partial_order
         ]
 
@@ -225,7 +255,12 @@ class PyagrumSolver:
         return solutions
     
     async def get_mean_expected_utilities_given_evidence(self, issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto], evidence: list[list[uuid.UUID]] = []) -> list[Optional[float]]:
-        ie = await self.build_inference_engine(issues, edges)
+        await self.build_inference_engine(issues, edges)
+        return self.get_mean_expected_utilities(evidence)
+
+    def get_mean_expected_utilities(self, evidence: list[list[uuid.UUID]]) -> list[Optional[float]]:
+        """MEUs of the built inference engine, one for each evidence set."""
+        ie = self.get_inference()
         MEUs: list[Optional[float]] = []
         for evidence_item in evidence:
             ie_with_evidence = self.set_evidence(ie, [str(x) for x in evidence_item])
@@ -252,12 +287,40 @@ class PyagrumSolver:
         return ie
     
     def get_expected_utility_given_path(self, issue_id: str, state_ids: list[str]) -> float:
-        ie = self.get_inference()
-        ie_with_evidence = self.set_evidence(ie, state_ids)
-        expected_utility = self._pyagrum_get_mean_utility(ie_with_evidence, issue_id)
+        cache_key = ("expected_utility", issue_id, frozenset(state_ids))
+        cached = self.path_query_cache.get(cache_key)
+        if cached is not None:
+            return cached  # type: ignore
+        joint_table_engine = self.get_joint_table_engine()
+        expected_utility = (
+            joint_table_engine.get_expected_utility_given_path(issue_id, state_ids)
+            if joint_table_engine is not None
+            else None
+        )
+        if expected_utility is None:
+            ie = self.get_inference()
+            ie_with_evidence = self.set_evidence(ie, state_ids)
+            expected_utility = self._pyagrum_get_mean_utility(ie_with_evidence, issue_id)
+        self.path_query_cache.set(cache_key, expected_utility)
         return expected_utility
      
     def get_posterior_given_path(self, issue_id: str, state_ids: list[str]) -> dict[str, float]:
+        cache_key = ("posterior", issue_id, frozenset(state_ids))
+        cached = self.path_query_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)  # type: ignore
+        joint_table_engine = self.get_joint_table_engine()
+        if joint_table_engine is not None:
+            state_to_probability = joint_table_engine.get_posterior_given_path(issue_id, state_ids)
+            if state_to_probability is not None:
+                self.path_query_cache.set(cache_key, dict(state_to_probability))
+                return state_to_probability
+        state_to_probability = self.get_chance_network().get_posterior_given_path(
+            issue_id, state_ids
+        )
+        if state_to_probability is not None:
+            self.path_query_cache.set(cache_key, dict(state_to_probability))
+            return state_to_probability
         ie = self.get_inference()
         ie_with_evidence = self.set_evidence(ie, state_ids)
 
@@ -267,6 +330,7 @@ class PyagrumSolver:
         labels = self._pyagrum_get_node_labels(issue_id)
         probs: list[float] = posterior.toarray().tolist() # type: ignore
         state_to_probability = {label: prob for label, prob in zip(labels, probs)} # type: ignore
+        self.path_query_cache.set(cache_key, dict(state_to_probability))
         return state_to_probability
     
     def add_node(self, issue: IssueOutgoingDto):
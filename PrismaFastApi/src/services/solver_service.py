@@ -1,10 +1,16 @@
+import asyncio
+import math
 import uuid
 from typing import Optional
 from src.utils.visit_tree_node_and_populate import visit_tree_node_and_populate
 from src.services.decision_tree.decision_tree_creator_v3 import DecisionTreeCreator_v3
+from src.services.decision_tree.decision_tree_dto_adapter import DecisionTreeDtoAdapter
 from concurrent.futures import ThreadPoolExecutor
 from src.services.pyagrum_solver import PyagrumSolver
-from src.services.decision_tree.decision_tree_creator import DecisionTreeCreator
+from src.services.decision_tree.decision_tree_creator import (
+    DecisionTreeCreator,
+    DecisionTreeGraph,
+)
 from src.services.decision_tree_pruning_service import (
     DecisionTreePruningService,
     OptimalDecisionTreePruner,
@@ -16,6 +22,16 @@ from src.services.decision_tree_pruning_service import (
 from src.dtos.issue_dtos import IssueOutgoingDto
 from src.dtos.edge_dtos import EdgeOutgoingDto
 from src.dtos.model_solution_dtos import SolutionDto
+from src.dtos.evidence_dtos import EvidenceIncomingDto, EvidenceOutgoingDto
+from src.dtos.decision_tree_dtos import (
+    DecisionTreeDto,
+    DecisionTreeDtoOld,
+    PartialDecisionTreeIncrementDto,
+    TreeNodeDto2,
+    TreeNodeIncrementDto,
+)
+from src.services.partial_tree_session import PartialTreeSession, PartialTreeSessionStore
+from src.utils.model_fingerprint import get_model_fingerprint
 from src.constants import Type
 
 executor = ThreadPoolExecutor()
@@ -25,7 +41,8 @@ class SolverService:
     def __init__(
         self,
     ):
-        pass
+        # tree branches skipped as impossible in the last decision tree built by this service
+        self.skipped_tree_node_count: int = 0
 
     async def find_optimal_decision_pyagrum(
         self, issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
@@ -56,71 +73,115 @@ class SolverService:
         solver = PyagrumSolver()
         return await solver.get_mean_expected_utilities_given_evidence(issues=issues, edges=edges, evidence=evidence)
 
+    def populate_evidence(
+        self, evidence: list[EvidenceIncomingDto], results: list[Optional[float]]
+    ) -> list[EvidenceOutgoingDto]:
+        """Pairs the evidence with its MEU, raises if any of the evidence is impossible."""
+        # decision_solutions[0].mean is the expected utility for the first optimal decision, i.e. the root node which represents the expected utility for the model
+        populated_evidence = [
+            EvidenceOutgoingDto(
+                evidence_id=evi.evidence_id,
+                state_ids=evi.state_ids,
+                expected_utility=results[n] 
+                if len(results) > n and not math.isnan(results[n]) # type: ignore
+                else None,
+            )
+            for n, evi in enumerate(evidence)
+        ]
+        exception_message = ""
+        for populated in populated_evidence:
+            if populated.expected_utility is None:
+                exception_message += f"Impossible state reached for evidence {populated.evidence_id} with state_ids {populated.state_ids}\n"
+        # If any of the evidence leads to an impossible state, we raise an exception with the details of which evidence caused the issue. 
+        if exception_message:
+            raise ValueError(f"One or more evidence states lead to an impossible state:\n{exception_message}")
+
+        return populated_evidence
+
     async def get_decision_tree_for_optimal_decisions_old(
         self, project_id: uuid.UUID, issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
     ):
 
         solution = await PyagrumSolver().find_optimal_decisions(issues=issues, edges=edges)
-
-        decision_tree_creator = await DecisionTreeCreator.initialize(
-            project_id, nodes=issues, edges=edges
-        )
-        DT_partial_order = await decision_tree_creator.calculate_partial_order()
-        decision_tree = await decision_tree_creator.convert_to_decision_tree(
-            project_id=issues[0].project_id, partial_order=DT_partial_order
+        return await asyncio.to_thread(
+            self.create_pruned_decision_tree_old, project_id, issues, edges, solution
         )
 
-        dt_dtos = await decision_tree.to_issue_dtos_old()
-        if dt_dtos is None:
-            raise ValueError("Failed to generate decision tree")
-
-        pruning_service = DecisionTreePruningServiceOld(pruner=OptimalDecisionTreePrunerOld())
-        return pruning_service.prune_tree_for_optimal_decisions(dt_dtos, solution)
-
     async def get_decision_tree_for_optimal_decisions(
         self, project_id: uuid.UUID, issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
     ):
 
         solution = await PyagrumSolver().find_optimal_decisions(issues=issues, edges=edges)
+        return await asyncio.to_thread(
+            self.create_pruned_decision_tree, project_id, issues, edges, solution
+        )
 
-        decision_tree_creator = await DecisionTreeCreator.initialize(
-            project_id, nodes=issues, edges=edges
+    async def get_decision_tree_for_optimal_decisions_from_dtos(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+    ):
+        solution = await PyagrumSolver().find_optimal_decisions(issues=issues, edges=edges)
+        return await asyncio.to_thread(
+            self.create_pruned_decision_tree, project_id, issues, edges, solution
         )
-        DT_partial_order = await decision_tree_creator.calculate_partial_order()
-        decision_tree = await decision_tree_creator.convert_to_decision_tree(
-            project_id=issues[0].project_id, partial_order=DT_partial_order
+
+    def create_optimal_decision_tree_graph(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        solution: SolutionDto,
+    ) -> DecisionTreeGraph:
+        decision_tree_creator = DecisionTreeCreator.initialize(project_id, nodes=issues, edges=edges)
+        DT_partial_order = decision_tree_creator.calculate_partial_order()
+        # only the optimal branch of each decision is built, the pruner removes impossible outcomes
+        decision_tree = decision_tree_creator.convert_to_decision_tree(
+            project_id=issues[0].project_id, partial_order=DT_partial_order, solution=solution
         )
+        self.skipped_tree_node_count = decision_tree.skipped_node_count
+        return decision_tree
 
-        dt_dtos = await decision_tree.to_issue_dtos()
+    def create_pruned_decision_tree_old(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        solution: SolutionDto,
+    ) -> Optional[DecisionTreeDtoOld]:
+        decision_tree = self.create_optimal_decision_tree_graph(project_id, issues, edges, solution)
+        dt_dtos = decision_tree.to_issue_dtos_old()
         if dt_dtos is None:
             raise ValueError("Failed to generate decision tree")
 
-        pruning_service = DecisionTreePruningService(pruner=OptimalDecisionTreePruner())
+        pruning_service = DecisionTreePruningServiceOld(pruner=OptimalDecisionTreePrunerOld())
         return pruning_service.prune_tree_for_optimal_decisions(dt_dtos, solution)
 
-    async def get_decision_tree_for_optimal_decisions_from_dtos(
+    def create_pruned_decision_tree(
         self,
         project_id: uuid.UUID,
         issues: list[IssueOutgoingDto],
         edges: list[EdgeOutgoingDto],
-    ):
-        solution = await PyagrumSolver().find_optimal_decisions(issues=issues, edges=edges)
-
-        decision_tree_creator = await DecisionTreeCreator.initialize(
+        solution: SolutionDto,
+    ) -> Optional[DecisionTreeDto]:
+        # built by the v3 engine and converted to the v2 response shape
+        decision_tree_creator = DecisionTreeCreator_v3.initialize(
             project_id, nodes=issues, edges=edges
         )
-        DT_partial_order = await decision_tree_creator.calculate_partial_order()
-        decision_tree = await decision_tree_creator.convert_to_decision_tree(
-            project_id=issues[0].project_id, partial_order=DT_partial_order
+        decision_tree = decision_tree_creator.convert_to_decision_tree(
+            project_id=issues[0].project_id, solution=solution
+        )
+        self.skipped_tree_node_count = decision_tree.skipped_node_count
+        dt_dtos = DecisionTreeDtoAdapter(issues[0].project_id, issues).to_decision_tree_dto(
+            decision_tree.to_issue_dtos()
         )
-
-        dt_dtos = await decision_tree.to_issue_dtos()
         if dt_dtos is None:
             raise ValueError("Failed to generate decision tree")
 
         pruning_service = DecisionTreePruningService(pruner=OptimalDecisionTreePruner())
         return pruning_service.prune_tree_for_optimal_decisions(dt_dtos, solution)
-        
+
     async def get_decision_tree_for_optimal_decisions_from_dtos_by_constructing_paths(
             self, 
             project_id: uuid.UUID, 
@@ -135,7 +196,20 @@ class SolverService:
 
         solver = PyagrumSolver()
         solution = await solver.find_optimal_decisions(issues=issues, edges=edges)
+        return self.create_optimal_partial_decision_tree(
+            project_id, issues, edges, paths, solver, solution
+        )
 
+    def create_optimal_partial_decision_tree(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        paths: list[list[uuid.UUID]],
+        solver: PyagrumSolver,
+        solution: SolutionDto,
+    ) -> Optional[TreeNodeDto2]:
+        """The partial tree of the optimal paths, populated by the solver the model was solved by."""
         paths = self.filter_paths_from_solution(solution, paths, issues)
 
         decision_tree_creator = DecisionTreeCreator_v3.initialize(project_id, nodes = issues, edges = edges)
@@ -147,6 +221,47 @@ class SolverService:
         visit_tree_node_and_populate(solver, [], dt_dtos, solution=solution)
         return dt_dtos
     
+    async def get_partial_decision_tree_increment(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        paths: list[list[uuid.UUID]],
+        session_store: PartialTreeSessionStore,
+        reset: bool = False,
+    ) -> PartialDecisionTreeIncrementDto:
+        """
+        Expands the partial decision tree kept in the session for the model with the new paths
+        and returns only the tree nodes that were not returned before.
+        The model is solved once per session and only the tree nodes below the new paths are
+        built and populated.
+        """
+        if not issues:
+            raise ValueError("issues must be provided and non-empty")
+
+        model_fingerprint = get_model_fingerprint(issues, edges)
+        session = session_store.get_session(project_id, model_fingerprint)
+        if session is None:
+            solver = PyagrumSolver()
+            solution = await solver.find_optimal_decisions(issues=issues, edges=edges)
+            session = PartialTreeSession(
+                project_id, model_fingerprint, issues, edges, solver, solution
+            )
+            session_store.add_session(session)
+        elif reset:
+            session.reset()
+
+        paths = self.filter_paths_from_solution(session.solution, paths, session.issues)
+        # the solver lock is taken in a worker thread, speculation may be holding it
+        nodes = await asyncio.to_thread(self.expand_session, session, paths)
+        return PartialDecisionTreeIncrementDto(model_fingerprint=model_fingerprint, nodes=nodes)
+
+    def expand_session(
+        self, session: PartialTreeSession, paths: list[list[uuid.UUID]]
+    ) -> list[TreeNodeIncrementDto]:
+        with session.solver_lock:
+            return session.expand(paths)
+
     def filter_paths_from_solution(
         self,
         solution: SolutionDto,
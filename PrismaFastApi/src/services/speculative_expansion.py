@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from src.config import config
+from src.constants import Type
+from src.logger import get_dot_api_logger
+from src.services.partial_tree_session import PartialTreeSession
+
+logger = get_dot_api_logger()
+
+
+class SpeculativeExpander:
+    """
+    Precomputes the solver queries for the next expansion of a partial tree session while the
+    worker is idle, so the following request is answered from the solver cache.
+
+    The queries run one at a time in a worker thread holding the session's solver lock, and the
+    cancel flag is checked between queries so a request arriving waits for one query at most.
+    Each expansion runs at most `max_queries` queries, the solver cache itself is bounded.
+    """
+
+    def __init__(self, max_queries: int = config.SPECULATIVE_EXPANSION_MAX_QUERIES) -> None:
+        self.max_queries = max_queries
+        # asyncio only keeps weak references to tasks, so they are kept here until done
+        self.tasks: set[asyncio.Task[None]] = set()
+        self.cancelled = threading.Event()
+
+    async def schedule(self, session: PartialTreeSession) -> None:
+        self.cancel()
+        frontier = session.frontier
+        if frontier:
+            self.cancelled = threading.Event()
+            task = asyncio.create_task(
+                asyncio.to_thread(self._expand_frontier, session, frontier, self.cancelled)
+            )
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def _expand_frontier(
+        self,
+        session: PartialTreeSession,
+        frontier: list[tuple[str, str, list[str]]],
+        cancelled: threading.Event,
+    ) -> None:
+        solver = session.solver
+        query_count = 0
+        for issue_id, issue_type, path in frontier:
+            if query_count >= self.max_queries:
+                logger.info("Speculative expansion stopped, the query budget is used")
+                return
+            with session.solver_lock:
+                if cancelled.is_set():
+                    return
+                if issue_type == Type.UNCERTAINTY.value:
+                    solver.get_posterior_given_path(issue_id=issue_id, state_ids=path)
+                    query_count += 1
+                solver.get_expected_utility_given_path(issue_id=issue_id, state_ids=path)
+                query_count += 1
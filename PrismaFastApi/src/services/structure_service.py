@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from typing import Optional
 from src.services.decision_tree.decision_tree_creator_v3 import DecisionTreeCreator_v3
@@ -5,14 +6,19 @@ from src.dtos.decision_tree_dtos import DecisionTreeDto, PartialOrderDto, TreeNo
 from src.dtos.issue_dtos import IssueOutgoingDto
 from src.dtos.edge_dtos import EdgeOutgoingDto
 from src.services.decision_tree.decision_tree_creator import DecisionTreeCreator
+from src.services.decision_tree.parallel_tree_builder import ParallelTreeBuilder
+from src.services.decision_tree.decision_tree_dto_adapter import DecisionTreeDtoAdapter
 from src.utils.visit_tree_node_and_populate import visit_tree_node_and_populate
 from src.services.pyagrum_solver import PyagrumSolver
 
 
 
 class StructureService:
-    def __init__(self):
-        pass
+    def __init__(self, tree_builder: Optional[ParallelTreeBuilder] = None):
+        # builds full v3 trees, in one process unless configured otherwise
+        self.tree_builder = tree_builder if tree_builder is not None else ParallelTreeBuilder(1)
+        # tree branches skipped as impossible in the last decision tree built by this service
+        self.skipped_tree_node_count: int = 0
 
     async def create_decision_tree_from_dtos(
         self,
@@ -20,11 +26,16 @@ class StructureService:
         issues: list[IssueOutgoingDto],
         edges: list[EdgeOutgoingDto],
     ) -> Optional[DecisionTreeDto]:
-        decision_tree_creator = await DecisionTreeCreator.initialize(
-            project_id=project_id, nodes=issues, edges=edges
-        )
-        dt = await decision_tree_creator.create_decision_tree()
-        return await dt.to_issue_dtos()
+        return await asyncio.to_thread(self.create_decision_tree, project_id, issues, edges)
+
+    def create_decision_tree(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+    ) -> Optional[DecisionTreeDto]:
+        result, self.skipped_tree_node_count = self.tree_builder.build(project_id, issues, edges)
+        return DecisionTreeDtoAdapter(project_id, issues).to_decision_tree_dto(result)
 
     async def create_partial_order_from_dtos(
         self,
@@ -32,10 +43,10 @@ class StructureService:
         issues: list[IssueOutgoingDto],
         edges: list[EdgeOutgoingDto],
     ) -> Optional[PartialOrderDto]:
-        decision_tree_creator = await DecisionTreeCreator.initialize(
+        decision_tree_creator = DecisionTreeCreator.initialize(
             project_id=project_id, nodes=issues, edges=edges
         )
-        uuid_list = await decision_tree_creator.calculate_partial_order_issues()
+        uuid_list = decision_tree_creator.calculate_partial_order_issues()
         return PartialOrderDto(issue_ids=uuid_list)
 
     def create_decision_tree_from_dtos_optimal(
@@ -44,11 +55,8 @@ class StructureService:
         issues: list[IssueOutgoingDto] = [],
         edges: list[EdgeOutgoingDto] = [],
     ) -> Optional[TreeNodeDto2]:
-        decision_tree_creator = DecisionTreeCreator_v3.initialize(
-            project_id=project_id, nodes=issues, edges=edges
-        )
-        dt = decision_tree_creator.create_decision_tree()
-        return dt.to_issue_dtos()
+        result, self.skipped_tree_node_count = self.tree_builder.build(project_id, issues, edges)
+        return result
 
     async def create_partial_decision_tree_from_dtos_optimal(
         self,
@@ -63,12 +71,22 @@ class StructureService:
             edges = []
         if paths is None:
             paths = []
-        decision_tree_creator = DecisionTreeCreator_v3.initialize(
-            project_id=project_id, nodes=issues, edges=edges
-        )
         solver = PyagrumSolver()
         await solver.build_inference_engine(issues=issues, edges=edges)
+        return self.create_partial_decision_tree(project_id, issues, edges, paths, solver)
 
+    def create_partial_decision_tree(
+        self,
+        project_id: uuid.UUID,
+        issues: list[IssueOutgoingDto],
+        edges: list[EdgeOutgoingDto],
+        paths: list[list[uuid.UUID]],
+        solver: PyagrumSolver,
+    ) -> Optional[TreeNodeDto2]:
+        """The partial tree of the paths, populated by a solver with the inference engine built."""
+        decision_tree_creator = DecisionTreeCreator_v3.initialize(
+            project_id=project_id, nodes=issues, edges=edges
+        )
         dt = decision_tree_creator.create_decision_tree_partial(paths=paths)
         res: Optional[TreeNodeDto2] = dt.to_issue_dtos(backwards_calc=False)
         if res is None:
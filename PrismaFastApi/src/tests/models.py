@@ -0,0 +1,223 @@
+"""Small influence diagrams built as outgoing dtos, for tests."""
+
+import itertools
+import uuid
+from datetime import datetime
+from typing import Callable, Optional
+from src.constants import Type
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+
+PROJECT_ID = uuid.UUID(int=1)
+CREATED_AT = datetime(2025, 1, 1).isoformat()
+
+# issue name -> (type, state names, probability or utility function of the parent state ids)
+IssueSpec = tuple[str, Optional[list[str]], Optional[Callable[..., object]]]
+
+
+def state_id(name: str) -> uuid.UUID:
+    return uuid.uuid5(uuid.NAMESPACE_DNS, name)
+
+
+def build_model(
+    spec: dict[str, IssueSpec], arcs: list[tuple[str, str]]
+) -> tuple[list[IssueOutgoingDto], list[EdgeOutgoingDto]]:
+    states = {
+        name: [state_id(f"{name}.{state}") for state in state_names]
+        for name, (_, state_names, _) in spec.items()
+        if state_names
+    }
+    issues: dict[str, dict[str, object]] = {}
+    for name, (issue_type, state_names, function) in spec.items():
+        issue_id = state_id(name)
+        parents = [tail for tail, head in arcs if head == name and tail in states]
+        parent_combinations = list(
+            itertools.product(*[[(parent, s) for s in states[parent]] for parent in parents])
+        )
+        node_id = state_id(f"{name}.node")
+        issue: dict[str, object] = dict(
+            id=issue_id,
+            project_id=PROJECT_ID,
+            name=name,
+            description=name,
+            order=0,
+            type=issue_type,
+            boundary="in",
+            node=dict(
+                id=node_id,
+                project_id=PROJECT_ID,
+                issue_id=issue_id,
+                name=name,
+                node_style=dict(id=state_id(f"{name}.style"), node_id=node_id),
+            ),
+            decision=None,
+            uncertainty=None,
+            utility=None,
+            created_at=CREATED_AT,
+            updated_at=CREATED_AT,
+        )
+
+        def parent_ids(combination: tuple[tuple[str, uuid.UUID], ...], parent_type: str):
+            return [s for parent, s in combination if spec[parent][0] == parent_type]
+
+        if issue_type == Type.DECISION.value and state_names:
+            decision_id = state_id(f"{name}.decision")
+            issue["decision"] = dict(
+                id=decision_id,
+                issue_id=issue_id,
+                type="Focus",
+                options=[
+                    dict(
+                        id=s,
+                        name=f"{name}.{state}",
+                        decision_id=decision_id,
+                        utility=function(state) if function else 0,
+                    )
+                    for s, state in zip(states[name], state_names)
+                ],
+            )
+        if issue_type == Type.UNCERTAINTY.value and state_names and function:
+            uncertainty_id = state_id(f"{name}.uncertainty")
+            issue["uncertainty"] = dict(
+                id=uncertainty_id,
+                issue_id=issue_id,
+                is_key=True,
+                outcomes=[
+                    dict(id=s, name=f"{name}.{state}", uncertainty_id=uncertainty_id, utility=0)
+                    for s, state in zip(states[name], state_names)
+                ],
+                discrete_probabilities=[
+                    dict(
+                        id=state_id(f"{name}.{combination}.{outcome_id}"),
+                        uncertainty_id=uncertainty_id,
+                        outcome_id=outcome_id,
+                        probability=probability,
+                        parent_outcome_ids=parent_ids(combination, Type.UNCERTAINTY.value),
+                        parent_option_ids=parent_ids(combination, Type.DECISION.value),
+                    )
+                    for combination in parent_combinations
+                    for outcome_id, probability in zip(
+                        states[name], function({str(s) for _, s in combination})
+                    )
+                ],
+            )
+        if issue_type == Type.UTILITY.value and function:
+            utility_id = state_id(f"{name}.utility")
+            issue["utility"] = dict(
+                id=utility_id,
+                issue_id=issue_id,
+                discrete_utilities=[
+                    dict(
+                        id=state_id(f"{name}.{combination}"),
+                        utility_id=utility_id,
+                        utility_value=function({str(s) for _, s in combination}),
+                        parent_outcome_ids=parent_ids(combination, Type.UNCERTAINTY.value),
+                        parent_option_ids=parent_ids(combination, Type.DECISION.value),
+                    )
+                    for combination in parent_combinations
+                ],
+            )
+        issues[name] = issue
+
+    def edge_node(name: str) -> dict[str, object]:
+        issue = issues[name]
+        node = dict(issue["node"])  # type: ignore
+        node["issue"] = {
+            key: value
+            for key, value in issue.items()
+            if key not in ("node", "created_at", "updated_at")
+        }
+        return node
+
+    edges = [
+        dict(
+            id=state_id(f"{tail}->{head}"),
+            project_id=PROJECT_ID,
+            tail_id=issues[tail]["node"]["id"],  # type: ignore
+            head_id=issues[head]["node"]["id"],  # type: ignore
+            tail_issue_id=issues[tail]["id"],
+            head_issue_id=issues[head]["id"],
+            tail_node=edge_node(tail),
+            head_node=edge_node(head),
+        )
+        for tail, head in arcs
+    ]
+    return (
+        [IssueOutgoingDto.model_validate(issue) for issue in issues.values()],
+        [EdgeOutgoingDto.model_validate(edge) for edge in edges],
+    )
+
+
+def oil_model() -> tuple[list[IssueOutgoingDto], list[EdgeOutgoingDto]]:
+    """The oil wildcatter, a test decision before a seismic outcome and the drill decision."""
+
+    def seismic(parents: set[str]) -> list[float]:
+        if str(state_id("Test.no")) in parents:
+            return [1 / 3, 1 / 3, 1 / 3]
+        if str(state_id("Oil.dry")) in parents:
+            return [0.1, 0.3, 0.6]
+        if str(state_id("Oil.wet")) in parents:
+            return [0.3, 0.4, 0.3]
+        return [0.5, 0.4, 0.1]
+
+    def value(parents: set[str]) -> float:
+        if str(state_id("Drill.no")) in parents:
+            return 0
+        if str(state_id("Oil.dry")) in parents:
+            return -70
+        return 50 if str(state_id("Oil.wet")) in parents else 200
+
+    spec: dict[str, IssueSpec] = {
+        "Test": ("Decision", ["yes", "no"], lambda state: -10 if state == "yes" else 0),
+        "Oil": ("Uncertainty", ["dry", "wet", "soak"], lambda parents: [0.5, 0.3, 0.2]),
+        "Seismic": ("Uncertainty", ["closed", "open", "diffuse"], seismic),
+        "Drill": ("Decision", ["yes", "no"], None),
+        "Value": ("Utility", None, value),
+    }
+    arcs = [
+        ("Test", "Seismic"),
+        ("Oil", "Seismic"),
+        ("Seismic", "Drill"),
+        ("Test", "Drill"),
+        ("Drill", "Value"),
+        ("Oil", "Value"),
+    ]
+    return build_model(spec, arcs)
+
+
+def investment_model() -> tuple[list[IssueOutgoingDto], list[EdgeOutgoingDto]]:
+    """Two decisions with a market outcome in between, the market depends on the investment."""
+
+    def market(parents: set[str]) -> list[float]:
+        if str(state_id("Invest.big")) in parents:
+            return [0.6, 0.4]
+        return [0.5, 0.5] if str(state_id("Invest.small")) in parents else [1.0, 0.0]
+
+    def value(parents: set[str]) -> float:
+        demand = 100 if str(state_id("Demand.high")) in parents else -20
+        return demand * (2 if str(state_id("Expand.yes")) in parents else 1)
+
+    spec: dict[str, IssueSpec] = {
+        "Invest": (
+            "Decision",
+            ["big", "small", "none"],
+            lambda state: {"big": -30, "small": -10, "none": 0}[state],
+        ),
+        "Market": ("Uncertainty", ["up", "down"], market),
+        "Expand": ("Decision", ["yes", "no"], None),
+        "Demand": (
+            "Uncertainty",
+            ["high", "low"],
+            lambda parents: [0.7, 0.3] if str(state_id("Market.up")) in parents else [0.2, 0.8],
+        ),
+        "Value": ("Utility", None, value),
+    }
+    arcs = [
+        ("Invest", "Market"),
+        ("Market", "Expand"),
+        ("Invest", "Expand"),
+        ("Market", "Demand"),
+        ("Expand", "Value"),
+        ("Demand", "Value"),
+    ]
+    return build_model(spec, arcs)
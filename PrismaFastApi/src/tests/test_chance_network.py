@@ -0,0 +1,52 @@
+import asyncio
+import itertools
+import math
+import pytest
+from src.constants import Type
+from src.services.pyagrum_solver import PyagrumSolver
+from src.tests.models import investment_model, oil_model
+
+
+def get_limid_posterior(
+    solver: PyagrumSolver, issue_id: str, path: list[str]
+) -> list[float] | None:
+    try:
+        ie = solver.set_evidence(solver.get_inference(), path)
+        posterior: list[float] = ie.posterior(issue_id).toarray().tolist()  # type: ignore
+    except Exception:
+        return None  # impossible evidence
+    return None if any(math.isnan(p) for p in posterior) else posterior
+
+
+def get_path_prefixes(solver: PyagrumSolver) -> list[list[str]]:
+    partial_order = [str(issue_id) for issue_id in solver.get_partial_order()]
+    states = [list(solver._pyagrum_get_node_labels(issue_id)) for issue_id in partial_order]
+    return [
+        list(path)
+        for depth in range(len(partial_order) + 1)
+        for path in itertools.product(*states[:depth])
+    ]
+
+
+@pytest.mark.parametrize("model", [oil_model, investment_model])
+def test_posterior_given_path_matches_limid(model) -> None:
+    issues, edges = model()
+    solver = PyagrumSolver()
+    asyncio.run(solver.find_optimal_decisions(issues, edges))
+    uncertainty_ids = [str(i.id) for i in issues if i.type == Type.UNCERTAINTY.value]
+
+    compared = 0
+    for path in get_path_prefixes(solver):
+        for issue_id in uncertainty_ids:
+            expected = get_limid_posterior(solver, issue_id, path)
+            if expected is None:
+                continue
+            for posterior in (
+                solver.get_chance_network().get_posterior_given_path(issue_id, path),
+                solver.get_posterior_given_path(issue_id, path),
+            ):
+                if posterior is None:
+                    continue  # left to the LIMID inference
+                assert list(posterior.values()) == pytest.approx(expected, abs=1e-9)
+                compared += 1
+    assert compared > 0
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from typing import Any, Callable, Optional
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+from src.services.pyagrum_solver import PyagrumSolver
+from src.services.structure_service import StructureService
+from src.utils.json_response import PydanticJsonResponse
+from src.tests.models import PROJECT_ID, investment_model, oil_model
+
+Model = tuple[list[IssueOutgoingDto], list[EdgeOutgoingDto]]
+
+
+def solution(
+    issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
+) -> Optional[BaseModel]:
+    return asyncio.run(PyagrumSolver().find_optimal_decisions(issues, edges))
+
+
+def tree_node(
+    issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
+) -> Optional[BaseModel]:
+    return StructureService().create_decision_tree_from_dtos_optimal(PROJECT_ID, issues, edges)
+
+
+def decision_tree(
+    issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
+) -> Optional[BaseModel]:
+    return StructureService().create_decision_tree(PROJECT_ID, issues, edges)
+
+
+def partial_order(
+    issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
+) -> Optional[BaseModel]:
+    return asyncio.run(
+        StructureService().create_partial_order_from_dtos(PROJECT_ID, issues, edges)
+    )
+
+
+@pytest.mark.parametrize("model", [oil_model, investment_model])
+@pytest.mark.parametrize("create_dto", [solution, tree_node, decision_tree, partial_order])
+def test_body_matches_default_response(
+    model: Callable[[], Model], create_dto: Callable[..., Optional[BaseModel]]
+) -> None:
+    dto = create_dto(*model())
+    assert dto is not None
+    app = FastAPI()
+
+    @app.get("/default", response_model=type(dto))
+    async def default_response() -> Any:
+        return dto
+
+    @app.get("/pydantic", response_model=type(dto))
+    async def pydantic_response() -> PydanticJsonResponse:
+        return PydanticJsonResponse(dto)
+
+    client = TestClient(app)
+    expected = client.get("/default")
+    response = client.get("/pydantic")
+    assert response.headers["content-type"] == expected.headers["content-type"]
+    assert response.content == expected.content
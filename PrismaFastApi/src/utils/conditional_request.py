@@ -0,0 +1,70 @@
+import hashlib
+import json
+from typing import Any, Optional
+from fastapi import Response
+from pydantic_core import to_jsonable_python
+from src.domain.compact_model import ModelDtos
+from src.utils.model_fingerprint import get_model_content_fingerprint
+from src.utils.result_cache import CachedResult, ResultCache
+
+
+def etag_matches(if_none_match: str, etag: str, is_cached: bool) -> bool:
+    """
+    Weak comparison of an ETag with the ones in an If-None-Match header, `*` only matches a
+    response that is cached.
+    """
+    if if_none_match.strip() == "*":
+        return is_cached
+    opaque_tag = etag.removeprefix("W/")
+    return any(x.strip().removeprefix("W/") == opaque_tag for x in if_none_match.split(","))
+
+
+def get_request_key(path: str, model_dtos: ModelDtos, *parameters: Any) -> str:
+    """A hash of everything deciding the response of a request, its path, model and parameters."""
+    data = [
+        path,
+        get_model_content_fingerprint(model_dtos.issues, model_dtos.edges),
+        to_jsonable_python(parameters),
+    ]
+    return hashlib.sha256(json.dumps(data, separators=(",", ":")).encode()).hexdigest()
+
+
+class ConditionalRequest:
+    """
+    ETag handling of a request whose response is decided by the model and its parameters.
+    The ETag is a hash of those, so a request with the ETag in If-None-Match gets 304, or 412
+    when it is not a GET or HEAD as RFC 9110 requires, and a request made before gets the cached
+    body, both without solving or building a tree.
+    The ETags are weak, as a rebuilt tree has new ids for its end nodes.
+    """
+
+    def __init__(
+        self, path: str, method: str, if_none_match: Optional[str], result_cache: ResultCache
+    ):
+        self.path = path
+        self.method = method
+        self.if_none_match = if_none_match
+        self.result_cache = result_cache
+        self.etag = ""
+
+    def set_etag(self, model_dtos: ModelDtos, *parameters: Any) -> None:
+        self.etag = f'W/"{get_request_key(self.path, model_dtos, *parameters)}"'
+
+    def get_cached_response(self) -> Optional[Response]:
+        """
+        304 or 412 when the caller has the response already, otherwise the cached response if any.
+        """
+        cached = self.result_cache.get(self.etag)
+        if self.if_none_match is not None and etag_matches(
+            self.if_none_match, self.etag, cached is not None
+        ):
+            status_code = 304 if self.method in ("GET", "HEAD") else 412
+            return Response(status_code=status_code, headers={"ETag": self.etag})
+        if cached is None:
+            return None
+        return Response(content=cached.body, headers=cached.headers)
+
+    def cache_response(self, response: Response) -> Response:
+        response.headers["ETag"] = self.etag
+        self.result_cache.set(self.etag, CachedResult(bytes(response.body), dict(response.headers)))
+        return response
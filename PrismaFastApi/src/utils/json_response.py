@@ -0,0 +1,23 @@
+from typing import Any
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+class PydanticJsonResponse(Response):
+    """
+    JSON response for dtos built by the services. Returning it from a route skips validating the
+    result against the response model again, and the dto is serialized straight to bytes by
+    pydantic instead of going through jsonable_encoder and json.dumps.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if content is None:
+            return b"null"
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if isinstance(content, list) and all(isinstance(x, BaseModel) for x in content):
+            return to_json(content)
+        raise TypeError(f"Expected a pydantic model, got {type(content).__name__}")
@@ -0,0 +1,76 @@
+import json
+import hashlib
+from typing import Any
+from pydantic import TypeAdapter
+from src.dtos.issue_dtos import IssueOutgoingDto
+from src.dtos.edge_dtos import EdgeOutgoingDto
+
+issues_adapter = TypeAdapter(list[IssueOutgoingDto])
+
+
+def _issue_to_fingerprint_data(issue: IssueOutgoingDto) -> list[Any]:
+    """
+    Only the parts of an issue that affect solving and tree construction are included,
+    node styles, descriptions and timestamps are ignored.
+    """
+    data: list[Any] = [str(issue.id), issue.type, issue.name]
+    if issue.decision is not None:
+        data.append(
+            [[str(option.id), option.name, option.utility] for option in issue.decision.options]
+        )
+    if issue.uncertainty is not None:
+        data.append(
+            [[str(outcome.id), outcome.name, outcome.utility] for outcome in issue.uncertainty.outcomes]
+        )
+        data.append(
+            [
+                [
+                    str(probability.outcome_id),
+                    probability.probability,
+                    sorted(str(x) for x in probability.parent_outcome_ids),
+                    sorted(str(x) for x in probability.parent_option_ids),
+                ]
+                for probability in issue.uncertainty.discrete_probabilities
+            ]
+        )
+    if issue.utility is not None:
+        data.append(
+            [
+                [
+                    utility.utility_value,
+                    sorted(str(x) for x in utility.parent_outcome_ids),
+                    sorted(str(x) for x in utility.parent_option_ids),
+                ]
+                for utility in issue.utility.discrete_utilities
+            ]
+        )
+    return data
+
+
+def get_model_fingerprint(issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]) -> str:
+    """
+    Returns a stable hash of the model content. Issue and edge order is kept since it
+    decides the order of nodes in the partial order when there are ties.
+    """
+    data = [
+        [_issue_to_fingerprint_data(issue) for issue in issues],
+        [[str(edge.tail_issue_id), str(edge.head_issue_id)] for edge in edges],
+    ]
+    serialized = json.dumps(data, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def get_model_content_fingerprint(
+    issues: list[IssueOutgoingDto], edges: list[EdgeOutgoingDto]
+) -> str:
+    """
+    Returns a stable hash of everything in the model a response can contain, v2 decision trees
+    include the whole issues. Only the timestamps are left out, as compact models get new ones
+    every time they are expanded.
+    """
+    hasher = hashlib.sha256(
+        issues_adapter.dump_json(issues, exclude={"__all__": {"created_at", "updated_at"}})
+    )
+    edge_data = [[str(edge.tail_issue_id), str(edge.head_issue_id)] for edge in edges]
+    hasher.update(json.dumps(edge_data, separators=(",", ":")).encode())
+    return hasher.hexdigest()
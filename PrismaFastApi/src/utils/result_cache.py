@@ -0,0 +1,71 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+from src.config import config
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    body: bytes
+    headers: dict[str, str]
+
+
+class ResultCache:
+    """
+    Response bodies keyed by ETag, bounded by their total size in bytes. Every entry expires
+    `seconds` after it was last used and the least recently used ones are evicted first.
+    """
+
+    def __init__(
+        self,
+        seconds: int = config.RESULT_CACHE_TTL_SECONDS,
+        max_bytes: int = config.RESULT_CACHE_MAX_BYTES,
+    ) -> None:
+        self.lifetime = seconds
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, CachedResult]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                self._remove(key)
+                return None
+            self._entries[key] = (now + self.lifetime, entry[1])
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, result: CachedResult) -> None:
+        if len(result.body) > self.max_bytes:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if key in self._entries:
+                self._remove(key)
+            expired = [k for k, (expiration, _) in self._entries.items() if expiration <= now]
+            for expired_key in expired:
+                self._remove(expired_key)
+            self._entries[key] = (now + self.lifetime, result)
+            self.size += len(result.body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        _, result = self._entries.pop(key)
+        self.size -= len(result.body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
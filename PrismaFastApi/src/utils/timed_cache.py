@@ -1,8 +1,13 @@
+import time
+from collections import OrderedDict
 from functools import lru_cache, wraps
 from datetime import datetime, timedelta, timezone
-from typing import Callable, TypeVar, Any, Optional, cast
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar, Any, Optional, cast
 
 F = TypeVar("F", bound=Callable[..., Any])
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
 
 
 def timed_lru_cache(seconds: int, maxsize: Optional[int] = None) -> Callable[[F], F]:
@@ -23,3 +28,109 @@ def timed_lru_cache(seconds: int, maxsize: Optional[int] = None) -> Callable[[F]
         return cast(F, wrapped_func)
 
     return wrapper_cache
+
+
+class TimedLruCache(Generic[K, V]):
+    """
+    Bounded key/value store where every entry expires `seconds` after it was last used.
+    When `maxsize` is exceeded the least recently used entry is evicted. Entries for which
+    `is_pinned` returns True are neither expired nor evicted, so the store can grow over
+    `maxsize` while they are pinned.
+    """
+
+    def __init__(
+        self, seconds: int, maxsize: int, is_pinned: Optional[Callable[[V], bool]] = None
+    ) -> None:
+        self.lifetime = seconds
+        self.maxsize = maxsize
+        self.is_pinned = is_pinned
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = Lock()
+
+    def _can_evict(self, value: V) -> bool:
+        return self.is_pinned is None or not self.is_pinned(value)
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [
+            key
+            for key, (expiration, value) in self._entries.items()
+            if expiration <= now and self._can_evict(value)
+        ]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now and self._can_evict(entry[1]):
+                del self._entries[key]
+                return None
+            self._entries[key] = (now + self.lifetime, entry[1])
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+            self._entries[key] = (now + self.lifetime, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                evictable = [key for key, (_, x) in self._entries.items() if self._can_evict(x)]
+                for key in evictable[: len(self._entries) - self.maxsize]:
+                    del self._entries[key]
+
+    def pop(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry is not None else None
+
+    def keys(self) -> list[K]:
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return list(self._entries.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class LruCache(Generic[K, V]):
+    """
+    Bounded key/value store without expiry.
+    When `maxsize` is exceeded the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -100,14 +100,13 @@ def _get_branch_probability(
     return 1.0
 
 
-def _visit_child(
+def _populate_child(
     solver: PyagrumSolver,
     tree_node: TreeNodeDto2,
     child: TreeNodeDto2,
     current_path: list[str],
     cumulative_probability: float,
-    solution: Optional[SolutionDto],
-) -> None:
+) -> float:
     state_id = child.parent_state_id
     if state_id is None:
         raise ValueError("State id is None for child node, cannot calculate expected utility")
@@ -119,7 +118,7 @@ def _visit_child(
 
     if child.type == Type.END.value:
         child.cumulative_probability = round(child_cumulative_probability, ndigits=PrecisionConstants.EXPECTED_UTILITY_PRECISION.value)
-        return
+        return child_cumulative_probability
 
     if child.type == Type.UNCERTAINTY.value:
         _populate_uncertainty_probabilities(solver, child, next_path)
@@ -132,16 +131,58 @@ def _visit_child(
         child.expected_value = 0
     else:
         child.expected_value = round(expected_utility, ndigits=PrecisionConstants.EXPECTED_UTILITY_PRECISION.value)
+    return child_cumulative_probability
+
+
+def _visit_child(
+    solver: PyagrumSolver,
+    tree_node: TreeNodeDto2,
+    child: TreeNodeDto2,
+    current_path: list[str],
+    cumulative_probability: float,
+    solution: Optional[SolutionDto],
+) -> None:
+    child_cumulative_probability = _populate_child(
+        solver, tree_node, child, current_path, cumulative_probability
+    )
+    if child.type == Type.END.value:
+        return
 
     visit_tree_node_and_populate(
         solver,
-        next_path,
+        current_path + [str(child.parent_state_id)],
         child,
         cumulative_probability=child_cumulative_probability,
         solution=solution,
     )
 
 
+def populate_tree_node(
+    solver: PyagrumSolver,
+    tree_node: TreeNodeDto2,
+    path_to_node: list[str],
+    parent: Optional[TreeNodeDto2] = None,
+    cumulative_probability: float = 1.0,
+    optimal_option_lookup: Optional[dict[str, dict[tuple[str, ...], str]]] = None,
+) -> float:
+    """
+    Populates a single tree node the way visit_tree_node_and_populate does, without visiting its
+    children. The parent must be populated already and cumulative_probability is the probability
+    of reaching the parent. Returns the probability of reaching the node.
+    """
+    if parent is None:
+        _populate_root_node_if_needed(solver, tree_node, path_to_node)
+        if tree_node.type == Type.END.value:
+            tree_node.cumulative_probability = cumulative_probability
+    else:
+        cumulative_probability = _populate_child(
+            solver, parent, tree_node, path_to_node[:-1], cumulative_probability
+        )
+    if optimal_option_lookup is not None and tree_node.type == Type.DECISION.value:
+        _prune_to_optimal_child(tree_node, path_to_node, optimal_option_lookup)
+    return cumulative_probability
+
+
 def visit_tree_node_and_populate(
     solver: PyagrumSolver,
     current_path: list[str],